@@ -1,5 +1,4 @@
 # C:/Users/Theminemat/Documents/Programming/desktop_ai/agent_builder.py
-import json
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox  # Keep messagebox for showinfo, showerror, etc.
@@ -8,29 +7,17 @@ import sys
 import time  # For TTS preview if added later
 import asyncio  # For TTS preview if added later
 
+from config_store import config_store
+from system_prompts import (
+    AGENT_SETTING_TEXT, AGENT_SETTING_ACTIVATION_WORD, AGENT_SETTING_STOP_WORDS,
+    AGENT_SETTING_CHAT_LENGTH, AGENT_SETTING_CHAT_TOKEN_BUDGET, AGENT_SETTING_TTS_VOICE, AGENT_SETTING_OPEN_LINKS,
+    load_system_prompts,
+)
+
 # from edge_tts import Communicate # For TTS preview if added later
 # import pygame # For TTS preview if added later
 
 
-# Constants related to system prompts
-SYSPROMPTS_FILE = "sysprompts.json"
-# SYSTEM_PROMPT_SUFFIX is now dynamically generated in get_full_system_prompt
-# Original for reference (will not be used directly by get_full_system_prompt anymore):
-# SYSTEM_PROMPT_SUFFIX = (
-#     "\n\nGenerate the reply so that a simple TTS can read it correctly. "
-#     "\nYou can open links on my PC by just including them in your message without formatting; "
-#     "just start links with https://. Also use this when the user asks you to search on a website like YouTube."
-# )
-
-# Define keys for agent-specific settings within the sysprompts.json structure
-AGENT_SETTING_TEXT = "text"
-AGENT_SETTING_ACTIVATION_WORD = "activation_word_override"
-AGENT_SETTING_STOP_WORDS = "stop_words_override"
-AGENT_SETTING_CHAT_LENGTH = "chat_length_override"
-AGENT_SETTING_TTS_VOICE = "tts_voice_override"
-AGENT_SETTING_OPEN_LINKS = "open_links_automatically_override"
-
-
 def resource_path_local(relative_path):  # Eigene Definition oder Import von main
     try:
         base_path = sys._MEIPASS
@@ -115,94 +102,9 @@ class CustomAskYesNoDialog(tk.Toplevel):
         return self.result
 
 
-def load_system_prompts(default_prompt_name, default_prompt_text):
-    default_agent_config = {
-        AGENT_SETTING_TEXT: default_prompt_text,
-        AGENT_SETTING_ACTIVATION_WORD: None,
-        AGENT_SETTING_STOP_WORDS: None,
-        AGENT_SETTING_CHAT_LENGTH: None,
-        AGENT_SETTING_TTS_VOICE: None,
-        AGENT_SETTING_OPEN_LINKS: None,
-    }
-
-    if not os.path.exists(SYSPROMPTS_FILE):
-        try:
-            with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
-                json.dump({default_prompt_name: default_agent_config}, f, indent=4, ensure_ascii=False)
-            print(f"'{SYSPROMPTS_FILE}' not found. Created with default system prompt structure.")
-            return {default_prompt_name: default_agent_config}
-        except Exception as e:
-            print(f"Error creating default system prompts file: {e}")
-            return {default_prompt_name: default_agent_config}
-
-    try:
-        with open(SYSPROMPTS_FILE, "r", encoding="utf-8") as f:
-            prompts = json.load(f)
-            if not isinstance(prompts, dict) or not prompts:
-                raise ValueError("Invalid format or empty prompts file.")
-
-            migrated = False
-            for name, data in prompts.items():
-                if isinstance(data, str):  # Old format: value is just the prompt text
-                    prompts[name] = {
-                        AGENT_SETTING_TEXT: data,
-                        AGENT_SETTING_ACTIVATION_WORD: None,
-                        AGENT_SETTING_STOP_WORDS: None,
-                        AGENT_SETTING_CHAT_LENGTH: None,
-                        AGENT_SETTING_TTS_VOICE: None,
-                        AGENT_SETTING_OPEN_LINKS: None,
-                    }
-                    migrated = True
-                elif isinstance(data, dict):  # New format, ensure all keys exist
-                    updated_data = False
-                    if AGENT_SETTING_TEXT not in data:  # Should not happen if migrated from string
-                        data[
-                            AGENT_SETTING_TEXT] = default_prompt_text if name == default_prompt_name else "Missing prompt text."
-                        updated_data = True
-                    for key in [AGENT_SETTING_ACTIVATION_WORD, AGENT_SETTING_STOP_WORDS,
-                                AGENT_SETTING_CHAT_LENGTH, AGENT_SETTING_TTS_VOICE,
-                                AGENT_SETTING_OPEN_LINKS]:
-                        if key not in data:
-                            data[key] = None
-                            updated_data = True
-                    if updated_data:
-                        migrated = True  # Mark for saving if any key was added
-
-            if default_prompt_name not in prompts:
-                prompts[default_prompt_name] = default_agent_config.copy()
-                migrated = True
-            elif not isinstance(prompts[default_prompt_name], dict) or AGENT_SETTING_TEXT not in prompts[
-                default_prompt_name]:
-                # Ensure default prompt is correctly structured if it existed but was malformed
-                prompts[default_prompt_name] = default_agent_config.copy()
-                if isinstance(prompts[default_prompt_name], str):  # if it was a string before
-                    prompts[default_prompt_name][AGENT_SETTING_TEXT] = prompts[default_prompt_name]
-                migrated = True
-
-            if migrated:
-                _save_prompts_internal(prompts)
-                print(f"System prompts in '{SYSPROMPTS_FILE}' were migrated/updated to new structure and saved.")
-            return prompts
-    except Exception as e:
-        print(f"Error loading system prompts: {e}. Returning default prompt structure.")
-        return {default_prompt_name: default_agent_config.copy()}
-
-
-def _save_prompts_internal(prompts_dict):
-    """Internal save without UI, for use within load_system_prompts."""
-    try:
-        with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(prompts_dict, f, indent=4, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Error saving system prompts internally: {e}")
-        return False
-
-
 def save_system_prompts(prompts_dict, lm):  # lm can be None
     try:
-        with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(prompts_dict, f, indent=4, ensure_ascii=False)
+        config_store.put("system_prompts", prompts_dict)
         return True
     except Exception as e:
         if lm:  # lm might be None if called from a context without LanguageManager
@@ -213,58 +115,6 @@ def save_system_prompts(prompts_dict, lm):  # lm can be None
         return False
 
 
-def get_full_system_prompt(prompt_name, all_prompts_data,
-                           global_activation_word, global_open_links_setting,
-                           default_prompt_text_if_missing,
-                           effective_tts_voice_id, tts_voices_structured_data):  # Added new parameters
-    agent_config = all_prompts_data.get(prompt_name, {})
-    if not isinstance(agent_config, dict):  # Should not happen with new load_system_prompts
-        base_text = default_prompt_text_if_missing
-        activation_word_to_use = global_activation_word
-        effective_open_links = global_open_links_setting
-    else:
-        base_text = agent_config.get(AGENT_SETTING_TEXT, default_prompt_text_if_missing)
-        agent_specific_activation_word = agent_config.get(AGENT_SETTING_ACTIVATION_WORD)
-        activation_word_to_use = agent_specific_activation_word if agent_specific_activation_word else global_activation_word
-
-        # Determine effective open_links setting for this agent
-        agent_specific_open_links = agent_config.get(AGENT_SETTING_OPEN_LINKS)  # This can be True, False, or None
-        if agent_specific_open_links is None:
-            effective_open_links = global_open_links_setting
-        else:
-            effective_open_links = agent_specific_open_links
-
-    base_text = base_text.replace("{name}", activation_word_to_use)
-
-    # Construct the dynamic suffix parts
-    tts_instruction_part = "\n\nGenerate the reply so that a simple TTS can read it correctly."
-
-    language_instruction_part = ""
-    if effective_tts_voice_id and tts_voices_structured_data:
-        found_language_name = None
-        for lang_key, lang_data in tts_voices_structured_data.items():
-            if "voices" in lang_data:
-                for voice_short_name, voice_id_val in lang_data["voices"].items():
-                    if voice_id_val == effective_tts_voice_id:
-                        found_language_name = lang_key.split(' (')[
-                            0]  # Extracts "English" from "English (US)", "German" from "German"
-                        break
-            if found_language_name:
-                break
-
-        if found_language_name:
-            language_instruction_part = f"\nSpeak in fluent {found_language_name}."
-
-    links_instruction_part = ""
-    if effective_open_links:
-        links_instruction_part = "\nYou can open links on the users computer by just putting them somewhere in your response with https:// if the user ask you to google something you can also open it with url parameters."
-    else:
-        links_instruction_part = "\nYou can't open links on the users computer because he has this setting disabled."
-
-    dynamic_suffix = tts_instruction_part + language_instruction_part + links_instruction_part
-    return base_text + dynamic_suffix
-
-
 class SystemPromptManagerWindow(tk.Toplevel):
     def __init__(self, master_widget, app_instance, lm, default_prompt_name_const, default_prompt_text_const):
         super().__init__(master_widget)
@@ -272,7 +122,7 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.lm = lm
         self.DEFAULT_SYSTEM_PROMPT_NAME = default_prompt_name_const
         self.DEFAULT_SYSTEM_PROMPT_TEXT = default_prompt_text_const
-        self.TTS_VOICES_STRUCTURED = self.parent_app.TTS_VOICES_STRUCTURED  # Get from parent_app
+        self.voice_catalog = self.parent_app.voice_catalog  # Get from parent_app
 
         self.grab_set()
         self.prompts_dict = load_system_prompts(self.DEFAULT_SYSTEM_PROMPT_NAME, self.DEFAULT_SYSTEM_PROMPT_TEXT)
@@ -411,6 +261,18 @@ class SystemPromptManagerWindow(tk.Toplevel):
         )
         current_row_agent += 1
 
+        # Agent Chat Token Budget
+        self.agent_chat_token_budget_var = tk.StringVar()  # Empty means global default, 0 disables the budget
+        _, self.agent_chat_token_budget_spinbox = create_agent_setting_row(
+            agent_settings_frame, "chat_token_budget_label",
+            lambda p: ttk.Spinbox(p, from_=0, to=100000, increment=500, textvariable=self.agent_chat_token_budget_var,
+                                  width=8, state=tk.DISABLED),
+            current_row_agent, default_val_func=lambda: self.parent_app.settings.get("chat_token_budget",
+                                                                                     self.parent_app.default_settings[
+                                                                                         "chat_token_budget"])
+        )
+        current_row_agent += 1
+
         # Agent Open Links Automatically
         self.agent_open_links_var = tk.StringVar(value="global")  # "global", "true", "false"
         open_links_frame = ttk.Frame(agent_settings_frame)
@@ -492,20 +354,8 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.after(100, lambda: self.right_panel.event_generate("<Configure>"))  # Ensure scrollregion is set up
 
     def _get_agent_tts_language_display_names_with_global(self):
-        # Get base sorted names from parent app's method (if it exists and is callable)
-        # or replicate logic if parent_app doesn't have _get_sorted_tts_language_display_names
-        base_names = []
-        if hasattr(self.parent_app, '_get_sorted_tts_language_display_names') and callable(
-                self.parent_app._get_sorted_tts_language_display_names):
-            base_names = self.parent_app._get_sorted_tts_language_display_names()
-        else:  # Fallback: replicate minimal sorting for TTS languages
-            english_keys = [k for k, data in self.TTS_VOICES_STRUCTURED.items() if data["code"].startswith("en-")]
-            sorted_keys = []
-            for eng_key in sorted(english_keys):
-                if eng_key not in sorted_keys: sorted_keys.append(eng_key)
-            for lang_key in sorted(self.TTS_VOICES_STRUCTURED.keys()):
-                if lang_key not in sorted_keys: sorted_keys.append(lang_key)
-            base_names = [f"{self.TTS_VOICES_STRUCTURED[key]['flag']} {key}" for key in sorted_keys]
+        # Same order as the settings window: UI language first, then English, then the rest
+        base_names = self.voice_catalog.sorted_display_names(self.lm.current_lang_code)
 
         return [
             self.lm.get_string("agent_builder_tts_use_global", default_text="-- Use Global Default --")] + base_names
@@ -530,13 +380,7 @@ class SystemPromptManagerWindow(tk.Toplevel):
             return
 
         if selected_lang_display_with_flag:
-            target_lang_key = None
-            for l_key, l_data in self.TTS_VOICES_STRUCTURED.items():
-                if f"{l_data['flag']} {l_key}" == selected_lang_display_with_flag:
-                    target_lang_key = l_key
-                    break
-            if target_lang_key and target_lang_key in self.TTS_VOICES_STRUCTURED:
-                voice_names = sorted(list(self.TTS_VOICES_STRUCTURED[target_lang_key]["voices"].keys()))
+            voice_names = self.voice_catalog.voice_names(self.voice_catalog.language_key(selected_lang_display_with_flag))
 
         current_specific_voice = self.agent_tts_specific_voice_var.get()
         self.agent_tts_specific_voice_combobox['values'] = voice_names
@@ -634,6 +478,9 @@ class SystemPromptManagerWindow(tk.Toplevel):
         chat_len = agent_config.get(AGENT_SETTING_CHAT_LENGTH)
         self.agent_chat_length_var.set(str(chat_len) if chat_len is not None else "")
 
+        token_budget = agent_config.get(AGENT_SETTING_CHAT_TOKEN_BUDGET)
+        self.agent_chat_token_budget_var.set(str(token_budget) if token_budget is not None else "")
+
         open_links_override = agent_config.get(AGENT_SETTING_OPEN_LINKS)
         if open_links_override is True:
             self.agent_open_links_var.set("true")
@@ -646,14 +493,9 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.agent_tts_language_combobox['values'] = self._get_agent_tts_language_display_names_with_global()
         tts_voice_override = agent_config.get(AGENT_SETTING_TTS_VOICE)
         if tts_voice_override:
-            selected_lang_display, selected_voice_name = None, None
-            for lang_key, lang_data in self.TTS_VOICES_STRUCTURED.items():
-                for voice_name_short, voice_id_val in lang_data["voices"].items():
-                    if voice_id_val == tts_voice_override:
-                        selected_lang_display = f"{lang_data['flag']} {lang_key}"
-                        selected_voice_name = voice_name_short
-                        break
-                if selected_lang_display: break
+            override_voice = self.voice_catalog.voice(tts_voice_override)
+            selected_lang_display = self.voice_catalog.display_name(override_voice.language_key) if override_voice else None
+            selected_voice_name = override_voice.name if override_voice else None
 
             if selected_lang_display and selected_lang_display in self.agent_tts_language_combobox['values']:
                 self.agent_tts_language_var.set(selected_lang_display)
@@ -684,6 +526,7 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.agent_activation_word_entry.configure(state=tk.NORMAL)
         self.agent_stop_words_entry.configure(state=tk.NORMAL)
         self.agent_chat_length_spinbox.configure(state=tk.NORMAL)  # Or "readonly" if you prefer
+        self.agent_chat_token_budget_spinbox.configure(state=tk.NORMAL)
         self.agent_open_links_rb_global.configure(state=tk.NORMAL)
         self.agent_open_links_rb_yes.configure(state=tk.NORMAL)
         self.agent_open_links_rb_no.configure(state=tk.NORMAL)
@@ -706,6 +549,8 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.agent_stop_words_entry.configure(state=tk.DISABLED)
         self.agent_chat_length_var.set("");
         self.agent_chat_length_spinbox.configure(state=tk.DISABLED)
+        self.agent_chat_token_budget_var.set("");
+        self.agent_chat_token_budget_spinbox.configure(state=tk.DISABLED)
         self.agent_open_links_var.set("global")
         self.agent_open_links_rb_global.configure(state=tk.DISABLED)
         self.agent_open_links_rb_yes.configure(state=tk.DISABLED)
@@ -731,6 +576,7 @@ class SystemPromptManagerWindow(tk.Toplevel):
         self.agent_activation_word_var.set("")
         self.agent_stop_words_var.set("")
         self.agent_chat_length_var.set("")  # Empty means use global
+        self.agent_chat_token_budget_var.set("")
         self.agent_open_links_var.set("global")
         self.agent_tts_language_var.set(
             self.lm.get_string("agent_builder_tts_use_global", default_text="-- Use Global Default --"))
@@ -772,6 +618,18 @@ class SystemPromptManagerWindow(tk.Toplevel):
                                      self.lm.get_string("chat_length_integer_error"), parent=self)
                 return
 
+        token_budget_str = self.agent_chat_token_budget_var.get().strip()
+        token_budget_override = None
+        if token_budget_str:
+            try:
+                token_budget_override = int(token_budget_str)
+            except ValueError:
+                token_budget_override = -1
+            if token_budget_override < 0:
+                messagebox.showerror(self.lm.get_string("invalid_input_title"),
+                                     self.lm.get_string("chat_token_budget_error"), parent=self)
+                return
+
         open_links_val = self.agent_open_links_var.get()
         open_links_override = None
         if open_links_val == "true":
@@ -784,19 +642,14 @@ class SystemPromptManagerWindow(tk.Toplevel):
         selected_tts_voice_short = self.agent_tts_specific_voice_var.get()
         if selected_tts_lang_display != self.lm.get_string("agent_builder_tts_use_global",
                                                            default_text="-- Use Global Default --") and selected_tts_voice_short:
-            target_lang_key = None
-            for l_key, l_data in self.TTS_VOICES_STRUCTURED.items():
-                if f"{l_data['flag']} {l_key}" == selected_tts_lang_display:
-                    target_lang_key = l_key;
-                    break
-            if target_lang_key and selected_tts_voice_short in self.TTS_VOICES_STRUCTURED[target_lang_key]["voices"]:
-                tts_voice_override = self.TTS_VOICES_STRUCTURED[target_lang_key]["voices"][selected_tts_voice_short]
+            tts_voice_override = self.voice_catalog.voice_id(selected_tts_lang_display, selected_tts_voice_short)
 
         agent_config_payload = {
             AGENT_SETTING_TEXT: prompt_text_content,
             AGENT_SETTING_ACTIVATION_WORD: act_word_override,
             AGENT_SETTING_STOP_WORDS: stop_words_override,
             AGENT_SETTING_CHAT_LENGTH: chat_len_override,
+            AGENT_SETTING_CHAT_TOKEN_BUDGET: token_budget_override,
             AGENT_SETTING_OPEN_LINKS: open_links_override,
             AGENT_SETTING_TTS_VOICE: tts_voice_override
         }
@@ -0,0 +1,159 @@
+import json
+import os
+
+from config_store import config_store
+
+
+# Settings defaults, loading and UI strings, without the settings window, so startup does not have to
+# import the UI modules (settings.py, agent_builder.py) before the tray is up.
+SETTINGS_FILE = "settings.json"
+LANGUAGES_DIR = "languages"
+
+DEFAULT_SYSTEM_PROMPT_NAME = "Default Prompt"
+DEFAULT_SYSTEM_PROMPT_TEXT = (
+    "You are Manfred, a highly intelligent and efficient AI assistant. "
+    "Reply without formatting and keep replies short and simple. "
+    "You always speak respectfully, and fluent English. "
+    "Your responses must be clear, concise, and helpful—avoid unnecessary elaboration, especially for simple tasks. "
+    "A good amount of humor is good to keep the conversation natural, friend-like. Your top priorities are efficiency and clarity."
+)
+
+default_settings = {
+    "api_key": "Enter your Gemini API key here",
+    "ui_language": "en-US",
+    "selected_microphone": "System Default",
+    "selected_speaker": "System Default",
+    "active_system_prompt_name": DEFAULT_SYSTEM_PROMPT_NAME,
+
+    "activation_word": "Manfred",
+    "stop_words": ["stop", "stopp", "exit", "quit"],
+    "chat_length": 5,
+    "chat_token_budget": 4000,
+    "open_links_automatically": True,
+    "tts_voice": "en-US-AriaNeural",
+    "stream_responses": True,
+    "tts_cache_max_mb": 20,
+    "local_vad_enabled": True,
+    "offline_wake_word_enabled": True,
+    "barge_in_enabled": True,
+    "mic_pre_roll_ms": 500,
+    "fuzzy_word_matching": True,
+    "config_hot_reload": True,
+    "fast_startup": True,
+    "overlay_sprite_animation": False,
+}
+
+
+class LanguageManager:
+    def __init__(self, initial_lang_code="en-US"):
+        self.current_lang_code = initial_lang_code
+        self.translations = {}
+        self.fallback_translations = {}
+        self._active_window_for_messagebox = None # For agent_builder
+        self._load_fallback_language()
+        self.load_language(self.current_lang_code)
+
+    def _load_fallback_language(self):
+        try:
+            fallback_path = os.path.join(LANGUAGES_DIR, "en-US.json")
+            if os.path.exists(fallback_path):
+                with open(fallback_path, "r", encoding="utf-8") as f:
+                    self.fallback_translations = json.load(f)
+            else:
+                print(
+                    f"CRITICAL ERROR: Fallback language file en-US.json not found in '{LANGUAGES_DIR}'. UI text will be missing.")
+                self.fallback_translations = {}
+        except Exception as e:
+            print(f"Error loading fallback language en-US: {e}")
+            self.fallback_translations = {}
+
+    def load_language(self, lang_code):
+        self.current_lang_code = lang_code
+        try:
+            lang_file_path = os.path.join(LANGUAGES_DIR, f"{lang_code}.json")
+            if not os.path.exists(lang_file_path):
+                print(f"Warning: Language file {lang_file_path} not found. Using fallback (en-US).")
+                self.translations = self.fallback_translations.copy()
+                if lang_code != "en-US":
+                    self.current_lang_code = "en-US"
+                return
+
+            with open(lang_file_path, "r", encoding="utf-8") as f:
+                self.translations = json.load(f)
+        except Exception as e:
+            print(f"Error loading language {lang_code}: {e}. Using fallback (en-US).")
+            self.translations = self.fallback_translations.copy()
+            if lang_code != "en-US":
+                self.current_lang_code = "en-US"
+
+    def get_string(self, key, default_text=None, **kwargs):
+        val_candidate = self.translations.get(key, self.fallback_translations.get(key))
+        if val_candidate is None:
+            if default_text is not None:
+                val = default_text
+            else:
+                val = f"<{key}>"
+        else:
+            val = val_candidate
+
+        if kwargs:
+            try:
+                return val.format(**kwargs)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"Warning: Formatting error for key '{key}' with value '{val}' and args {kwargs}: {e}")
+                return val
+        return val
+
+    def set_language(self, lang_code):
+        self.load_language(lang_code)
+
+    def set_active_window_for_messagebox(self, window):
+        self._active_window_for_messagebox = window
+
+    def get_active_window_for_messagebox(self):
+        return self._active_window_for_messagebox
+
+
+def _read_settings_file():
+    if not os.path.exists(SETTINGS_FILE):
+        try:
+            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
+                json.dump(default_settings, f, indent=4, ensure_ascii=False)
+            print(f"'{SETTINGS_FILE}' not found. Created with default settings.")
+            return default_settings.copy()
+        except Exception as e:
+            print(f"Error creating default settings file: {e}")
+            return default_settings.copy()
+
+    try:
+        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+            updated = False
+            for key, value in default_settings.items():
+                if key not in loaded:
+                    loaded[key] = value
+                    updated = True
+            if updated:
+                try:
+                    with open(SETTINGS_FILE, "w", encoding="utf-8") as f_update:
+                        json.dump(loaded, f_update, indent=4, ensure_ascii=False)
+                    print(f"'{SETTINGS_FILE}' was missing some keys. Updated with defaults and saved.")
+                except Exception as e_save:
+                    print(f"Error saving updated settings file: {e_save}")
+            return loaded
+    except Exception as e:
+        print(f"Error loading settings: {e}. Returning default settings.")
+        return default_settings.copy()
+
+
+def _write_settings_file(settings):
+    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=4, ensure_ascii=False)
+
+
+config_store.register("settings", _read_settings_file, _write_settings_file)
+
+
+def load_settings():
+    """Settings snapshot from the in-memory config store, settings.json is only parsed once."""
+    return config_store.get("settings")
@@ -0,0 +1,141 @@
+import asyncio
+import concurrent.futures
+import time
+from threading import Thread, Event, Lock
+
+
+LAG_PROBE_INTERVAL = 0.5
+
+
+class AsyncLoopService:
+    """
+    One long-lived asyncio event loop on a background thread.
+
+    Coroutines can be submitted from any thread and come back as concurrent.futures.Future
+    objects, so callers can block on them, attach callbacks or cancel them. The service keeps
+    track of how many submissions are still pending and how late the loop wakes up (loop lag).
+    """
+
+    def __init__(self, name="AsyncLoopService", lag_probe_interval=LAG_PROBE_INTERVAL):
+        self.name = name
+        self.lag_probe_interval = lag_probe_interval
+        self.loop = None
+        self._thread = None
+        self._ready = Event()
+        self._lock = Lock()
+        self._pending = set()
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            self._ready.clear()
+            self._thread = Thread(target=self._run_loop, name=self.name, daemon=True)
+            self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._probe_loop_lag())
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            pending_tasks = asyncio.all_tasks(self.loop)
+            for task in pending_tasks:
+                task.cancel()
+            if pending_tasks:
+                self.loop.run_until_complete(asyncio.gather(*pending_tasks, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+            print(f"{self.name} event loop closed.")
+
+    async def _probe_loop_lag(self):
+        while True:
+            expected_wakeup = time.perf_counter() + self.lag_probe_interval
+            await asyncio.sleep(self.lag_probe_interval)
+            self.loop_lag = max(0.0, time.perf_counter() - expected_wakeup)
+            self.max_loop_lag = max(self.max_loop_lag, self.loop_lag)
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive() and self.loop and self.loop.is_running())
+
+    def submit(self, coro):
+        if not self.is_running():
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._pending.add(future)
+            self.submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def run(self, coro, timeout=None):
+        """Submits coro and blocks until it finishes. Cancels it if timeout expires."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def cancel_all(self):
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        return len(pending)
+
+    def stop(self, timeout=2.0):
+        if not self.is_running():
+            return
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    def queue_depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": len(self._pending),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "loop_lag_ms": round(self.loop_lag * 1000, 1),
+                "max_loop_lag_ms": round(self.max_loop_lag * 1000, 1),
+            }
+
+
+_async_service = None
+_async_service_lock = Lock()
+
+
+def get_async_service():
+    """Returns the process-wide AsyncLoopService, starting it on first use."""
+    global _async_service
+    with _async_service_lock:
+        if _async_service is None:
+            _async_service = AsyncLoopService()
+    return _async_service.start()
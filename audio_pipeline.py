@@ -0,0 +1,86 @@
+import time
+from collections import deque
+from threading import Condition
+
+
+DROP_OLDEST = "oldest"
+DROP_NEWEST = "newest"
+
+
+class DropQueue:
+    """
+    Bounded, thread-safe FIFO between two pipeline stages.
+
+    put() waits up to block_timeout for free space (backpressure), then applies the drop policy:
+    DROP_OLDEST discards the item at the head to make room, DROP_NEWEST rejects the new item.
+    Producers such as the microphone capture never block longer than that, so they stay live.
+    """
+
+    def __init__(self, name, maxsize, drop_policy=DROP_OLDEST):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self._items = deque()
+        self._condition = Condition()
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item, block_timeout=0.0):
+        """Returns False if the new item was dropped, True if it was queued (possibly after dropping an old one)."""
+        with self._condition:
+            if len(self._items) >= self.maxsize and block_timeout > 0:
+                deadline = time.monotonic() + block_timeout
+                while len(self._items) >= self.maxsize:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        break
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    print(f"Queue '{self.name}' full ({self.maxsize}), dropping new item.")
+                    return False
+                self._items.popleft()
+                print(f"Queue '{self.name}' full ({self.maxsize}), dropping oldest item.")
+            self._items.append(item)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Returns the next item, or None if nothing arrived within timeout."""
+        with self._condition:
+            if not self._items:
+                self._condition.wait_for(lambda: self._items, timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self.dequeued += 1
+            self._condition.notify_all()
+            return item
+
+    def clear(self):
+        with self._condition:
+            discarded = len(self._items)
+            self._items.clear()
+            self.dropped += discarded
+            self._condition.notify_all()
+            return discarded
+
+    def depth(self):
+        with self._condition:
+            return len(self._items)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "dropped": self.dropped,
+            }
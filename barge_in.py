@@ -0,0 +1,75 @@
+import numpy as np
+
+from vad import frame_features
+
+
+ECHO_WINDOW_FRAMES = 50  # About one second of recent echo levels at typical chunk sizes
+ECHO_PERCENTILE = 90
+WARMUP_DURATION = 0.2
+
+
+class BargeInDetector:
+    """
+    Spots the user talking over the assistant while TTS audio is playing.
+
+    The microphone also hears the assistant's own voice, so a plain energy threshold would fire on
+    the echo. Instead, the loud end (90th percentile) of the recent echo level is used as baseline:
+    only speech-like chunks that are energy_margin_db louder than that for min_speech_duration count
+    as barge-in. Chunks that look like user speech are kept out of the baseline, and the first
+    WARMUP_DURATION after reset() only measures the echo.
+    """
+
+    def __init__(self, energy_margin_db=10.0, min_speech_duration=0.12, max_spectral_flatness=0.5,
+                 zcr_range=(0.01, 0.35)):
+        self.energy_margin_db = energy_margin_db
+        self.min_speech_duration = min_speech_duration
+        self.max_spectral_flatness = max_spectral_flatness
+        self.zcr_range = zcr_range
+        self.triggered = 0
+        self.reset()
+
+    def reset(self):
+        self._echo_levels = np.full(ECHO_WINDOW_FRAMES, np.nan, dtype=np.float32)
+        self._echo_index = 0
+        self._elapsed = 0.0
+        self._speech_duration = 0.0
+        self.echo_level_db = None
+
+    def _remember_echo(self, energy_db):
+        self._echo_levels[self._echo_index % ECHO_WINDOW_FRAMES] = energy_db
+        self._echo_index += 1
+        self.echo_level_db = float(np.nanpercentile(self._echo_levels, ECHO_PERCENTILE))
+
+    def process(self, samples, sample_rate):
+        """Feeds one chunk of float samples. Returns True once the user has been talking long enough."""
+        if len(samples) < 2:
+            return False
+        chunk_duration = len(samples) / float(sample_rate)
+        energy_db, zero_crossing_rate, spectral_flatness = (
+            float(feature[0]) for feature in frame_features(samples[None, :], sample_rate))
+        self._elapsed += chunk_duration
+
+        if self._elapsed <= WARMUP_DURATION or self.echo_level_db is None:
+            self._remember_echo(energy_db)
+            return False
+
+        speech_like = (energy_db > self.echo_level_db + self.energy_margin_db
+                       and self.zcr_range[0] <= zero_crossing_rate <= self.zcr_range[1]
+                       and spectral_flatness < self.max_spectral_flatness)
+        if not speech_like:
+            self._speech_duration = 0.0
+            self._remember_echo(energy_db)
+            return False
+
+        self._speech_duration += chunk_duration
+        if self._speech_duration >= self.min_speech_duration:
+            self.triggered += 1
+            self._speech_duration = 0.0
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "triggered": self.triggered,
+            "echo_level_db": round(self.echo_level_db, 1) if self.echo_level_db is not None else None,
+        }
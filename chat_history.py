@@ -0,0 +1,221 @@
+from collections import deque
+from threading import Lock
+
+from lazy_import import lazy_module
+
+types = lazy_module("google.genai.types")
+
+
+DEFAULT_CHARS_PER_TOKEN = 4.0  # Rough estimate until the API reports real prompt token counts
+CALIBRATION_RATE = 0.2
+SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and a voice assistant in a few short sentences. "
+    "Keep names, facts, decisions and open questions, drop small talk. Answer with the summary only, "
+    "in the language of the conversation.\n\n"
+)
+SUMMARY_ACKNOWLEDGEMENT = "Understood."
+
+
+class ChatHistoryManager:
+    """
+    Drop-in replacement for the google-genai chat session that owns the conversation history.
+
+    Turns (user message + model reply) live in a deque bounded to max_turns, so the oldest turn
+    falls out in O(1) when a new one is added. Every request sends the current turns together with
+    the new message through client.models, so there is no SDK session that has to be rebuilt
+    (and its history copied) when the history gets trimmed.
+
+    With a token_budget, the history is also kept below an estimated token count. Turns that have
+    to go for the budget are folded into a running summary instead of being forgotten (turns that
+    only fall out because of max_turns are dropped, as without a budget). The summary is written by
+    the model in the background (submit runs the coroutine off the request path) and is sent in
+    front of the remaining turns until the next compaction replaces it.
+    """
+
+    def __init__(self, client, model, config, max_turns, token_budget=0, submit=None):
+        self.client = client
+        self.model = model
+        self.config = config
+        self.token_budget = token_budget
+        self.submit = submit
+        self.turns = deque(maxlen=max(1, max_turns))  # (user content, model content, estimated tokens)
+        self._lock = Lock()
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self.history_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self._folded_turns = []  # Turns trimmed for the budget waiting to be summarized, sent verbatim until then
+        self._summary_future = None
+        self.requests = 0
+        self.turns_trimmed = 0
+        self.session_rebuilds_avoided = 0
+        self.summaries_created = 0
+        self.last_prompt_tokens = None
+
+    @staticmethod
+    def _content(role, text):
+        return types.Content(role=role, parts=[types.Part(text=text)])
+
+    def estimate_tokens(self, text):
+        return int(len(text) / self.chars_per_token) + 1
+
+    def set_limits(self, max_turns, token_budget=0):
+        max_turns = max(1, max_turns)
+        with self._lock:
+            self.token_budget = token_budget
+            if max_turns != self.turns.maxlen:
+                while len(self.turns) > max_turns:
+                    self._drop_oldest_locked()
+                self.turns = deque(self.turns, maxlen=max_turns)  # Only on a settings change, not per turn
+            self._enforce_budget_locked()
+            self._limit_folded_locked()
+        self._schedule_summary()
+
+    def get_history(self):
+        with self._lock:
+            contents = []
+            if self.summary:
+                contents.append(self._content("user", f"Summary of our earlier conversation: {self.summary}"))
+                contents.append(self._content("model", SUMMARY_ACKNOWLEDGEMENT))
+            for user_content, model_content, _ in self._folded_turns:
+                contents.extend((user_content, model_content))
+            for user_content, model_content, _ in self.turns:
+                contents.extend((user_content, model_content))
+            return contents
+
+    def _request_contents(self, message):
+        contents = self.get_history()
+        contents.append(self._content("user", message))
+        return contents
+
+    def _calibrate(self, response, contents):
+        """Adjusts the chars-per-token estimate to the prompt token count the API reported."""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+        if not prompt_tokens:
+            return
+        self.last_prompt_tokens = prompt_tokens
+        request_chars = sum(len(part.text or "") for content in contents for part in content.parts)
+        system_instruction = getattr(self.config, "system_instruction", None)
+        if isinstance(system_instruction, str):
+            request_chars += len(system_instruction)
+        if request_chars:
+            measured = request_chars / float(prompt_tokens)
+            self.chars_per_token += CALIBRATION_RATE * (measured - self.chars_per_token)
+
+    def _drop_oldest_locked(self):
+        turn = self.turns.popleft()
+        self.history_tokens -= turn[2]
+        self.turns_trimmed += 1
+        return turn
+
+    def _fold_oldest_locked(self):
+        turn = self._drop_oldest_locked()
+        if self.submit:
+            self._folded_turns.append(turn)
+
+    def _limit_folded_locked(self):
+        """Folded and live turns together never exceed max_turns, also while summaries keep failing (e.g. offline)."""
+        excess = len(self._folded_turns) + len(self.turns) - self.turns.maxlen
+        if excess > 0:
+            del self._folded_turns[:excess]
+
+    def _enforce_budget_locked(self):
+        if self.token_budget <= 0:
+            return
+        while len(self.turns) > 1 and self.history_tokens + self.summary_tokens > self.token_budget:
+            self._fold_oldest_locked()
+
+    def _record_turn(self, message, reply_text):
+        tokens = self.estimate_tokens(message) + self.estimate_tokens(reply_text)
+        with self._lock:
+            if len(self.turns) == self.turns.maxlen:
+                self.session_rebuilds_avoided += 1  # Trimming a chat session meant rebuilding it whenever it was too long
+                self._drop_oldest_locked()
+            self.turns.append((self._content("user", message), self._content("model", reply_text), tokens))
+            self.history_tokens += tokens
+            self._enforce_budget_locked()
+            self._limit_folded_locked()
+        self._schedule_summary()
+
+    def _schedule_summary(self):
+        with self._lock:
+            if not self._folded_turns or not self.submit:
+                return
+            if self._summary_future and not self._summary_future.done():
+                return  # Picks up the remaining turns when it finishes
+            batch = list(self._folded_turns)
+            future = self._summary_future = self.submit(self._summarize(self.summary, batch))
+        future.add_done_callback(lambda done: self._on_summary_done(done, batch))
+
+    async def _summarize(self, previous_summary, batch):
+        lines = [f"Earlier summary: {previous_summary}"] if previous_summary else []
+        for user_content, model_content, _ in batch:
+            lines.append(f"User: {user_content.parts[0].text}")
+            lines.append(f"Assistant: {model_content.parts[0].text}")
+        response = await self.client.aio.models.generate_content(model=self.model,
+                                                                 contents=SUMMARY_PROMPT + "\n".join(lines))
+        return (response.text or "").strip()
+
+    def _on_summary_done(self, future, batch):
+        if future.cancelled():
+            return
+        if future.exception():
+            print(f"Error summarizing chat history: {future.exception()}")
+            return  # The folded turns stay verbatim and are retried with the next compaction
+        summary = future.result()
+        if not summary:
+            return
+        with self._lock:
+            self.summary = summary
+            self.summary_tokens = self.estimate_tokens(summary)
+            summarized = set(map(id, batch))  # Some may have been dropped meanwhile, so not simply a prefix
+            self._folded_turns = [turn for turn in self._folded_turns if id(turn) not in summarized]
+            self.summaries_created += 1
+            self._enforce_budget_locked()
+        print(f"Chat history compacted: {len(batch)} turn(s) folded into a summary of ~{self.summary_tokens} tokens.")
+        self._schedule_summary()
+
+    def send_message(self, message):
+        self.requests += 1
+        contents = self._request_contents(message)
+        response = self.client.models.generate_content(model=self.model, contents=contents, config=self.config)
+        self._calibrate(response, contents)
+        self._record_turn(message, response.text or "")
+        return response
+
+    def send_message_stream(self, message):
+        """
+        Yields the response chunks. The turn is recorded when the stream ends, also if the caller
+        stops early (e.g. barge-in): the history then holds the part of the reply that was received.
+        """
+        self.requests += 1
+        contents = self._request_contents(message)
+        reply_parts = []
+        last_chunk = None
+        try:
+            for chunk in self.client.models.generate_content_stream(model=self.model, contents=contents,
+                                                                    config=self.config):
+                reply_parts.append(chunk.text or "")
+                last_chunk = chunk
+                yield chunk
+        finally:
+            if last_chunk is not None:
+                self._calibrate(last_chunk, contents)
+            if any(reply_parts):
+                self._record_turn(message, "".join(reply_parts))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "turns": len(self.turns),
+                "max_turns": self.turns.maxlen,
+                "token_budget": self.token_budget,
+                "estimated_history_tokens": self.history_tokens + self.summary_tokens,
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "chars_per_token": round(self.chars_per_token, 2),
+                "requests": self.requests,
+                "turns_trimmed": self.turns_trimmed,
+                "summaries_created": self.summaries_created,
+                "session_rebuilds_avoided": self.session_rebuilds_avoided,
+            }
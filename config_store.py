@@ -0,0 +1,117 @@
+import copy
+from threading import RLock
+
+
+class ConfigChange:
+    def __init__(self, name, changed_keys, old, new):
+        self.name = name
+        self.changed_keys = changed_keys
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"ConfigChange({self.name!r}, {sorted(self.changed_keys)!r})"
+
+
+class ConfigStore:
+    """
+    Process-wide, in-memory copy of the JSON config files (settings.json, sysprompts.json).
+
+    Each document is registered with a loader that reads (and if needed migrates) its file and a
+    saver that writes it. The file is parsed once on first use; after that get() serves deep-copied
+    snapshots from memory and put() writes through to disk. put() only writes and notifies when a
+    top-level key actually changed, and subscribers get the set of changed keys so they can
+    re-initialize just the affected parts.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._loaders = {}
+        self._savers = {}
+        self._documents = {}
+        self._subscribers = []
+        self.file_reads = 0
+        self.file_writes = 0
+        self.snapshots_served = 0
+
+    def register(self, name, loader, saver):
+        with self._lock:
+            if name not in self._loaders:
+                self._loaders[name] = loader
+                self._savers[name] = saver
+
+    def is_registered(self, name):
+        with self._lock:
+            return name in self._loaders
+
+    def _document(self, name):
+        if name not in self._documents:
+            self._documents[name] = self._loaders[name]()
+            self.file_reads += 1
+        return self._documents[name]
+
+    def get(self, name):
+        """Snapshot of the document; callers may modify it freely."""
+        with self._lock:
+            self.snapshots_served += 1
+            return copy.deepcopy(self._document(name))
+
+    def get_value(self, name, key, default=None):
+        with self._lock:
+            return copy.deepcopy(self._document(name).get(key, default))
+
+    def put(self, name, data):
+        """Saves data as the new document. Returns the changed top-level keys. Saver errors propagate."""
+        with self._lock:
+            old = self._document(name)
+            changed_keys = {key for key in set(old) | set(data) if old.get(key) != data.get(key)}
+            if not changed_keys:
+                return changed_keys
+            new = copy.deepcopy(data)
+            self._savers[name](new)
+            self.file_writes += 1
+            self._documents[name] = new
+        self._publish(ConfigChange(name, changed_keys, old, new))
+        return changed_keys
+
+    def reload(self, name):
+        """Re-reads the file, e.g. after it was edited outside the app, and notifies about the differences."""
+        with self._lock:
+            old = self._documents.pop(name, None)
+            new = self._document(name)
+            if old is None:
+                return set()
+            changed_keys = {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+        if changed_keys:
+            self._publish(ConfigChange(name, changed_keys, old, new))
+        return changed_keys
+
+    def _publish(self, change):
+        with self._lock:
+            subscribers = [callback for callback, names in self._subscribers if names is None or change.name in names]
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"Error in config change subscriber {getattr(callback, '__name__', callback)}: {e}")
+
+    def subscribe(self, callback, names=None):
+        """Calls callback(ConfigChange) after a change to any of names (all documents if None)."""
+        with self._lock:
+            self._subscribers.append((callback, set(names) if names else None))
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [(cb, names) for cb, names in self._subscribers if cb is not callback]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": sorted(self._documents),
+                "file_reads": self.file_reads,
+                "file_writes": self.file_writes,
+                "snapshots_served": self.snapshots_served,
+            }
+
+
+config_store = ConfigStore()
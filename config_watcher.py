@@ -0,0 +1,200 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from threading import Thread, Event, current_thread
+
+
+DEFAULT_DEBOUNCE = 0.5  # Editors and provisioning scripts often write a file in several steps
+DEFAULT_POLL_INTERVAL = 1.0
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_valid_json_object(path):
+    """True if path holds a non-empty JSON object, so a half-written or broken file is never applied."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Config watcher: ignoring invalid '{os.path.basename(path)}': {e}")
+        return False
+    if not isinstance(data, dict) or not data:
+        print(f"Config watcher: ignoring '{os.path.basename(path)}', it is not a JSON object.")
+        return False
+    return True
+
+
+class _InotifyBackend:
+    """Linux inotify through ctypes. Watches the directories, so files replaced by rename are caught too."""
+
+    name = "inotify"
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories = {}
+        for directory in {os.path.dirname(path) for path in paths}:
+            watch = libc.inotify_add_watch(self.fd, directory.encode(sys.getfilesystemencoding()),
+                                           _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE)
+            if watch < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for '{directory}'")
+            self._directories[watch] = directory
+
+    def wait(self, timeout, stop_event):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset + _INOTIFY_EVENT_HEADER.size <= len(data):
+            watch, _, _, name_length = _INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0").decode(sys.getfilesystemencoding(), "replace")
+            offset += name_length
+            if watch in self._directories and name:
+                changed.add(os.path.join(self._directories[watch], name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Fallback for platforms without inotify: compares mtime and size of every file."""
+
+    name = "polling"
+
+    def __init__(self, paths, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._stamps = {path: self._stamp(path) for path in paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def wait(self, timeout, stop_event):
+        stop_event.wait(min(timeout, self.poll_interval))
+        changed = set()
+        for path, old_stamp in self._stamps.items():
+            new_stamp = self._stamp(path)
+            if new_stamp != old_stamp:
+                self._stamps[path] = new_stamp
+                changed.add(path)
+        return changed
+
+    def close(self):
+        pass
+
+
+class ConfigFileWatcher:
+    """
+    Watches config files on a background thread and calls on_change(name) once a file has been
+    quiet for debounce seconds and still parses as a JSON object. Uses inotify on Linux and falls
+    back to mtime polling elsewhere (and if inotify is not available).
+    """
+
+    def __init__(self, files, on_change, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.files = {os.path.abspath(path): name for path, name in files.items()}
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = None
+        self.changes_applied = 0
+        self.changes_rejected = 0
+        self._stop_event = Event()
+        self._thread = None
+
+    def _create_backend(self):
+        if sys.platform.startswith("linux"):
+            try:
+                return _InotifyBackend(self.files)
+            except (OSError, AttributeError) as e:
+                print(f"Config watcher: inotify not available ({e}), polling instead.")
+        return _PollingBackend(self.files, self.poll_interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self.backend = self._create_backend()
+        self._stop_event = Event()  # A new one, a thread stopped from on_change may still be finishing
+        self._thread = Thread(target=self._run, args=(self.backend, self._stop_event), name="ConfigFileWatcher",
+                              daemon=True)
+        self._thread.start()
+        print(f"Config watcher started ({self.backend.name}) for: {', '.join(sorted(self.files.values()))}")
+        return self
+
+    def stop(self):
+        """Also safe from on_change: the watcher thread then closes the backend once the callback returns."""
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread is current_thread():
+            return
+        if thread:
+            thread.join(timeout=2)
+            if thread.is_alive():
+                return  # Still in on_change, _run closes the backend when it ends
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+
+    def _run(self, backend, stop_event):
+        try:
+            self._watch(backend, stop_event)
+        finally:
+            if self.backend is backend:  # Not replaced by a restart meanwhile
+                self.backend = None
+            backend.close()
+
+    def _watch(self, backend, stop_event):
+        pending = {}  # path -> time at which it counts as settled
+        while not stop_event.is_set():
+            now = time.monotonic()
+            timeout = max(0.0, min(pending.values()) - now) if pending else self.poll_interval
+            try:
+                changed = backend.wait(timeout, stop_event)
+            except Exception as e:
+                print(f"Config watcher error: {e}")
+                stop_event.wait(self.poll_interval)
+                continue
+            now = time.monotonic()
+            for path in changed:
+                if path in self.files:
+                    pending[path] = now + self.debounce
+            for path, settled_at in list(pending.items()):
+                if now < settled_at:
+                    continue
+                del pending[path]
+                if not is_valid_json_object(path):
+                    self.changes_rejected += 1
+                    continue
+                self.changes_applied += 1
+                try:
+                    self.on_change(self.files[path])
+                except Exception as e:
+                    print(f"Error applying change of '{os.path.basename(path)}': {e}")
+
+    def stats(self):
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "changes_applied": self.changes_applied,
+            "changes_rejected": self.changes_rejected,
+        }
@@ -7,7 +7,9 @@ import os
 
 
 MAX_CONSOLE_LINES = 2000  
+CONSOLE_FLUSH_INTERVAL_MS = 75
 console_log_cache = deque(maxlen=MAX_CONSOLE_LINES)
+_pending_console_text = deque(maxlen=MAX_CONSOLE_LINES * 4)  # Written since the last flush, any thread appends
 _console_window_text_widget = None  
 _console_window_instance = None  
 
@@ -53,21 +55,8 @@ class OutputRedirector:
                     pass  
 
         self.cache.append(text)
-        text_widget = self.get_text_widget()
-        if text_widget and text_widget.winfo_exists():
-            try:
-
-                text_widget.master.after(0, self._update_text_widget_safely, text, text_widget)
-            except (tk.TclError, AttributeError):  
-                pass
-
-    def _update_text_widget_safely(self, text, widget_instance):
-        if widget_instance and widget_instance.winfo_exists():
-            current_state = widget_instance.cget("state")
-            widget_instance.configure(state=tk.NORMAL)
-            widget_instance.insert(tk.END, text)
-            widget_instance.see(tk.END)
-            widget_instance.configure(state=current_state)
+        if self.get_text_widget():
+            _pending_console_text.append(text) # The console window inserts it with its next flush
 
     def flush(self):
         if self.original_stream:
@@ -114,10 +103,14 @@ class ConsoleWindow(tk.Toplevel):
         self.text_area.pack(expand=True, fill=tk.BOTH, padx=5, pady=5)
         _console_window_text_widget = self.text_area  # Set global reference for redirector
 
+        _pending_console_text.clear()  # Already part of the cache
         self.text_area.configure(state=tk.NORMAL)
         self.text_area.insert(tk.END, "".join(list(self.cache)))
+        self._trim_to_max_lines()
         self.text_area.see(tk.END)
         self.text_area.configure(state=tk.DISABLED)
+        self.flushes = 0
+        self._flush_job = self.after(CONSOLE_FLUSH_INTERVAL_MS, self._flush_pending_text)
 
         button_frame = tk.Frame(self)
         button_frame.pack(fill=tk.X, pady=5, padx=5)
@@ -136,8 +129,32 @@ class ConsoleWindow(tk.Toplevel):
         self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.center_window()
 
+    def _flush_pending_text(self):
+        """Inserts everything written since the last flush at once, instead of one insert per print."""
+        self._flush_job = self.after(CONSOLE_FLUSH_INTERVAL_MS, self._flush_pending_text)
+        if not _pending_console_text:
+            return
+        text = "".join([_pending_console_text.popleft() for _ in range(len(_pending_console_text))])
+        lines = text.split("\n")
+        if len(lines) > MAX_CONSOLE_LINES:  # More than the widget keeps anyway
+            text = "\n".join(lines[-MAX_CONSOLE_LINES:])
+        follow = self.text_area.yview()[1] >= 0.999  # Don't pull the view down while the user reads further up
+        self.text_area.configure(state=tk.NORMAL)
+        self.text_area.insert(tk.END, text)
+        self._trim_to_max_lines()
+        self.text_area.configure(state=tk.DISABLED)
+        if follow:
+            self.text_area.see(tk.END)
+        self.flushes += 1
+
+    def _trim_to_max_lines(self):
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        if line_count > MAX_CONSOLE_LINES:
+            self.text_area.delete("1.0", f"{line_count - MAX_CONSOLE_LINES + 1}.0")
+
     def clear_console(self):
         self.cache.clear()
+        _pending_console_text.clear()
         if _console_window_text_widget and _console_window_text_widget.winfo_exists():
             _console_window_text_widget.configure(state=tk.NORMAL)
             _console_window_text_widget.delete('1.0', tk.END)
@@ -149,6 +166,8 @@ class ConsoleWindow(tk.Toplevel):
         global _console_window_text_widget, _console_window_instance
         _console_window_text_widget = None
         _console_window_instance = None
+        self.after_cancel(self._flush_job)
+        _pending_console_text.clear()
         self.destroy()
 
     def center_window(self):
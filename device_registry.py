@@ -0,0 +1,283 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Thread, Event, Lock
+
+from lazy_import import lazy_module
+
+sr = lazy_module("speech_recognition")
+pygame = lazy_module("pygame")
+
+
+SYSTEM_DEFAULT_DEVICE = "System Default"
+DEFAULT_REFRESH_INTERVAL = 5.0  # Seconds between enumerations, i.e. how fast a plugged or unplugged device is seen
+FRESH_ENUMERATION_INTERVAL = 30.0  # Without a device signature for this OS, PortAudio is asked from a new process this often
+FRESH_ENUMERATION_TIMEOUT = 15.0
+FIRST_ENUMERATION_WAIT = 2.0
+LIST_MICROPHONES_ARG = "--list-microphones"
+
+
+def list_microphone_names():
+    """PortAudio input names. The position of a name is its device_index for sr.Microphone."""
+    return list(sr.Microphone.list_microphone_names())
+
+
+def list_microphone_names_fresh():
+    """
+    Same as list_microphone_names, but asked in a short-lived child process. PortAudio only scans the
+    devices when it is initialized from scratch, which never happens in this process while the
+    microphone stream holds it open, so a device plugged in later would not show up otherwise.
+    """
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if getattr(sys, "frozen", False):
+        command = [sys.executable, LIST_MICROPHONES_ARG, result_path]  # Answered at the top of main.py
+    else:
+        command = [sys.executable, os.path.abspath(__file__), LIST_MICROPHONES_ARG, result_path]
+    try:
+        subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=FRESH_ENUMERATION_TIMEOUT, check=True,
+                       creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        try:
+            os.remove(result_path)
+        except OSError:
+            pass
+
+
+def write_microphone_names(result_path):
+    """Child process side of list_microphone_names_fresh. A file instead of stdout, windowed builds have none."""
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(list_microphone_names(), f)
+
+
+def audio_device_signature():
+    """
+    Cheap fingerprint of the audio devices the OS knows about, compared on every refresh to tell when
+    PortAudio has to be asked again. None where there is no cheap way to get one.
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class WAVECAPS(ctypes.Structure):  # Common head of WAVEINCAPSW and WAVEOUTCAPSW
+            _fields_ = [("wMid", wintypes.WORD), ("wPid", wintypes.WORD), ("vDriverVersion", wintypes.UINT),
+                        ("szPname", wintypes.WCHAR * 32), ("dwFormats", wintypes.DWORD),
+                        ("wChannels", wintypes.WORD), ("wReserved1", wintypes.WORD), ("dwSupport", wintypes.DWORD)]
+
+        winmm = ctypes.windll.winmm
+        names = []
+        for get_count, get_caps in ((winmm.waveInGetNumDevs, winmm.waveInGetDevCapsW),
+                                    (winmm.waveOutGetNumDevs, winmm.waveOutGetDevCapsW)):
+            caps = WAVECAPS()
+            for i in range(get_count()):
+                if get_caps(i, ctypes.byref(caps), ctypes.sizeof(caps)) == 0:
+                    names.append(caps.szPname)
+            names.append(None)  # Separates inputs from outputs
+        return tuple(names)
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/asound/cards", encoding="utf-8", errors="replace") as f:
+                cards = f.read()
+            return cards, tuple(sorted(os.listdir("/dev/snd")))
+        except OSError:
+            return None
+    return None
+
+
+def list_speaker_names():
+    """Output device names, or None while they cannot be listed (the mixer is not initialized)."""
+    if not pygame.mixer.get_init():
+        return None
+    try:
+        from pygame._sdl2 import audio as sdl2_audio
+        return [name for name in sdl2_audio.get_audio_device_names(False) if name and name.strip()]
+    except (ImportError, AttributeError):
+        pass
+    names = []
+    for i in range(pygame.mixer.get_num_output_devices()):
+        name = pygame.mixer.get_output_device_name(i)
+        if isinstance(name, bytes):
+            name = name.decode('utf-8', errors='replace')
+        if name and name.strip():
+            names.append(name)
+    return names
+
+
+class AudioDeviceRegistry:
+    """
+    Enumerates microphones and speakers on a background thread and serves the cached lists, so
+    opening the settings window or switching devices does not initialize PortAudio on the Tk thread.
+
+    The lists are refreshed every refresh_interval seconds (or right away with refresh_now) and
+    subscribers are called with (microphones, speakers) whenever they changed, e.g. when a USB
+    headset is plugged in or out. Without a running thread (standalone settings window) the first
+    access enumerates synchronously.
+
+    Only the first microphone enumeration runs in this process. Later ones go through
+    list_microphones_fresh (a child process), and only when the OS device signature changed, on
+    refresh_now, or every fresh_interval seconds where the OS has no signature.
+    """
+
+    def __init__(self, list_microphones=list_microphone_names, list_speakers=list_speaker_names,
+                 refresh_interval=DEFAULT_REFRESH_INTERVAL, list_microphones_fresh=list_microphone_names_fresh,
+                 device_signature=audio_device_signature, fresh_interval=FRESH_ENUMERATION_INTERVAL):
+        self.list_microphones = list_microphones
+        self.list_microphones_fresh = list_microphones_fresh
+        self.list_speakers = list_speakers
+        self.device_signature = device_signature
+        self.refresh_interval = refresh_interval
+        self.fresh_interval = fresh_interval
+        self._signature = None
+        self._next_fresh_at = 0.0
+        self._fresh_requested = False
+        self._lock = Lock()
+        self._microphones = None
+        self._speakers = None
+        self._subscribers = []
+        self._ready = Event()
+        self._wake_event = Event()
+        self._stop_event = Event()
+        self._notify_requested = False
+        self._thread = None
+        self.enumerations = 0
+        self.fresh_enumerations = 0
+        self.changes = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="AudioDeviceRegistry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def refresh_now(self, notify=False):
+        """Enumerates again without waiting for the interval. notify=True calls subscribers even if nothing changed."""
+        self._notify_requested = self._notify_requested or notify
+        self._fresh_requested = True
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._refresh()
+            self._wake_event.wait(self.refresh_interval)
+            self._wake_event.clear()
+
+    def _enumerate(self, list_devices, previous, kind):
+        try:
+            return list_devices()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error listing {kind} devices: {e}")
+            return previous
+
+    def _list_microphones(self):
+        signature = self._enumerate(self.device_signature, None, "audio device signature")
+        if not self._ready.is_set():
+            self._signature = signature
+            return self.list_microphones()  # Nothing holds PortAudio open yet, so it scans the devices now
+        now = time.monotonic()
+        if signature is None:
+            due = now >= self._next_fresh_at
+        else:
+            due = signature != self._signature
+        if not (due or self._fresh_requested):
+            return self._microphones
+        self._signature = signature
+        self._fresh_requested = False
+        self._next_fresh_at = now + self.fresh_interval
+        self.fresh_enumerations += 1
+        return self.list_microphones_fresh()
+
+    def _refresh(self):
+        microphones = self._enumerate(self._list_microphones, self._microphones, "microphone")
+        speakers = self._enumerate(self.list_speakers, self._speakers, "speaker")
+        with self._lock:
+            if speakers is None:
+                speakers = self._speakers  # Not listable right now, keep what we knew
+            changed = self._ready.is_set() and (microphones != self._microphones or speakers != self._speakers)
+            self._microphones, self._speakers = microphones, speakers
+            self.enumerations += 1
+            notify = changed or self._notify_requested
+            self._notify_requested = False
+            subscribers = list(self._subscribers)
+        self._ready.set()
+        if changed:
+            self.changes += 1
+            print("Audio devices changed.")
+        if notify:
+            for callback in subscribers:
+                try:
+                    callback(self.microphones(), self.speakers())
+                except Exception as e:
+                    print(f"Error in audio device subscriber: {e}")
+
+    def wait_until_enumerated(self, timeout=None):
+        """Blocks until the first enumeration finished. Returns False on timeout."""
+        if self._ready.wait(timeout):
+            return True
+        self._notify_requested = True  # The caller went on with empty lists, tell subscribers once the real ones are in
+        return False
+
+    def _ensure_enumerated(self):
+        if self._ready.is_set():
+            return
+        if self._thread and self._thread.is_alive():
+            self.wait_until_enumerated(FIRST_ENUMERATION_WAIT)
+        else:
+            self._refresh()
+
+    def microphones(self):
+        """Cached microphone names in PortAudio order (may contain duplicates)."""
+        self._ensure_enumerated()
+        with self._lock:
+            return list(self._microphones or [])
+
+    def speakers(self):
+        self._ensure_enumerated()
+        with self._lock:
+            return list(self._speakers or [])
+
+    def speakers_known(self):
+        with self._lock:
+            return self._speakers is not None
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb != callback]  # != so bound methods match
+
+    def stats(self):
+        with self._lock:
+            return {
+                "microphones": len(self._microphones or []),
+                "speakers": len(self._speakers or []),
+                "enumerations": self.enumerations,
+                "fresh_enumerations": self.fresh_enumerations,
+                "changes": self.changes,
+                "errors": self.errors,
+            }
+
+
+device_registry = AudioDeviceRegistry()
+
+
+if __name__ == "__main__" and LIST_MICROPHONES_ARG in sys.argv:
+    write_microphone_names(sys.argv[sys.argv.index(LIST_MICROPHONES_ARG) + 1])
@@ -0,0 +1,133 @@
+import glob
+import os
+import sys
+import time
+
+
+TARGET_FPS = 50
+MIN_FPS = 10
+LOW_POWER_FPS = 15
+FRAME_BUDGET_SHARE = 0.5  # A frame may use this share of its interval, the rest belongs to the other Tk work
+POWER_CHECK_INTERVAL = 30.0
+MAX_FRAME_SCALE = 5.0  # Caps the catch-up step after a long stall, so the orb doesn't jump
+
+
+def on_battery():
+    """True if the machine runs on battery. False when that cannot be determined (e.g. desktops)."""
+    if sys.platform == "win32":
+        import ctypes
+
+        class SystemPowerStatus(ctypes.Structure):
+            _fields_ = [("ACLineStatus", ctypes.c_ubyte), ("BatteryFlag", ctypes.c_ubyte),
+                        ("BatteryLifePercent", ctypes.c_ubyte), ("SystemStatusFlag", ctypes.c_ubyte),
+                        ("BatteryLifeTime", ctypes.c_ulong), ("BatteryFullLifeTime", ctypes.c_ulong)]
+
+        status = SystemPowerStatus()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            return False
+        return status.ACLineStatus == 0
+    has_battery = False
+    for supply in glob.glob("/sys/class/power_supply/*"):
+        try:
+            with open(os.path.join(supply, "type"), "r") as f:
+                supply_type = f.read().strip()
+            if supply_type == "Battery":
+                has_battery = True
+            elif supply_type in ("Mains", "USB", "USB_C"):
+                with open(os.path.join(supply, "online"), "r") as f:
+                    if f.read().strip() == "1":
+                        return False
+        except OSError:
+            continue
+    return has_battery
+
+
+class FrameGovernor:
+    """
+    Decides when the overlay draws its next frame.
+
+    Frames run at target_fps as long as they fit into budget_share of the frame interval and the Tk
+    timer fires on time. Expensive frames or late timers (the Tk thread or the CPU is busy) stretch the
+    interval down to min_fps; cheap frames shorten it again step by step. On battery the rate is capped
+    at low_power_fps. frame_scale tells the animation how many target-rate frames the last interval
+    stood for, so motion keeps its speed at any rate.
+    """
+
+    def __init__(self, target_fps=TARGET_FPS, min_fps=MIN_FPS, low_power_fps=LOW_POWER_FPS,
+                 budget_share=FRAME_BUDGET_SHARE, power_source=on_battery, power_check_interval=POWER_CHECK_INTERVAL):
+        self.base_interval = 1.0 / target_fps
+        self.max_interval = 1.0 / min_fps
+        self.low_power_interval = 1.0 / low_power_fps
+        self.budget_share = budget_share
+        self.power_source = power_source
+        self.power_check_interval = power_check_interval
+        self.interval = self.base_interval
+        self.frame_scale = 1.0
+        self._low_power = False
+        self._next_power_check = 0.0
+        self._frame_start = None
+        self._last_frame_start = None
+        self._due = None
+        self._avg_cost = 0.0
+        self._avg_lateness = 0.0
+        self.frames = 0
+        self.throttled_frames = 0
+
+    def reset(self):
+        """Forgets timing history, e.g. when the animation resumes after being hidden."""
+        self._last_frame_start = None
+        self._due = None
+        self._avg_lateness = 0.0
+        self.frame_scale = 1.0
+
+    def low_power(self):
+        now = time.monotonic()
+        if now >= self._next_power_check:
+            self._next_power_check = now + self.power_check_interval
+            try:
+                low_power = bool(self.power_source())
+            except Exception as e:
+                print(f"Could not read power status: {e}")
+                low_power = False
+            if low_power != self._low_power:
+                print(f"Overlay animation {'switched to low-power rate' if low_power else 'back to full rate'}.")
+            self._low_power = low_power
+        return self._low_power
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._last_frame_start is not None:
+            self.frame_scale = min(MAX_FRAME_SCALE, (now - self._last_frame_start) / self.base_interval)
+        if self._due is not None:
+            lateness = max(0.0, now - self._due)
+            self._avg_lateness += 0.2 * (lateness - self._avg_lateness)
+        self._frame_start = self._last_frame_start = now
+
+    def end_frame(self):
+        """Returns the delay in milliseconds until the next frame should start."""
+        now = time.perf_counter()
+        cost = now - self._frame_start
+        self._avg_cost += 0.2 * (cost - self._avg_cost)
+        self.frames += 1
+
+        budget = self.budget_share * self.interval
+        if self._avg_cost > budget or self._avg_lateness > self.interval:
+            self.interval = min(self.max_interval, self.interval * 1.25)
+            self.throttled_frames += 1
+        elif self._avg_cost < budget / 2 and self._avg_lateness < self.interval / 2:
+            self.interval *= 0.95
+        floor = max(self.base_interval, self.low_power_interval if self.low_power() else self.base_interval)
+        self.interval = max(floor, min(self.max_interval, self.interval))
+
+        delay = max(1, int(round((self.interval - cost) * 1000)))
+        self._due = now + delay / 1000.0
+        return delay
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "throttled_frames": self.throttled_frames,
+            "fps": round(1.0 / self.interval, 1),
+            "avg_frame_ms": round(self._avg_cost * 1000, 2),
+            "low_power": self._low_power,
+        }
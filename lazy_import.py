@@ -0,0 +1,75 @@
+import importlib
+from threading import Thread, Lock
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so heavy SDKs (google-genai,
+    pygame, edge-tts, speech_recognition) are not loaded before the tray is up. If the import
+    fails and a fallback object was given, that is used instead, like a try/except ImportError.
+    """
+
+    def __init__(self, name, fallback=None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_fallback", fallback)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", Lock())
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+        with self._lock:
+            if self._module is None:
+                try:
+                    module = importlib.import_module(self._name)
+                except ImportError as e:
+                    if self._fallback is None:
+                        raise
+                    print(f"WARNING: {self._name} could not be imported ({e}). Using fallback.")
+                    module = self._fallback
+                object.__setattr__(self, "_module", module)
+        return self._module
+
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded() else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+_lazy_modules = {}
+_registry_lock = Lock()
+
+
+def lazy_module(name, fallback=None):
+    """Shared LazyModule for name, so every importer triggers (and waits for) the same import."""
+    if fallback is not None:
+        return LazyModule(name, fallback)  # The fallback is the importer's own choice, don't hand it to others
+    with _registry_lock:
+        if name not in _lazy_modules:
+            _lazy_modules[name] = LazyModule(name, fallback)
+        return _lazy_modules[name]
+
+
+def warm_up(names, on_done=None):
+    """Imports the modules on a background thread, in order, so first use does not pay for them."""
+    def _run():
+        for name in names:
+            try:
+                lazy_module(name)._load()
+            except Exception as e:
+                print(f"Background import of {name} failed: {e}")
+        if on_done:
+            on_done()
+
+    thread = Thread(target=_run, name="ImportWarmUp", daemon=True)
+    thread.start()
+    return thread
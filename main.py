@@ -1,49 +1,60 @@
-
+import sys
+if "--list-microphones" in sys.argv: # Fresh device enumeration of the device registry, in the bundled app
+    from device_registry import LIST_MICROPHONES_ARG, write_microphone_names
+    write_microphone_names(sys.argv[sys.argv.index(LIST_MICROPHONES_ARG) + 1]); sys.exit(0)
+from startup_profiler import startup_profiler, profile_startup_requested
+_profile_startup, _profile_report_path = profile_startup_requested(sys.argv)
+if _profile_startup: startup_profiler.start(_profile_report_path) # First, so the cost of every import below is recorded
 import asyncio
 import os
 import re
+import json
 import webbrowser
 import tkinter as tk
 from tkinter import messagebox
-from threading import Thread, Event
-from edge_tts import Communicate
-from google import genai as gai
-from google.genai import types
-from google.genai.errors import ClientError
-from google.generativeai.types import StopCandidateException
+from threading import Thread, Event, Lock, current_thread, main_thread
 import time
-import pygame
-import sys
 from pystray import MenuItem as item, Icon as icon
 from PIL import Image, ImageDraw
-import speech_recognition as sr
 import atexit
+from lazy_import import lazy_module, warm_up
+
+# Heavy SDKs are imported on first use (or by the startup warm-up), not before the tray appears
+gai = lazy_module("google.genai")
+types = lazy_module("google.genai.types")
+genai_errors = lazy_module("google.genai.errors")
+legacy_genai_types = lazy_module("google.generativeai.types")
+pygame = lazy_module("pygame")
+sr = lazy_module("speech_recognition")
+settings_ui = lazy_module("settings") # Settings and agent builder windows, only needed once the user opens them
 
 try:
-    from settings import (
+    from app_settings import (
         load_settings as app_load_settings,
-        ModernSettingsApp,
         default_settings as app_default_settings,
         DEFAULT_SYSTEM_PROMPT_NAME,
         DEFAULT_SYSTEM_PROMPT_TEXT,
         LanguageManager,
-        TTS_VOICES_STRUCTURED # Added import
+        SETTINGS_FILE
     )
-    from agent_builder import (
+    from voice_catalog import voice_catalog
+    from system_prompts import (
         load_system_prompts as agent_load_system_prompts,
         get_full_system_prompt as agent_get_full_system_prompt,
+        SYSPROMPTS_FILE,
 
         AGENT_SETTING_ACTIVATION_WORD,
         AGENT_SETTING_STOP_WORDS,
         AGENT_SETTING_CHAT_LENGTH,
+        AGENT_SETTING_CHAT_TOKEN_BUDGET,
         AGENT_SETTING_TTS_VOICE,
         AGENT_SETTING_OPEN_LINKS
     )
 except ImportError as e:
-    if 'settings' in str(e).lower():
-        messagebox.showerror("Error", "settings.py could not be found or imported.")
-    elif 'agent_builder' in str(e).lower():
-        messagebox.showerror("Error", "agent_builder.py could not be found or imported.")
+    if 'app_settings' in str(e).lower():
+        messagebox.showerror("Error", "app_settings.py could not be found or imported.")
+    elif 'system_prompts' in str(e).lower():
+        messagebox.showerror("Error", "system_prompts.py could not be found or imported.")
     else:
         messagebox.showerror("Error", f"A critical file could not be imported: {e}")
     sys.exit(1)
@@ -54,6 +65,27 @@ except ImportError:
     messagebox.showerror("Error", "overlay.py could not be found or imported.")
     sys.exit(1)
 
+try:
+    from speech_pipeline import SentenceSplitter, SpeechPipeline
+    from tts_audio import synthesize_speech, play_audio_bytes
+    from tts_cache import PhraseCache, prewarm_phrases
+    from async_service import get_async_service
+    from vad import VoiceActivityDetector, pcm_to_float
+    from wake_word import KeywordSpotter
+    from audio_pipeline import DropQueue, DROP_OLDEST
+    from barge_in import BargeInDetector
+    from mic_stream import MicrophoneStream
+    from noise_calibration import NoiseCalibrator
+    from chat_history import ChatHistoryManager
+    from word_matcher import PhraseMatcher
+    from config_store import config_store
+    from config_watcher import ConfigFileWatcher
+    from ui_dispatcher import ui_dispatcher
+    from device_registry import device_registry, SYSTEM_DEFAULT_DEVICE
+except ImportError as e:
+    messagebox.showerror("Error", f"A critical file could not be imported: {e}")
+    sys.exit(1)
+
 
 try:
     from console import init_output_redirection, show_console_window as show_console_window_external, get_console_window_instance
@@ -67,15 +99,12 @@ except ImportError as e:
 
 
 
-try:
-    pygame.mixer.init()
-except pygame.error as e:
-    print(f"Initial Pygame mixer init failed: {e}. Audio output may not work.") # This print will be captured
-
-
 current_app_settings = app_load_settings() # This may print, will be captured
 lm_main = LanguageManager(current_app_settings.get("ui_language", app_default_settings["ui_language"])) # This may print
 all_system_prompts = agent_load_system_prompts(DEFAULT_SYSTEM_PROMPT_NAME, DEFAULT_SYSTEM_PROMPT_TEXT)
+config_store.subscribe(lambda change: on_config_changed(change), names=("settings", "system_prompts"))
+_settings_window_open = False
+_config_apply_pending = False
 
 
 _lock_file_descriptor = None
@@ -85,25 +114,83 @@ _lock_file_path = None
 CodeWord = ""
 StopWords = []
 MAX_HISTORY = 0
+CHAT_TOKEN_BUDGET = 0
+CHAT_MODEL = "gemini-1.5-flash"
 API_KEY = ""
 OPEN_LINKS_AUTOMATICALLY = True
+STREAM_RESPONSES = app_default_settings["stream_responses"]
+LOCAL_VAD_ENABLED = app_default_settings["local_vad_enabled"]
+OFFLINE_WAKE_WORD_ENABLED = app_default_settings["offline_wake_word_enabled"]
+BARGE_IN_ENABLED = app_default_settings["barge_in_enabled"]
+FUZZY_WORD_MATCHING = app_default_settings["fuzzy_word_matching"]
+CONFIG_HOT_RELOAD = app_default_settings["config_hot_reload"]
+MIC_PRE_ROLL_MS = app_default_settings["mic_pre_roll_ms"]
 ACTIVE_SYSTEM_PROMPT_NAME = DEFAULT_SYSTEM_PROMPT_NAME
 TTS_VOICE = app_default_settings["tts_voice"] # Wird in update_globals_from_settings aktualisiert
 STT_LANGUAGE = "en-US" # Wird in update_globals_from_settings aktualisiert
 SELECTED_MIC_NAME = app_default_settings["selected_microphone"]
 SELECTED_SPEAKER_NAME = app_default_settings["selected_speaker"]
 
+async_service = get_async_service() # Runs all async work (TTS) on one long-lived event loop
+phrase_cache = None
 client = None
 chat = None
 chat_config = None
-recognizer = sr.Recognizer()
+recognizer = None # Created with the audio devices
 mic = None
+mic_stream = None # Stays open for the whole session, utterances are cut from its ring buffer
+noise_calibrator = None # Energy threshold per microphone, stored and refined in the background
+active_audio_devices = {"microphone": None, "speaker": None} # What is actually open, after any fallback
+audio_devices_lock = Lock() # Settings changes (Tk thread) and hot-plug recovery (dispatcher thread)
+audio_devices_change_requested = Event() # Set by the device registry, handled by the dispatcher between turns
+MIC_CALIBRATION_FILE = "mic_calibration.json"
+voice_activity_detector = VoiceActivityDetector() # Filters non-speech before cloud STT in passive mode
+keyword_spotter = None # Offline activation word matcher, created in update_globals_from_settings
+config_watcher = None # Applies edits to settings.json / sysprompts.json made outside the app while it runs
+activation_word_matcher = None # Compiled matchers for CodeWord and StopWords, rebuilt when they change
+stop_word_matcher = None
+_word_matcher_key = None
+wake_word_enrollment_requested = Event()
+WAKE_WORD_ENROLLMENT_SAMPLES = 3
+
+# Capture -> STT -> dispatch pipeline, so the microphone keeps listening while a turn is processed
+UTTERANCE_QUEUE_SIZE = 4
+TRANSCRIPT_QUEUE_SIZE = 8
+TRANSCRIPT_QUEUE_BLOCK_TIMEOUT = 1.0
+BARGE_IN_PRE_ROLL = 0.3 # Seconds of audio kept from before the barge-in triggered
+BARGE_IN_PHRASE_TIME_LIMIT = 7
+utterance_queue = DropQueue("utterances", UTTERANCE_QUEUE_SIZE, DROP_OLDEST)
+transcript_queue = DropQueue("transcripts", TRANSCRIPT_QUEUE_SIZE, DROP_OLDEST)
+conversation_active = Event() # Set while in listening mode (after the activation word)
+dispatch_busy = Event() # Set while the dispatcher handles a turn
+capture_paused = Event()
+playback_state = {"active": False, "last_end": 0.0} # Lets the capture stage tell user speech from TTS echo
+assistant_speaking = Event() # Set for the whole spoken reply, including gaps between sentences
+barge_in_detector = BargeInDetector()
+
+SPOKEN_PHRASE_KEYS = (
+    "activation_confirmation_speech", "link_opened_speech", "failed_to_open_link_speech",
+    "speech_recognition_problem_speech", "response_blocked_speech", "unexpected_error_speech",
+    "ai_client_error_message_generic", "default_tts_okay", "default_tts_understood",
+    "wake_word_enrollment_done_speech", "wake_word_enrollment_failed_speech",
+)
+PREWARM_MAX_CONCURRENCY = 3
+_prewarm_generation = 0
+
+URL_PATTERN = r'(https?://[^\s]+|www\.[^\s]+)' # Basic URL regex
 
 speech_stop_event = Event()
 main_loop_stop_event = Event()
+startup_complete = Event() # Set after the first update_globals_from_settings, settings changes wait for it
 overlay = None
 main_loop_thread = None
 tray_icon = None
+FAST_STARTUP = app_default_settings["fast_startup"]
+OVERLAY_SPRITE_ANIMATION = app_default_settings["overlay_sprite_animation"] # Cheaper frames, e.g. over remote desktop
+STARTUP_WARM_UP_MODULES = ("google.genai", "speech_recognition", "pygame", "edge_tts", "sv_ttk", "settings",
+                           "google.generativeai.types") # Only needed when a reply gets blocked, so last
+STARTUP_TIMING_ENV = "MANFRED_STARTUP_TIMING_FILE"
+STARTUP_PROFILE_FILE = "startup_profile.json" # Default report of --profile-startup, next to the app
 
 
 
@@ -146,6 +233,9 @@ def cleanup_lock_file():
 
 def show_error_dialog(title_key: str, message_key: str, parent=None, **format_args):
     global lm_main, overlay
+    if current_thread() is not main_thread() and overlay: # e.g. from the startup thread
+        ui_dispatcher.post(lambda: show_error_dialog(title_key, message_key, parent, **format_args))
+        return
 
     title = lm_main.get_string(title_key, default_text="Error")
     message_text = lm_main.get_string(message_key, default_text="An error occurred: {e}", **format_args)
@@ -163,10 +253,7 @@ def show_error_dialog(title_key: str, message_key: str, parent=None, **format_ar
     messagebox.showerror(title, message_text, parent=parent)
 
 
-def initialize_audio_devices():
-    global mic, SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME, recognizer, lm_main
-    print("Initializing audio devices...")
-
+def initialize_mixer():
     try:
         if pygame.mixer.get_init():
             pygame.mixer.quit()
@@ -180,6 +267,7 @@ def initialize_audio_devices():
             pygame.mixer.init(devicename=SELECTED_SPEAKER_NAME)
 
         print("Pygame mixer initialized successfully.")
+        active_audio_devices["speaker"] = SELECTED_SPEAKER_NAME
 
     except Exception as e:
         print(f"Error initializing Pygame mixer with '{SELECTED_SPEAKER_NAME}': {e}. Falling back to default.")
@@ -187,17 +275,34 @@ def initialize_audio_devices():
             if pygame.mixer.get_init(): pygame.mixer.quit()
             pygame.mixer.init()
             print("Pygame mixer initialized with system default (fallback).")
+            active_audio_devices["speaker"] = SYSTEM_DEFAULT_DEVICE
         except Exception as e_fallback:
             print(f"Critical error: Pygame mixer could not be initialized even with default: {e_fallback}")
+            active_audio_devices["speaker"] = None
             show_error_dialog("error_title",
                               "pygame_mixer_init_failed_error",
                               e=str(e_fallback))
 
+
+def initialize_audio_devices():
+    with audio_devices_lock:
+        _open_audio_devices()
+
+
+def _open_audio_devices():
+    global mic, SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME, recognizer, lm_main
+    print("Initializing audio devices...")
+    close_mic_stream()
+    if recognizer is None: recognizer = sr.Recognizer()
+
+    with startup_profiler.phase("mixer_init"):
+        initialize_mixer()
+
     # Microphone (SpeechRecognition)
     mic_index = None
     if SELECTED_MIC_NAME != "System Default":
         try:
-            mic_names = sr.Microphone.list_microphone_names()
+            mic_names = device_registry.microphones() # Cached, enumerating PortAudio takes a while
             if SELECTED_MIC_NAME in mic_names:
                 mic_index = mic_names.index(SELECTED_MIC_NAME)
                 print(f"Using microphone: {SELECTED_MIC_NAME} (Index: {mic_index})")
@@ -215,33 +320,118 @@ def initialize_audio_devices():
 
     try:
         mic = sr.Microphone(device_index=mic_index)
-        with mic as source:
-            print("Adjusting for ambient noise... ")
-            recognizer.adjust_for_ambient_noise(source, duration=1.0)
-            print("Ambient noise adjustment complete.")
+        open_mic_stream(SELECTED_MIC_NAME)
+        active_audio_devices["microphone"] = SELECTED_MIC_NAME
     except Exception as e:
-        print(f"Error initializing microphone or adjusting for ambient noise: {e}")
+        print(f"Error initializing microphone: {e}")
         show_error_dialog("error_title",
                           "microphone_init_failed_error",
                           e=str(e))
         try: # Fallback to truly default microphone
             mic = sr.Microphone() # No device_index
-            with mic as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            open_mic_stream("System Default")
+            active_audio_devices["microphone"] = SYSTEM_DEFAULT_DEVICE
             print("Successfully initialized with truly default microphone after error.")
         except Exception as e_fallback_mic:
             print(f"Fallback microphone initialization also failed: {e_fallback_mic}")
             mic = None
+            active_audio_devices["microphone"] = None
+
+
+def on_audio_devices_changed(microphones, speakers):
+    """
+    Device registry subscriber (runs on its thread). Only flags the change: reopening the devices
+    re-initializes the mixer, so it waits for the dispatcher to be between turns (apply_audio_device_change).
+    """
+    audio_devices_change_requested.set()
+
+
+def audio_output_idle():
+    return not (playback_state["active"] or assistant_speaking.is_set() or
+                (pygame.mixer.get_init() and pygame.mixer.music.get_busy()))
+
+
+def apply_audio_device_change():
+    """
+    Falls back to the system default when the selected device was unplugged, switches back once it
+    is plugged in again and reopens a microphone stream that died. Runs on the dispatcher thread.
+    """
+    global SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME
+    audio_devices_change_requested.clear()
+    microphones, speakers = device_registry.microphones(), device_registry.speakers()
+    configured_mic = current_app_settings.get("selected_microphone", app_default_settings["selected_microphone"])
+    configured_speaker = current_app_settings.get("selected_speaker", app_default_settings["selected_speaker"])
+    wanted_mic = configured_mic if configured_mic in microphones else SYSTEM_DEFAULT_DEVICE
+    speaker_available = configured_speaker in speakers or not device_registry.speakers_known()
+    wanted_speaker = configured_speaker if speaker_available else SYSTEM_DEFAULT_DEVICE
+    stream = mic_stream
+    stream_lost = stream is not None and not stream.is_alive()
+    if not stream_lost and active_audio_devices == {"microphone": wanted_mic, "speaker": wanted_speaker}:
+        return
+    print(f"Audio devices changed, using microphone '{wanted_mic}' and speaker '{wanted_speaker}'.")
+    SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME = wanted_mic, wanted_speaker
+    initialize_audio_devices()
+
+
+def open_mic_stream(device_name):
+    """Opens the shared stream on mic and calibrates it in the background instead of blocking for a second."""
+    global mic_stream, noise_calibrator
+    mic_stream = MicrophoneStream(mic, pre_roll=MIC_PRE_ROLL_MS / 1000.0).start()
+    if noise_calibrator is None:
+        noise_calibrator = NoiseCalibrator(get_app_data_path(MIC_CALIBRATION_FILE))
+    noise_calibrator.start(mic_stream, recognizer, device_name,
+                           should_pause=lambda: playback_state["active"] or assistant_speaking.is_set(),
+                           on_ready=lambda: startup_profiler.mark("ambient_noise_calibrated"))
+
+
+def close_mic_stream():
+    global mic_stream
+    if noise_calibrator:
+        noise_calibrator.stop() # Also stores the refined threshold of the device
+    if mic_stream:
+        stream, mic_stream = mic_stream, None
+        stream.stop()
+
+
+def start_config_watcher():
+    global config_watcher
+    if config_watcher:
+        return
+    config_watcher = ConfigFileWatcher({SETTINGS_FILE: "settings", SYSPROMPTS_FILE: "system_prompts"},
+                                       on_config_file_changed).start()
+
+
+def stop_config_watcher():
+    global config_watcher
+    if config_watcher:
+        watcher, config_watcher = config_watcher, None
+        print(f"Config watcher stats: {watcher.stats()}")
+        watcher.stop()
+
+
+def on_config_file_changed(name):
+    """
+    Runs on the watcher thread once an edited file has settled and parsed. The store only publishes the
+    keys that differ from what is loaded (the app's own saves produce none), and on_config_changed hands
+    those to the Tk thread, so the main loop keeps running.
+    """
+    changed_keys = config_store.reload(name)
+    if changed_keys:
+        print(f"'{name}' was changed on disk. Applying: {', '.join(sorted(changed_keys))}")
 
 
 def update_globals_from_settings(loaded_settings, initial_load=False):
-    global CodeWord, StopWords, MAX_HISTORY, API_KEY, current_app_settings, all_system_prompts
+    global CodeWord, StopWords, MAX_HISTORY, CHAT_TOKEN_BUDGET, API_KEY, current_app_settings, all_system_prompts
     global client, chat, chat_config, OPEN_LINKS_AUTOMATICALLY, ACTIVE_SYSTEM_PROMPT_NAME, TTS_VOICE
-    global lm_main, STT_LANGUAGE, SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME
+    global lm_main, STT_LANGUAGE, SELECTED_MIC_NAME, SELECTED_SPEAKER_NAME, STREAM_RESPONSES, phrase_cache
+    global LOCAL_VAD_ENABLED, OFFLINE_WAKE_WORD_ENABLED, BARGE_IN_ENABLED, MIC_PRE_ROLL_MS, keyword_spotter
+    global FUZZY_WORD_MATCHING, activation_word_matcher, stop_word_matcher, _word_matcher_key
+    global CONFIG_HOT_RELOAD, OVERLAY_SPRITE_ANIMATION
 
 
     old_api_key = current_app_settings.get("api_key") if not initial_load else None
     old_chat_length_global = current_app_settings.get("chat_length") if not initial_load else None # Global setting
+    old_chat_token_budget = CHAT_TOKEN_BUDGET if not initial_load else None
     old_open_links_global = current_app_settings.get("open_links_automatically", app_default_settings[
         "open_links_automatically"]) if not initial_load else False
     old_active_prompt_name_global = current_app_settings.get("active_system_prompt_name") if not initial_load else None
@@ -276,13 +466,28 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
     CodeWord = agent_activation_word_override if agent_activation_word_override else \
                current_app_settings.get("activation_word", app_default_settings["activation_word"])
 
+    if keyword_spotter is None:
+        keyword_spotter = KeywordSpotter(get_app_data_path("wake_word_templates"))
+    keyword_spotter.set_active_word(CodeWord) # Templates are stored per activation word, so agent overrides get their own
+
     agent_stop_words_override = active_agent_config.get(AGENT_SETTING_STOP_WORDS)
     StopWords = agent_stop_words_override if agent_stop_words_override is not None else \
                 current_app_settings.get("stop_words", app_default_settings["stop_words"])
 
+    FUZZY_WORD_MATCHING = current_app_settings.get("fuzzy_word_matching", app_default_settings["fuzzy_word_matching"])
+    matcher_key = (CodeWord, tuple(StopWords), FUZZY_WORD_MATCHING)
+    if matcher_key != _word_matcher_key: # Compile only when the words actually change
+        activation_word_matcher = PhraseMatcher([CodeWord], fuzzy=FUZZY_WORD_MATCHING)
+        stop_word_matcher = PhraseMatcher(StopWords, fuzzy=FUZZY_WORD_MATCHING, phonetic=False) # A false stop ends the conversation
+        _word_matcher_key = matcher_key
+
     agent_chat_length_override = active_agent_config.get(AGENT_SETTING_CHAT_LENGTH)
     MAX_HISTORY = agent_chat_length_override if agent_chat_length_override is not None else \
                   current_app_settings.get("chat_length", app_default_settings["chat_length"])
+    agent_token_budget_override = active_agent_config.get(AGENT_SETTING_CHAT_TOKEN_BUDGET)
+    CHAT_TOKEN_BUDGET = agent_token_budget_override if agent_token_budget_override is not None else \
+                        current_app_settings.get("chat_token_budget", app_default_settings["chat_token_budget"])
+    if chat: chat.set_limits(MAX_HISTORY, CHAT_TOKEN_BUDGET)
 
     agent_open_links_override = active_agent_config.get(AGENT_SETTING_OPEN_LINKS)
     OPEN_LINKS_AUTOMATICALLY = agent_open_links_override if agent_open_links_override is not None else \
@@ -296,12 +501,35 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
 
 
 
+    STREAM_RESPONSES = current_app_settings.get("stream_responses", app_default_settings["stream_responses"])
+    LOCAL_VAD_ENABLED = current_app_settings.get("local_vad_enabled", app_default_settings["local_vad_enabled"])
+    OFFLINE_WAKE_WORD_ENABLED = current_app_settings.get("offline_wake_word_enabled",
+                                                         app_default_settings["offline_wake_word_enabled"])
+    BARGE_IN_ENABLED = current_app_settings.get("barge_in_enabled", app_default_settings["barge_in_enabled"])
+    MIC_PRE_ROLL_MS = current_app_settings.get("mic_pre_roll_ms", app_default_settings["mic_pre_roll_ms"])
+    if mic_stream: mic_stream.pre_roll = MIC_PRE_ROLL_MS / 1000.0
+    CONFIG_HOT_RELOAD = current_app_settings.get("config_hot_reload", app_default_settings["config_hot_reload"])
+    if CONFIG_HOT_RELOAD: start_config_watcher()
+    else: stop_config_watcher()
+    OVERLAY_SPRITE_ANIMATION = current_app_settings.get("overlay_sprite_animation",
+                                                        app_default_settings["overlay_sprite_animation"])
+    if overlay:
+        ui_dispatcher.post(overlay.set_sprite_animation, OVERLAY_SPRITE_ANIMATION, key="overlay_sprite_animation")
+
+    tts_cache_max_bytes = int(current_app_settings.get("tts_cache_max_mb", app_default_settings["tts_cache_max_mb"]) * 1024 * 1024)
+    if phrase_cache is None:
+        phrase_cache = PhraseCache(get_app_data_path("tts_cache"), max_bytes=tts_cache_max_bytes)
+    elif phrase_cache.max_bytes != tts_cache_max_bytes:
+        phrase_cache.set_max_bytes(tts_cache_max_bytes)
+
     SELECTED_MIC_NAME = current_app_settings.get("selected_microphone", app_default_settings["selected_microphone"])
     SELECTED_SPEAKER_NAME = current_app_settings.get("selected_speaker", app_default_settings["selected_speaker"])
 
 
 
     tts_voice_effectively_changed = initial_load or old_effective_tts_voice != TTS_VOICE
+    if tts_voice_effectively_changed or old_ui_language != new_ui_language:
+        start_phrase_cache_prewarm() # The spoken phrases follow the UI language
 
     if tts_voice_effectively_changed:
         try:
@@ -323,7 +551,7 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
 
     if not API_KEY or API_KEY == app_default_settings["api_key"]:
         print("WARNING: API key not configured or is placeholder.")
-        if initial_load or (old_api_key and old_api_key != app_default_settings["api_key"]):
+        if not initial_load and old_api_key and old_api_key != app_default_settings["api_key"]: # At startup __main__ warns
             if overlay and overlay.winfo_exists():
                 messagebox.showwarning(
                     lm_main.get_string("api_key_not_configured_warning_title"),
@@ -344,7 +572,7 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
         global_open_links_default,
         DEFAULT_SYSTEM_PROMPT_TEXT,
         TTS_VOICE,  # Pass the effective TTS voice ID for the current agent
-        TTS_VOICES_STRUCTURED # Pass the main structure from settings.py
+        voice_catalog # Index over TTS_VOICES_STRUCTURED from voice_catalog.py
     )
     old_system_instruction_from_config = chat_config.system_instruction if chat_config else None
 
@@ -362,7 +590,8 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
     speaker_changed = initial_load or old_speaker_name != SELECTED_SPEAKER_NAME
 
     if mic_changed or speaker_changed:
-        initialize_audio_devices()
+        with startup_profiler.phase("initialize_audio_devices"):
+            initialize_audio_devices()
         if not initial_load:
             changed_audio_parts = []
             if mic_changed: changed_audio_parts.append(
@@ -382,13 +611,11 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
         if API_KEY and API_KEY != app_default_settings["api_key"]:
             try:
                 if client is None or api_key_changed: client = gai.Client(api_key=API_KEY)
-                current_history = []
                 if chat and not api_key_changed and system_prompt_changed:
-                    try:
-                        current_history = chat.get_history(); print("Preserving chat history.")
-                    except Exception as e:
-                        print(f"Could not preserve chat history: {e}.")
-                chat = client.chats.create(model="gemini-1.5-flash", config=chat_config, history=current_history)
+                    chat.config = chat_config; print("Preserving chat history.") # History lives in the manager, nothing to copy
+                else:
+                    chat = ChatHistoryManager(client, CHAT_MODEL, chat_config, MAX_HISTORY,
+                                              token_budget=CHAT_TOKEN_BUDGET, submit=async_service.submit)
                 print("AI Client and Chat initialized/updated.")
                 if not initial_load:
                     msg_key = "settings_updated_reinit_api_key" if api_key_changed else "settings_updated_reinit_system_prompt"
@@ -399,10 +626,9 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
                 print(f"Error initializing Google AI Client: {e}");
                 client = None;
                 chat = None
-                if overlay and overlay.winfo_exists():
+                if overlay: # May run on the startup thread, show_error_dialog hands the dialog to the Tk thread
                     show_error_dialog("ai_client_error_title",
                                       "ai_client_error_message",
-                                      parent=overlay,
                                       e=str(e))
         else:
             client = None; chat = None
@@ -411,6 +637,8 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
         changed_parts = []
         if old_chat_length_global != MAX_HISTORY:
              changed_parts.append(lm_main.get_string("chat_length_label").replace(":", ""))
+        if old_chat_token_budget != CHAT_TOKEN_BUDGET:
+             changed_parts.append(lm_main.get_string("chat_token_budget_label").replace(":", "").strip())
         if old_open_links_global != OPEN_LINKS_AUTOMATICALLY:
              changed_parts.append(lm_main.get_string("open_links_label").replace(":", ""))
 
@@ -428,61 +656,262 @@ def update_globals_from_settings(loaded_settings, initial_load=False):
 
 
 def set_overlay_mode_safe(mode):
-    if overlay and overlay.winfo_exists():
-        overlay.after(0, lambda: overlay.set_mode(mode))
+    if overlay:
+        ui_dispatcher.post(overlay.set_mode, mode, key="overlay_mode") # Only the latest mode matters
 
 
-def speak_action():
-    set_overlay_mode_safe('speaking')
+def play_audio(audio_bytes):
+    """Plays in-memory mp3 audio. Returns False if playback was interrupted."""
+    playback_state["active"] = True
     try:
-        if not pygame.mixer.get_init():
-            print("Pygame mixer not initialized. Cannot play audio.")
-            set_overlay_mode_safe('listening' if not main_loop_stop_event.is_set() else None)
-            return
-
-        temp_audio_file = get_app_data_path("tts_playback_temp.mp3") # Use helper
-        source_audio_file = get_app_data_path("reply.mp3") # Use helper
-
-        if not os.path.exists(source_audio_file):
-            print(f"No {source_audio_file} found for playback.")
-            set_overlay_mode_safe('listening' if not main_loop_stop_event.is_set() else None)
-            return
+        return play_audio_bytes(audio_bytes, speech_stop_event, main_loop_stop_event)
+    finally:
+        playback_state["active"] = False
+        playback_state["last_end"] = time.monotonic()
 
-        if pygame.mixer.music.get_busy(): pygame.mixer.music.stop()
-        pygame.mixer.music.unload();
-        time.sleep(0.05) # Give a moment for unload
 
-        if os.path.exists(temp_audio_file):
-            try:
-                os.remove(temp_audio_file)
-            except Exception as e:
-                print(f"Could not remove old temp file {temp_audio_file}: {e}")
-        try:
-            os.rename(source_audio_file, temp_audio_file)
-        except Exception as e:
-            print(f"Could not rename {source_audio_file} to {temp_audio_file}: {e}. Skipping playback.")
-            set_overlay_mode_safe('listening' if not main_loop_stop_event.is_set() else None)
-            return
-
-        pygame.mixer.music.load(temp_audio_file)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy() and not speech_stop_event.is_set() and not main_loop_stop_event.is_set():
-            time.sleep(0.05)
-        if pygame.mixer.music.get_busy(): pygame.mixer.music.stop() # Stop if event was set
-        pygame.mixer.music.unload(); time.sleep(0.1) # Unload and pause
-        if os.path.exists(temp_audio_file): # Remove after unload
-            try: os.remove(temp_audio_file)
-            except Exception as e_rem: print(f"Error removing temp playback file {temp_audio_file}: {e_rem}")
+def speak_action(audio_bytes):
+    set_overlay_mode_safe('speaking')
+    assistant_speaking.set()
+    try:
+        if audio_bytes:
+            play_audio(audio_bytes)
+        else:
+            print("No TTS audio available for playback.")
     except pygame.error as e:
         print(f"Pygame error during playback: {e}")
     except Exception as e:
         print(f"Error during speak_action: {e}")
     finally:
+        assistant_speaking.clear()
         speech_stop_event.clear()
         set_overlay_mode_safe('listening' if not main_loop_stop_event.is_set() else None)
 
 
+def remove_urls_for_speech(text):
+    if not OPEN_LINKS_AUTOMATICALLY:
+        return text
+    return re.sub(URL_PATTERN, '', text).strip()
+
+
+def open_link_in_reply(reply_text):
+    """Opens the first link of a reply if allowed. Returns the text to speak instead of the reply, if any."""
+    match = re.search(URL_PATTERN, reply_text)
+    if not match:
+        return None
+    url = match.group(0)
+    if not OPEN_LINKS_AUTOMATICALLY:
+        print(f"Link found (not opened): {url}")
+        return None
+    if not url.startswith("http"): url = "https://" + url # Ensure scheme for webbrowser
+    print(f"Opening link: {url}")
+    try:
+        webbrowser.open(url)
+    except Exception as e:
+        print(f"Failed to open link {url}: {e}")
+        return lm_main.get_string("failed_to_open_link_speech", default_text="Failed to open link.")
+    if not remove_urls_for_speech(reply_text):
+        return lm_main.get_string("link_opened_speech")
+    return None
+
+
+def _synthesize_reply_sentence(text, index):
+    return async_service.run(generate_speech(text)) or None
+
+
+def _on_reply_playback_start():
+    assistant_speaking.set()
+    set_overlay_mode_safe('speaking')
+
+
+def stream_and_speak_reply(command):
+    """
+    Streams the reply from Gemini and speaks it sentence by sentence while the rest is still being
+    generated. Synthesis and playback run on the SpeechPipeline worker threads, so the first sentence
+    is audible while later ones are synthesized. Returns the full reply text.
+    """
+    splitter = SentenceSplitter()
+    pipeline = SpeechPipeline(synthesize=_synthesize_reply_sentence,
+                              play=play_audio,
+                              on_playback_start=_on_reply_playback_start).start()
+    reply_parts = []
+    try:
+        for chunk in chat.send_message_stream(command):
+            if pipeline.cancelled.is_set():
+                break # Interrupted (e.g. by a stop word), no need to read the rest
+            chunk_text = chunk.text or ""
+            if not chunk_text:
+                continue
+            reply_parts.append(chunk_text)
+            for sentence in splitter.feed(chunk_text):
+                pipeline.add_sentence(remove_urls_for_speech(sentence))
+        remainder = splitter.flush()
+        if remainder:
+            pipeline.add_sentence(remove_urls_for_speech(remainder))
+    finally:
+        pipeline.finish()
+        pipeline.wait()
+        assistant_speaking.clear()
+        if pipeline.playback_started.is_set():
+            speech_stop_event.clear()
+
+    reply_text = "".join(reply_parts)
+    print(f"Response: {reply_text}")
+    link_speech = open_link_in_reply(reply_text)
+    if link_speech and not pipeline.cancelled.is_set():
+        speak_phrase(link_speech)
+    else:
+        set_overlay_mode_safe('listening' if not main_loop_stop_event.is_set() else None)
+    return reply_text
+
+
+def run_wake_word_enrollment():
+    """Records the active activation word a few times and stores it as offline wake word templates."""
+    word = CodeWord
+    print(f"Starting offline wake word enrollment for '{word}'...")
+    speak_phrase(lm_main.get_string("wake_word_enrollment_intro_speech", word=word))
+    recordings = []
+    for attempt in range(WAKE_WORD_ENROLLMENT_SAMPLES):
+        if main_loop_stop_event.is_set(): return
+        if pygame.mixer.get_init():
+            try: play_audio_file_blocking(resource_path("sounds/listening.mp3"))
+            except pygame.error as e: print(f"Sound error: {e}")
+        set_overlay_mode_safe('listening')
+        try:
+            audio = mic_stream.listen(recognizer, timeout=5, phrase_time_limit=3, should_stop=main_loop_stop_event.is_set)
+            if audio is None: return
+            recordings.append(audio)
+            print(f"Wake word sample {attempt + 1}/{WAKE_WORD_ENROLLMENT_SAMPLES} recorded.")
+        except sr.WaitTimeoutError:
+            print(f"No speech for wake word sample {attempt + 1}/{WAKE_WORD_ENROLLMENT_SAMPLES}.")
+        except Exception as e:
+            print(f"Error recording wake word sample: {e}")
+            break
+    set_overlay_mode_safe(None)
+    if keyword_spotter and keyword_spotter.enroll(word, recordings):
+        speak_phrase(lm_main.get_string("wake_word_enrollment_done_speech"))
+    else:
+        speak_phrase(lm_main.get_string("wake_word_enrollment_failed_speech"))
+
+
+def play_audio_file_blocking(path):
+    pygame.mixer.music.load(path); pygame.mixer.music.play()
+    while pygame.mixer.music.get_busy() and not main_loop_stop_event.is_set():
+        main_loop_stop_event.wait(0.02)
+
+
+def audio_pipeline_stats():
+    return {"utterances": utterance_queue.stats(), "transcripts": transcript_queue.stats()}
+
+
+def is_stop_command(text):
+    return stop_word_matcher.search(text) is not None
+
+
+def monitor_turn_for_speech(stream):
+    """
+    Follows the microphone stream chunk by chunk while a turn is being handled. If the user talks
+    over the assistant, playback is stopped right away (barge-in) and the speech, including a short
+    pre-roll, is returned as AudioData for the next turn. Returns None once the turn is over.
+    """
+    position = stream.current_position()
+    was_speaking = None
+    while dispatch_busy.is_set() and not main_loop_stop_event.is_set():
+        if assistant_speaking.is_set() != was_speaking:
+            was_speaking = assistant_speaking.is_set()
+            barge_in_detector.reset() # Re-measure the baseline, the echo level changes with playback
+        chunk, next_position = stream.read_chunk(position)
+        if chunk is None: continue
+        if barge_in_detector.process(pcm_to_float(chunk, stream.sample_width), stream.sample_rate):
+            if was_speaking:
+                print("Barge-in: user started speaking, stopping playback.")
+                speech_stop_event.set()
+            phrase_start = max(position - stream.seconds_to_bytes(BARGE_IN_PRE_ROLL), stream.ring.oldest_position())
+            end, _ = stream.follow_phrase(recognizer, next_position, phrase_start, BARGE_IN_PHRASE_TIME_LIMIT,
+                                          main_loop_stop_event.is_set)
+            return stream.audio_data(phrase_start, end)
+        position = next_position
+    return None
+
+
+def capture_worker():
+    """Capture stage: keeps listening and queues every utterance, also while a reply is being processed."""
+    while not main_loop_stop_event.is_set():
+        stream = mic_stream
+        if capture_paused.is_set() or not stream or not noise_calibrator.is_ready():
+            main_loop_stop_event.wait(0.2); continue # A device seen for the first time is still being calibrated
+
+        conversation_mode = conversation_active.is_set()
+        monitoring_turn = BARGE_IN_ENABLED and conversation_mode and dispatch_busy.is_set()
+        if not dispatch_busy.is_set():
+            print("Waiting for voice input..." if not conversation_mode else f"Listening (lang: {STT_LANGUAGE})...")
+        if startup_profiler.enabled:
+            startup_profiler.mark("listening_ready")
+            startup_profiler.finish(get_app_data_path(STARTUP_PROFILE_FILE))
+        try:
+            if monitoring_turn:
+                audio = monitor_turn_for_speech(stream)
+            else:
+                audio = stream.listen(recognizer, timeout=2, phrase_time_limit=7,
+                                      should_stop=lambda: main_loop_stop_event.is_set() or capture_paused.is_set())
+            if audio is None: continue
+        except sr.WaitTimeoutError:
+            continue
+        except Exception as e: # Other mic errors (e.g. OSError if device disconnected)
+            print(f"Error with microphone: {e}")
+            if not stream.is_alive() and not audio_devices_change_requested.is_set():
+                device_registry.refresh_now(notify=True) # Reopens the stream, on the default device if it was unplugged
+            main_loop_stop_event.wait(1); continue
+        if main_loop_stop_event.is_set(): break
+
+        phrase_duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        phrase_start = time.monotonic() - phrase_duration + recognizer.non_speaking_duration
+        during_playback = not monitoring_turn and (playback_state["active"] or playback_state["last_end"] > phrase_start)
+
+        if not conversation_mode and LOCAL_VAD_ENABLED and not voice_activity_detector.contains_speech(audio):
+            if voice_activity_detector.suppressed % 10 == 1:
+                print(f"No speech detected locally, skipping STT ({voice_activity_detector.suppressed} request(s) suppressed so far).")
+            continue
+
+        if not conversation_mode and OFFLINE_WAKE_WORD_ENABLED and keyword_spotter.is_enrolled() \
+                and not keyword_spotter.matches(audio):
+            continue # Activation word not heard, no need to ask cloud STT
+
+        # Copy out of the ring buffer once, queued audio may wait longer than the ring takes to wrap
+        utterance_queue.put((sr.AudioData(bytes(audio.frame_data), audio.sample_rate, audio.sample_width), during_playback))
+
+
+def stt_worker():
+    """STT stage: transcribes queued utterances and hands the text to the dispatcher."""
+    while not main_loop_stop_event.is_set():
+        queued = utterance_queue.get(timeout=0.5)
+        if queued is None: continue
+        audio, during_playback = queued
+        try:
+            text = recognizer.recognize_google(audio, language=STT_LANGUAGE) # STT_LANGUAGE is now agent-aware
+        except sr.UnknownValueError:
+            if conversation_active.is_set() and not during_playback: print("Could not understand.")
+            continue
+        except sr.RequestError as e:
+            transcript_queue.put((None, e), block_timeout=TRANSCRIPT_QUEUE_BLOCK_TIMEOUT)
+            continue
+        except Exception as e:
+            print(f"Error during speech recognition: {e}")
+            continue
+        print(f"Recognized (lang: {STT_LANGUAGE}): {text}")
+
+        stop_requested = conversation_active.is_set() and is_stop_command(text)
+        if stop_requested and dispatch_busy.is_set():
+            print("Stop word heard while a reply is in progress, interrupting playback.")
+            speech_stop_event.set()
+        elif during_playback and not stop_requested:
+            print("Ignoring input captured during playback (probably the assistant's own voice).")
+            continue
+        transcript_queue.put((text, None), block_timeout=TRANSCRIPT_QUEUE_BLOCK_TIMEOUT)
+
+
 def main_loop_logic():
+    """Dispatch stage: starts the capture and STT workers and handles recognized text one turn at a time."""
     global chat, CodeWord, StopWords, client, OPEN_LINKS_AUTOMATICALLY, STT_LANGUAGE, lm_main, mic, recognizer
 
     if not client or not chat:
@@ -497,54 +926,58 @@ def main_loop_logic():
     except pygame.error as e:
         print(f"Could not play start sound: {e}")
 
-    listening_mode = False
+    workers = [Thread(target=capture_worker, name="AudioCapture", daemon=True),
+               Thread(target=stt_worker, name="SpeechToText", daemon=True)]
+    for worker in workers: worker.start()
+
+    conversation_active.clear()
     while not main_loop_stop_event.is_set():
+        if audio_devices_change_requested.is_set() and audio_output_idle():
+            apply_audio_device_change()
+
         if not client or not chat:
             if not main_loop_stop_event.is_set(): print("AI Client not ready. Waiting...")
-            set_overlay_mode_safe(None); time.sleep(5); continue
-
-        if not mic: # Check if mic is available
-            if not main_loop_stop_event.is_set(): print("Microphone not available. Waiting...")
-            set_overlay_mode_safe(None); time.sleep(5); continue
+            set_overlay_mode_safe(None); main_loop_stop_event.wait(5); continue
 
-        set_overlay_mode_safe('listening' if listening_mode else None)
-        if client and chat: # Redundant check, but safe
-            print("Waiting for voice input..." if not listening_mode else f"Listening (lang: {STT_LANGUAGE})...")
-
-        try:
-            with mic as source: # Use the global mic object
-                audio = recognizer.listen(source, timeout=2, phrase_time_limit=7)
-        except sr.WaitTimeoutError:
+        if wake_word_enrollment_requested.is_set():
+            wake_word_enrollment_requested.clear()
+            capture_paused.set()
+            try:
+                utterance_queue.clear(); transcript_queue.clear()
+                run_wake_word_enrollment()
+            finally:
+                capture_paused.clear()
+            conversation_active.clear()
             continue
-        except AttributeError: # This can happen if mic is None
-            print("Microphone object is None. Cannot listen.")
-            time.sleep(2); continue
-        except Exception as e: # Other mic errors (e.g. OSError if device disconnected)
-            print(f"Error with microphone: {e}"); time.sleep(1); continue
-        if main_loop_stop_event.is_set(): break
 
-        try:
-            text = recognizer.recognize_google(audio, language=STT_LANGUAGE) # STT_LANGUAGE is now agent-aware
-            print(f"Recognized (lang: {STT_LANGUAGE}): {text}")
-            text_lower = text.lower()
+        queued = transcript_queue.get(timeout=0.5)
+        if queued is None: continue
+        text, stt_error = queued
 
-            if not listening_mode:
-                if CodeWord.lower() in text_lower: # CodeWord is now agent-aware
-                    listening_mode = True
-                    command = text_lower.split(CodeWord.lower(), 1)[-1].strip()
+        dispatch_busy.set()
+        try:
+            if stt_error:
+                raise stt_error
+
+            if not conversation_active.is_set():
+                activation_match = activation_word_matcher.search(text) # CodeWord is now agent-aware
+                if activation_match:
+                    conversation_active.set()
+                    if activation_match.fuzzy: print(f"Activation word matched loosely: '{text[activation_match.start:activation_match.end]}'")
+                    command = text[activation_match.end:].strip(" ,.!?")
                     if not command: # Only activation word spoken
                         print("Activated. Waiting for command...")
                         if pygame.mixer.get_init():
                             try: pygame.mixer.music.load(resource_path("sounds/listening.mp3")); pygame.mixer.music.play()
                             except pygame.error as e: print(f"Sound error: {e}")
-                        asyncio.run(generate_mp3(lm_main.get_string("activation_confirmation_speech")))
-                        speak_action(); continue
+                        speak_phrase(lm_main.get_string("activation_confirmation_speech"))
+                        continue
                 else: # Not activation word
                     continue
-            else: # Already listening_mode
-                is_stop_command = any(re.search(r"\b" + re.escape(sw.lower()) + r"\b", text_lower) for sw in StopWords)
-                if is_stop_command:
-                    listening_mode = False; print("Mode deactivated (by stopword).")
+            else: # Already in listening mode
+                if is_stop_command(text):
+                    conversation_active.clear(); print("Mode deactivated (by stopword).")
+                    speech_stop_event.clear()
                     set_overlay_mode_safe(None)
                     if pygame.mixer.get_init():
                         try: pygame.mixer.music.load(resource_path("sounds/deactivated.mp3")); pygame.mixer.music.play()
@@ -556,42 +989,26 @@ def main_loop_logic():
             if not command: print("No usable command."); continue
             print(f"Command recognized: {command}")
 
+            if STREAM_RESPONSES:
+                stream_and_speak_reply(command)
+                continue
+
             response = chat.send_message(command)
             print(f"Response: {response.text}")
-            response_text_for_tts = response.text
-
-            url_pattern = r'(https?://[^\s]+|www\.[^\s]+)' # Basic URL regex
-            match = re.search(url_pattern, response.text)
-            if match:
-                url = match.group(0)
-                if OPEN_LINKS_AUTOMATICALLY:
-                    if not url.startswith("http"): url = "https://" + url # Ensure scheme for webbrowser
-                    print(f"Opening link: {url}")
-                    try:
-                        webbrowser.open(url)
-                        response_text_for_tts = re.sub(url_pattern, '', response.text).strip() # Remove URL for TTS
-                        if not response_text_for_tts: response_text_for_tts = lm_main.get_string("link_opened_speech")
-                    except Exception as e:
-                        print(f"Failed to open link {url}: {e}")
-                        response_text_for_tts = lm_main.get_string("failed_to_open_link_speech", default_text="Failed to open link.")
-                        asyncio.run(generate_mp3(response_text_for_tts)); speak_action(); continue
-                else: # Not opening automatically
-                    print(f"Link found (not opened): {url}")
+            response_text_for_tts = remove_urls_for_speech(response.text)
+            link_speech = open_link_in_reply(response.text)
+            if link_speech:
+                response_text_for_tts = link_speech
 
             if response_text_for_tts:
-
-                await_task = asyncio.run(generate_mp3(response_text_for_tts))
-                speak_action()
-            elif listening_mode and not main_loop_stop_event.is_set():
+                speak_action(async_service.run(generate_speech(response_text_for_tts)))
+            elif conversation_active.is_set() and not main_loop_stop_event.is_set():
                 set_overlay_mode_safe('listening')
-            chat = trim_chat_history(chat)
 
-        except sr.UnknownValueError:
-            if listening_mode: print("Could not understand.")
         except sr.RequestError as e:
             print(f"Speech recognition error: {e}")
-            asyncio.run(generate_mp3(lm_main.get_string("speech_recognition_problem_speech"))); speak_action()
-        except ClientError as e:
+            speak_phrase(lm_main.get_string("speech_recognition_problem_speech"))
+        except genai_errors.ClientError as e:
             print(f"Google AI ClientError: {e}")
             is_api_key_invalid = False
             if hasattr(e, 'response_json') and e.response_json and 'error' in e.response_json and 'details' in e.response_json['error']:
@@ -601,70 +1018,85 @@ def main_loop_logic():
                 show_error_dialog("api_key_invalid_error_title", "api_key_invalid_error_message")
             else:
                 show_error_dialog("ai_client_error_title", "ai_client_error_message_generic")
-                asyncio.run(generate_mp3(lm_main.get_string("ai_client_error_message_generic")));
-                speak_action()
+                speak_phrase(lm_main.get_string("ai_client_error_message_generic"))
             time.sleep(3)
-        except StopCandidateException as e:
+        except legacy_genai_types.StopCandidateException as e:
             print(f"Response from AI stopped: {e}")
-            asyncio.run(generate_mp3(lm_main.get_string("response_blocked_speech"))); speak_action()
+            speak_phrase(lm_main.get_string("response_blocked_speech"))
         except Exception as e:
             print(f"An unexpected error occurred in the main loop: {e}")
             import traceback; traceback.print_exc()
-            asyncio.run(generate_mp3(lm_main.get_string("unexpected_error_speech"))); speak_action()
+            speak_phrase(lm_main.get_string("unexpected_error_speech"))
             time.sleep(3)
+        finally:
+            dispatch_busy.clear()
+            if not main_loop_stop_event.is_set() and transcript_queue.depth() == 0:
+                set_overlay_mode_safe('listening' if conversation_active.is_set() else None)
         if main_loop_stop_event.is_set(): break
+
+    for worker in workers: worker.join(timeout=3)
     print("Main loop finished.")
     set_overlay_mode_safe(None)
 
 
-async def generate_mp3(text):
-    global TTS_VOICE, lm_main # TTS_VOICE is now the effective one for the active agent
+def sanitize_tts_text(text):
     if not text or not text.strip():
-        text_sanitized = lm_main.get_string("default_tts_okay")
-    else:
-        text_sanitized = re.sub(r'[<>:"/\\|?*]', '', text).replace('\n', ' ').replace('\r', '')
-        if not text_sanitized.strip():
-            text_sanitized = lm_main.get_string("default_tts_understood")
+        return lm_main.get_string("default_tts_okay")
+    text_sanitized = re.sub(r'[<>:"/\\|?*]', '', text).replace('\n', ' ').replace('\r', '')
+    if not text_sanitized.strip():
+        return lm_main.get_string("default_tts_understood")
+    return text_sanitized
+
+
+async def generate_speech(text, cacheable=False):
+    global TTS_VOICE, lm_main # TTS_VOICE is now the effective one for the active agent
+    text_sanitized = sanitize_tts_text(text)
 
     if not pygame.mixer.get_init():
         print("TTS generated, but Pygame mixer not initialized. Playback might fail.")
 
-    communicate = Communicate(text=text_sanitized, voice=TTS_VOICE)
-    output_file = get_app_data_path("reply.mp3") # Use helper for consistent path
+    voice = TTS_VOICE
+    if cacheable and phrase_cache:
+        cached_audio = await asyncio.to_thread(phrase_cache.get, voice, text_sanitized) # Keeps disk reads off the event loop
+        if cached_audio:
+            return cached_audio
 
-    for attempt in range(5):
-        try:
-            if os.path.exists(output_file):
-                if pygame.mixer.get_init() and pygame.mixer.music.get_busy(): pygame.mixer.music.stop()
-                if pygame.mixer.get_init(): pygame.mixer.music.unload()
-                time.sleep(0.1); os.remove(output_file)
-            break
-        except OSError as e:
-            print(f"{output_file} in use, attempt {attempt+1}/5... {e}"); await asyncio.sleep(0.5)
-        except Exception as e:
-            print(f"Error pre-save cleanup {output_file}, attempt {attempt+1}/5... {e}"); await asyncio.sleep(0.5)
-    else:
-        print(f"Could not delete {output_file}. Skipping TTS."); return
     try:
-        await communicate.save(output_file); print(f"TTS saved to {output_file}")
+        audio_bytes = await synthesize_speech(text_sanitized, voice)
     except Exception as e:
-        print(f"Error saving {output_file}: {e}")
+        print(f"Error generating TTS audio: {e}")
+        return b""
+    if cacheable and phrase_cache and audio_bytes:
+        await asyncio.to_thread(phrase_cache.put, voice, text_sanitized, audio_bytes)
+    return audio_bytes
 
 
-def trim_chat_history(current_chat_session):
-    global MAX_HISTORY, client, chat_config # MAX_HISTORY is now the effective one
-    if not current_chat_session or not client or not chat_config: return current_chat_session
-    try:
-        history = current_chat_session.get_history()
-        required_history_length = MAX_HISTORY * 2
-        if len(history) > required_history_length:
-            trimmed_history = history[-required_history_length:]
-            new_chat_session = client.chats.create(model="gemini-1.5-flash", config=chat_config, history=trimmed_history)
-            print(f"Chat history trimmed. Old: {len(history)}, New: {len(trimmed_history)}")
-            return new_chat_session
-    except Exception as e:
-        print(f"Error trimming chat history: {e}")
-    return current_chat_session
+def start_phrase_cache_prewarm():
+    """Synthesizes all fixed phrases for the effective voice in the background, without touching the main loop."""
+    global _prewarm_generation
+    if not phrase_cache:
+        return
+    _prewarm_generation += 1
+    generation, voice = _prewarm_generation, TTS_VOICE
+    phrases = [sanitize_tts_text(lm_main.get_string(key)) for key in SPOKEN_PHRASE_KEYS]
+
+    def _on_prewarm_done(future):
+        if future.cancelled():
+            return
+        if future.exception():
+            print(f"Error pre-warming TTS phrase cache: {future.exception()}")
+        else:
+            print(f"TTS phrase cache pre-warmed for {voice}: {future.result()} new phrase(s).")
+
+    async_service.submit(prewarm_phrases(phrase_cache, voice, phrases,
+                                         max_concurrency=PREWARM_MAX_CONCURRENCY,
+                                         should_continue=lambda: generation == _prewarm_generation)
+                         ).add_done_callback(_on_prewarm_done)
+
+
+def speak_phrase(text):
+    """Speaks one of the fixed phrases from the language files, served from the phrase cache when possible."""
+    speak_action(async_service.run(generate_speech(text, cacheable=True)))
 
 
 def create_image(width, height, color1, color2):
@@ -710,12 +1142,90 @@ def on_settings_clicked(icon_instance, item_instance):
         show_error_dialog("error_title", "overlay_not_available_error")
         return
 
+    global _settings_window_open
     settings_top_level = tk.Toplevel(overlay)
-    _settings_app_instance = ModernSettingsApp(settings_top_level, lm=lm_main)
-    overlay.wait_window(settings_top_level)
-    print("Settings window closed. Reloading and applying configuration.")
-    newly_loaded_settings = app_load_settings()
-    update_globals_from_settings(newly_loaded_settings)
+    _settings_window_open = True
+    try:
+        _settings_app_instance = settings_ui.ModernSettingsApp(settings_top_level, lm=lm_main)
+        overlay.wait_window(settings_top_level)
+    finally:
+        _settings_window_open = False
+    if _config_apply_pending:
+        print("Settings window closed. Applying configuration changes.")
+        apply_config_changes()
+    else:
+        print("Settings window closed. No configuration changes.")
+
+
+def on_config_changed(change):
+    """
+    Config store subscriber for settings.json and sysprompts.json. Changes made while the settings
+    window is open are applied once it closes, otherwise right away on the Tk thread.
+    """
+    global _config_apply_pending
+    print(f"Configuration changed: {change.name} ({', '.join(sorted(change.changed_keys))})")
+    if _config_apply_pending:
+        return
+    _config_apply_pending = True
+    if _settings_window_open:
+        return
+    if overlay:
+        ui_dispatcher.post(apply_config_changes, key="apply_config_changes")
+    else:
+        apply_config_changes()
+
+
+def apply_config_changes():
+    global _config_apply_pending
+    if not _config_apply_pending or not startup_complete.is_set():
+        return # Still pending, complete_startup applies it after the first update_globals_from_settings
+    _config_apply_pending = False
+    update_globals_from_settings(app_load_settings()) # In-memory snapshot, only changed parts are re-initialized
+
+
+def on_enroll_wake_word_clicked(icon_instance, item_instance):
+    print("Offline wake word enrollment requested. It starts after the current turn.")
+    wake_word_enrollment_requested.set()
+
+
+def complete_startup():
+    """Everything that used to run before the tray appeared: SDK imports, audio devices and the AI client."""
+    device_registry.subscribe(on_audio_devices_changed)
+    with startup_profiler.phase("audio_device_enumeration"):
+        device_registry.start().wait_until_enumerated() # Not on the Tk thread; the configured mic must be in the list
+    with startup_profiler.phase("update_globals_from_settings"):
+        update_globals_from_settings(current_app_settings, initial_load=True)
+    startup_complete.set()
+    if _config_apply_pending: # Settings changed while starting up
+        ui_dispatcher.post(apply_config_changes, key="apply_config_changes")
+    try:
+        if pygame.mixer.get_init():
+            pygame.mixer.music.load(resource_path("sounds/start.mp3")); pygame.mixer.music.play()
+    except pygame.error as e:
+        print(f"Could not play start sound: {e}")
+
+
+def run_main_loop_after_startup():
+    """Main loop thread target with fast_startup: finishes startup off the Tk thread, then starts listening."""
+    complete_startup()
+    if not main_loop_stop_event.is_set():
+        main_loop_logic()
+
+
+def on_tray_ready(icon_instance):
+    icon_instance.visible = True
+    startup_profiler.mark("tray_visible")
+    print("Tray icon visible.")
+    timing_file = os.getenv(STARTUP_TIMING_ENV)
+    if timing_file: # Set by startup_timing.py, which measures cold start and expects the app to exit again
+        with open(timing_file, "w", encoding="utf-8") as f:
+            json.dump({"tray_visible": time.time()}, f)
+        ui_dispatcher.post(on_exit_clicked, None, None)
+
+
+def show_api_key_warning():
+    messagebox.showwarning(lm_main.get_string("api_key_not_configured_warning_title"),
+                           lm_main.get_string("api_key_not_configured_warning_message"), parent=overlay)
 
 
 def on_exit_clicked(icon_instance, item_instance):
@@ -729,7 +1239,7 @@ def on_exit_clicked(icon_instance, item_instance):
 
     if overlay and overlay.winfo_exists():
         print("Sending quit request to Overlay (Tkinter mainloop)...")
-        overlay.after(100, overlay.quit)
+        ui_dispatcher.post(overlay.quit)
     elif overlay:
         print("Overlay window already destroyed.")
     else:
@@ -740,7 +1250,25 @@ def on_exit_clicked(icon_instance, item_instance):
         main_loop_thread.join(timeout=5)
         if main_loop_thread.is_alive(): print("Warning: Main loop thread did not terminate cleanly.")
 
+    device_registry.stop()
+    close_mic_stream()
+    stop_config_watcher()
+    startup_profiler.finish(get_app_data_path(STARTUP_PROFILE_FILE)) # Startup never got to listening
     if pygame.mixer.get_init(): pygame.mixer.quit(); print("Pygame Mixer quit.")
+    if phrase_cache: print(f"TTS phrase cache stats: {phrase_cache.stats()}")
+    print(f"Async service stats: {async_service.stats()}")
+    print(f"Local VAD stats: {voice_activity_detector.stats()}")
+    if keyword_spotter: print(f"Offline wake word stats: {keyword_spotter.stats()}")
+    print(f"Audio pipeline stats: {audio_pipeline_stats()}")
+    print(f"Barge-in stats: {barge_in_detector.stats()}")
+    if noise_calibrator: print(f"Noise calibration stats: {noise_calibrator.stats()}")
+    print(f"Audio device registry stats: {device_registry.stats()}")
+    if overlay: print(f"Overlay animation stats: {overlay.frame_governor.stats()}")
+    if chat: print(f"Chat history stats: {chat.stats()}")
+    if activation_word_matcher: print(f"Activation word matcher stats: {activation_word_matcher.stats()}")
+    print(f"Config store stats: {config_store.stats()}")
+    print(f"UI dispatcher stats: {ui_dispatcher.stats()}")
+    async_service.stop()
     print("Application exit sequence complete.")
 
 
@@ -748,67 +1276,75 @@ def on_exit_clicked(icon_instance, item_instance):
 
 if __name__ == "__main__":
     print("Manfred AI starting up...")
+    startup_profiler.mark("main_block_started")
 
 
 
 
-    _lock_file_path = get_app_data_path("manfred_ai.lock")
-    try:
-        _lock_file_descriptor = os.open(_lock_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    with startup_profiler.phase("lock_acquisition"):
+        _lock_file_path = get_app_data_path("manfred_ai.lock")
         try:
-            os.write(_lock_file_descriptor, str(os.getpid()).encode())
+            _lock_file_descriptor = os.open(_lock_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            try:
+                os.write(_lock_file_descriptor, str(os.getpid()).encode())
+            except OSError as e:
+                print(f"Warning: Could not write PID to lock file: {e}")
+            atexit.register(cleanup_lock_file)
+            print(f"Application instance lock acquired with file: {_lock_file_path}, PID: {os.getpid()}")
+        except FileExistsError:
+            print(f"Lock file '{_lock_file_path}' already exists. Another instance may be running.")
+            if lm_main: # lm_main sollte hier verfügbar sein
+                messagebox.showerror(
+                    lm_main.get_string("application_already_running_title"),
+                    lm_main.get_string("application_already_running_message")
+                )
+            else: # Fallback, falls lm_main aus irgendeinem Grund nicht initialisiert ist
+                messagebox.showerror("Application Already Running", "Another instance of Manfred AI is already running.")
+            sys.exit(1)
         except OSError as e:
-            print(f"Warning: Could not write PID to lock file: {e}")
-        atexit.register(cleanup_lock_file)
-        print(f"Application instance lock acquired with file: {_lock_file_path}, PID: {os.getpid()}")
-    except FileExistsError:
-        print(f"Lock file '{_lock_file_path}' already exists. Another instance may be running.")
-        if lm_main: # lm_main sollte hier verfügbar sein
-            messagebox.showerror(
-                lm_main.get_string("application_already_running_title"),
-                lm_main.get_string("application_already_running_message")
-            )
-        else: # Fallback, falls lm_main aus irgendeinem Grund nicht initialisiert ist
-            messagebox.showerror("Application Already Running", "Another instance of Manfred AI is already running.")
-        sys.exit(1)
-    except OSError as e:
-        print(f"Critical error creating lock file '{_lock_file_path}': {e}. Cannot ensure single instance. Exiting.")
-        if lm_main:
-            messagebox.showerror(
-                lm_main.get_string("lock_file_critical_error_title"),
-                lm_main.get_string("lock_file_critical_error_message", e=str(e))
-            )
-        else:
-            messagebox.showerror("Critical Startup Error", f"Could not create a lock file: {e}\nThe application cannot start.")
-        sys.exit(1)
-
-    update_globals_from_settings(current_app_settings, initial_load=True)
-
-    if not API_KEY or API_KEY == app_default_settings["api_key"] and not os.getenv("GEMINI_API_KEY"):
-        if lm_main:
-             messagebox.showwarning(lm_main.get_string("api_key_not_configured_warning_title"),
-                                   lm_main.get_string("api_key_not_configured_warning_message"))
-        else:
-            messagebox.showwarning("API Key Warning", "API key is not configured. Please set it in the settings.")
+            print(f"Critical error creating lock file '{_lock_file_path}': {e}. Cannot ensure single instance. Exiting.")
+            if lm_main:
+                messagebox.showerror(
+                    lm_main.get_string("lock_file_critical_error_title"),
+                    lm_main.get_string("lock_file_critical_error_message", e=str(e))
+                )
+            else:
+                messagebox.showerror("Critical Startup Error", f"Could not create a lock file: {e}\nThe application cannot start.")
+            sys.exit(1)
+
+    FAST_STARTUP = current_app_settings.get("fast_startup", app_default_settings["fast_startup"])
+    OVERLAY_SPRITE_ANIMATION = current_app_settings.get("overlay_sprite_animation",
+                                                        app_default_settings["overlay_sprite_animation"])
+    API_KEY = os.getenv("GEMINI_API_KEY") or current_app_settings.get("api_key", app_default_settings["api_key"])
+    if FAST_STARTUP:
+        warm_up(STARTUP_WARM_UP_MODULES) # Imports in parallel with the tray, audio devices and AI client setup
+    else:
+        complete_startup()
 
-    overlay = ModernOverlay(speech_stop_event)
+    with startup_profiler.phase("overlay_construction"):
+        overlay = ModernOverlay(speech_stop_event, sprite_animation=OVERLAY_SPRITE_ANIMATION)
+    ui_dispatcher.attach(overlay) # Worker threads post UI work, the Tk thread runs it
     tray_icon_image = get_icon_image()
     menu_items = (
         item(lambda text: lm_main.get_string("tray_settings", default_text="Settings"), on_settings_clicked),
         item(lambda text: lm_main.get_string("tray_console", default_text="Console"),
              lambda: show_console_window_external(overlay, lm_main)),
+        item(lambda text: lm_main.get_string("tray_enroll_wake_word", default_text="Record Activation Word"),
+             on_enroll_wake_word_clicked),
         item(lambda text: lm_main.get_string("tray_exit", default_text="Exit"), on_exit_clicked)
     )
     tray_icon = icon("ManfredAI", tray_icon_image, "Manfred AI", menu_items)
 
     main_loop_stop_event.clear(); speech_stop_event.clear()
-    main_loop_thread = Thread(target=main_loop_logic, daemon=True); main_loop_thread.start()
+    main_loop_thread = Thread(target=run_main_loop_after_startup if FAST_STARTUP else main_loop_logic, daemon=True)
+    main_loop_thread.start()
     print("Main loop thread started.")
 
-    tray_thread = Thread(target=tray_icon.run, daemon=True); tray_thread.start()
+    tray_thread = Thread(target=lambda: tray_icon.run(setup=on_tray_ready), daemon=True); tray_thread.start()
+    startup_profiler.mark("tray_thread_started")
     print("Manfred AI tray application started. Right-click the icon for options.")
-    pygame.mixer.music.load(resource_path("sounds/start.mp3"))
-    pygame.mixer.music.play()
+    if not API_KEY or API_KEY == app_default_settings["api_key"]:
+        ui_dispatcher.post(show_api_key_warning) # After the tray is up, so it does not hold back startup
 
     try:
         overlay.mainloop()
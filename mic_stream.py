@@ -0,0 +1,206 @@
+from threading import Thread, Event, Condition
+import numpy as np
+
+from lazy_import import lazy_module
+from vad import pcm_to_float
+
+sr = lazy_module("speech_recognition")
+
+
+DEFAULT_BUFFER_DURATION = 30.0  # Seconds of audio kept in the ring buffer
+DEFAULT_PRE_ROLL = 0.5
+READ_TIMEOUT = 1.0
+
+
+def chunk_rms(data, sample_width):
+    """RMS in raw sample units, comparable to recognizer.energy_threshold."""
+    samples = pcm_to_float(data, sample_width)
+    return float(np.sqrt(np.mean(samples * samples))) * (1 << (8 * sample_width - 1)) if len(samples) else 0.0
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size byte ring for PCM audio. Positions are absolute byte offsets since the stream
+    started, so several readers can follow the stream independently with their own cursor.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.write_position = 0
+        self._buffer = np.zeros(capacity, dtype=np.uint8)
+        self._condition = Condition()
+
+    def write(self, data):
+        chunk = np.frombuffer(data, dtype=np.uint8)[-self.capacity:]
+        with self._condition:
+            start = (self.write_position + len(data) - len(chunk)) % self.capacity
+            first_part = min(len(chunk), self.capacity - start)
+            self._buffer[start:start + first_part] = chunk[:first_part]
+            self._buffer[:len(chunk) - first_part] = chunk[first_part:]
+            self.write_position += len(data)
+            self._condition.notify_all()
+
+    def oldest_position(self):
+        with self._condition:
+            return max(0, self.write_position - self.capacity)
+
+    def wait_for(self, position, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self.write_position >= position, timeout)
+
+    def view(self, start, end):
+        """
+        Bytes [start, end) as a NumPy view into the ring, without copying. Only a slice that wraps
+        around the end of the ring is copied once. Views stay valid until the writer laps them, which
+        takes the whole buffer duration.
+        """
+        with self._condition:
+            start = max(start, self.write_position - self.capacity)
+            end = min(end, self.write_position)
+        length = max(0, end - start)
+        begin = start % self.capacity
+        if begin + length <= self.capacity:
+            return self._buffer[begin:begin + length]
+        return np.concatenate((self._buffer[begin:], self._buffer[:begin + length - self.capacity]))
+
+
+class MicrophoneStream:
+    """
+    Keeps one speech_recognition Microphone open for the whole session. A reader thread copies
+    every chunk into an AudioRingBuffer, and utterances are cut out of that buffer, including a
+    pre-roll of audio from before the speech started, so no syllables are lost between phrases.
+    """
+
+    def __init__(self, microphone, buffer_duration=DEFAULT_BUFFER_DURATION, pre_roll=DEFAULT_PRE_ROLL):
+        self.microphone = microphone
+        self.buffer_duration = buffer_duration
+        self.pre_roll = pre_roll
+        self.source = None
+        self.ring = None
+        self.sample_rate = None
+        self.sample_width = None
+        self.chunk_size = None  # In samples
+        self.chunk_bytes = None
+        self.error = None
+        self._stop_event = Event()
+        self._reader_thread = None
+
+    def start(self):
+        self.source = self.microphone.__enter__()
+        self.sample_rate = self.source.SAMPLE_RATE
+        self.sample_width = self.source.SAMPLE_WIDTH
+        self.chunk_size = self.source.CHUNK
+        self.chunk_bytes = self.chunk_size * self.sample_width
+        capacity = int(self.buffer_duration * self.sample_rate) * self.sample_width
+        self.ring = AudioRingBuffer(capacity - capacity % self.chunk_bytes)
+        self._stop_event.clear()
+        self._reader_thread = Thread(target=self._read_loop, name="MicrophoneStream", daemon=True)
+        self._reader_thread.start()
+        print(f"Microphone stream opened ({self.sample_rate} Hz, {self.buffer_duration:.0f} s ring buffer).")
+        return self
+
+    def _read_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.ring.write(self.source.stream.read(self.chunk_size))
+            except Exception as e:
+                print(f"Microphone stream read error: {e}")
+                self.error = e
+                break
+
+    def stop(self):
+        self._stop_event.set()
+        if self._reader_thread:
+            self._reader_thread.join(timeout=2)
+        if self.source:
+            try:
+                self.microphone.__exit__(None, None, None)
+            except Exception as e:
+                print(f"Error closing microphone stream: {e}")
+            self.source = None
+        print("Microphone stream closed.")
+
+    def is_alive(self):
+        return bool(self._reader_thread and self._reader_thread.is_alive())
+
+    def seconds_to_bytes(self, seconds):
+        return int(seconds * self.sample_rate) * self.sample_width
+
+    def current_position(self):
+        return self.ring.write_position
+
+    def read_chunk(self, position, timeout=READ_TIMEOUT):
+        """
+        Returns (chunk view, next position) for the chunk starting at position, or (None, position) if
+        it did not arrive within timeout. A reader that fell a full buffer behind skips ahead.
+        """
+        if position < self.ring.oldest_position():
+            position = self.ring.write_position - self.chunk_bytes
+        if not self.ring.wait_for(position + self.chunk_bytes, timeout):
+            if not self.is_alive():
+                raise OSError(f"Microphone stream stopped: {self.error}")
+            return None, position
+        return self.ring.view(position, position + self.chunk_bytes), position + self.chunk_bytes
+
+    def audio_data(self, start, end):
+        """AudioData for [start, end). frame_data is a memoryview on the ring unless the slice wraps."""
+        return sr.AudioData(memoryview(self.ring.view(start, end)), self.sample_rate, self.sample_width)
+
+    def follow_phrase(self, recognizer, position, phrase_start, phrase_time_limit=None, should_stop=None):
+        """
+        Reads on from position until the speaker pauses for recognizer.pause_threshold or the phrase
+        reaches phrase_time_limit. Returns (end position, seconds of speech).
+        """
+        chunk_duration = self.chunk_size / float(self.sample_rate)
+        phrase_duration = (position - phrase_start) / float(self.sample_rate * self.sample_width)
+        speech_duration, silence = 0.0, 0.0
+        while silence < recognizer.pause_threshold and not (phrase_time_limit and phrase_duration >= phrase_time_limit):
+            if should_stop and should_stop():
+                break
+            chunk, position = self.read_chunk(position)
+            if chunk is None:
+                continue
+            phrase_duration += chunk_duration
+            if chunk_rms(chunk, self.sample_width) > recognizer.energy_threshold:
+                speech_duration += chunk_duration
+                silence = 0.0
+            else:
+                silence += chunk_duration
+        trailing_silence = max(0.0, silence - recognizer.non_speaking_duration)
+        return position - self.seconds_to_bytes(trailing_silence), speech_duration
+
+    def listen(self, recognizer, timeout=None, phrase_time_limit=None, should_stop=None):
+        """
+        Same contract as recognizer.listen, but on the shared open stream: waits for speech above
+        recognizer.energy_threshold (adapting it like speech_recognition does), records the phrase
+        and returns it with up to pre_roll seconds of audio from before the speech started.
+        Raises sr.WaitTimeoutError if no phrase starts within timeout, returns None if should_stop().
+        """
+        chunk_duration = self.chunk_size / float(self.sample_rate)
+        position = self.current_position()
+        waited = 0.0
+        while True:
+            if should_stop and should_stop():
+                return None
+            chunk, next_position = self.read_chunk(position)
+            if chunk is None:
+                continue
+            waited += chunk_duration
+            energy = chunk_rms(chunk, self.sample_width)
+            if energy <= recognizer.energy_threshold:
+                if timeout and waited > timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                if recognizer.dynamic_energy_threshold:
+                    damping = recognizer.dynamic_energy_adjustment_damping ** chunk_duration
+                    target_energy = energy * recognizer.dynamic_energy_ratio
+                    recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+                position = next_position
+                continue
+
+            end, speech_duration = self.follow_phrase(recognizer, next_position, position,
+                                                      phrase_time_limit, should_stop)
+            if speech_duration + chunk_duration < recognizer.phrase_threshold:
+                position = end  # Too short for a phrase (a click or a bump), keep waiting
+                continue
+            start = max(position - self.seconds_to_bytes(self.pre_roll), self.ring.oldest_position())
+            return self.audio_data(start, end)
@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from collections import deque
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+from mic_stream import chunk_rms
+
+
+DEFAULT_CALIBRATION_DURATION = 1.0  # Seconds of audio for the first calibration of an unknown device
+REFINE_WINDOW = 10.0  # Seconds of recent chunk energies the noise floor is estimated from
+REFINE_INTERVAL = 5.0
+REFINE_RATE = 0.2  # Share of the gap to the new estimate closed per refinement
+NOISE_FLOOR_PERCENTILE = 20  # Pauses between words keep this at the noise level even while someone talks
+SAVE_INTERVAL = 60.0
+MIN_RELATIVE_CHANGE_TO_SAVE = 0.05
+
+
+class NoiseCalibrator:
+    """
+    Keeps recognizer.energy_threshold calibrated per microphone without blocking on
+    adjust_for_ambient_noise.
+
+    The last threshold of every device name is stored in a JSON file and applied as soon as the
+    device is opened. A background thread follows the MicrophoneStream ring buffer: for a device
+    without a stored threshold it first calibrates like speech_recognition does (the capture stage
+    waits for that via is_ready), then it keeps estimating the noise floor from recent chunks and
+    moves the threshold towards it, so drift over the day is tracked. Refinement is skipped while
+    should_pause() is true (e.g. during TTS playback, whose echo is not room noise).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._thresholds = self._load()
+        self._saved_thresholds = dict(self._thresholds)
+        self._stop_event = Event()
+        self._ready = Event()
+        self._thread = None
+        self.device_name = None
+        self.calibrations = 0
+        self.refinements = 0
+        self.saves = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {name: float(entry["energy_threshold"]) for name, entry in data.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Could not read microphone calibration file '{self.path}': {e}")
+            return {}
+
+    def save(self):
+        with self._lock:
+            if self._thresholds == self._saved_thresholds:
+                return
+            data = {name: {"energy_threshold": round(threshold, 1)} for name, threshold in self._thresholds.items()}
+            try:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                self._saved_thresholds = dict(self._thresholds)
+                self.saves += 1
+            except OSError as e:
+                print(f"Could not save microphone calibration: {e}")
+
+    def cached_threshold(self, device_name):
+        with self._lock:
+            return self._thresholds.get(device_name)
+
+    def is_ready(self):
+        """False only while a device without stored threshold is being calibrated for the first time."""
+        return self._ready.is_set()
+
+    def start(self, stream, recognizer, device_name, should_pause=None, on_ready=None,
+              duration=DEFAULT_CALIBRATION_DURATION):
+        """Applies the stored threshold of device_name (if any) and starts calibrating in the background."""
+        self.stop()
+        self.device_name = device_name
+        cached = self.cached_threshold(device_name)
+        if cached is not None:
+            recognizer.energy_threshold = cached
+            print(f"Using stored energy threshold {cached:.0f} for microphone '{device_name}'.")
+            self._ready.set()
+            if on_ready: on_ready()
+        else:
+            self._ready.clear()
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, args=(stream, recognizer, device_name, should_pause, on_ready,
+                                                      0.0 if cached is not None else duration),
+                              name="NoiseCalibration", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.save()
+
+    def _remember(self, device_name, threshold):
+        with self._lock:
+            self._thresholds[device_name] = float(threshold)
+
+    def _run(self, stream, recognizer, device_name, should_pause, on_ready, duration):
+        try:
+            self._calibrate_and_refine(stream, recognizer, device_name, should_pause, on_ready, duration)
+        finally:
+            if not self._ready.is_set():  # Stream failed or stopped before the first calibration finished
+                print(f"Ambient noise calibration of '{device_name}' did not finish, keeping energy threshold "
+                      f"{recognizer.energy_threshold:.0f}.")
+                self._ready.set()  # Otherwise the capture stage waits forever and never notices the dead stream
+
+    def _calibrate_and_refine(self, stream, recognizer, device_name, should_pause, on_ready, duration):
+        chunk_duration = stream.chunk_size / float(stream.sample_rate)
+        window = deque(maxlen=max(1, int(REFINE_WINDOW / chunk_duration)))
+        position = stream.current_position()
+        calibrated_for = 0.0
+        next_refine = time.monotonic() + REFINE_INTERVAL
+        next_save = time.monotonic() + SAVE_INTERVAL
+        while not self._stop_event.is_set():
+            try:
+                chunk, position = stream.read_chunk(position)
+            except OSError as e:
+                print(f"Noise calibration stopped: {e}")
+                break
+            if chunk is None:
+                continue
+            energy = chunk_rms(chunk, stream.sample_width)
+
+            if not self._ready.is_set():
+                # Same update as recognizer.adjust_for_ambient_noise, on the shared stream
+                damping = recognizer.dynamic_energy_adjustment_damping ** chunk_duration
+                target = energy * recognizer.dynamic_energy_ratio
+                recognizer.energy_threshold = recognizer.energy_threshold * damping + target * (1 - damping)
+                calibrated_for += chunk_duration
+                if calibrated_for >= duration:
+                    self.calibrations += 1
+                    self._remember(device_name, recognizer.energy_threshold)
+                    print(f"Ambient noise calibration complete (energy threshold {recognizer.energy_threshold:.0f}).")
+                    self._ready.set()
+                    if on_ready: on_ready()
+                continue
+
+            if should_pause and should_pause():
+                window.clear()  # Don't mix echo into the estimate
+                continue
+            window.append(energy)
+
+            now = time.monotonic()
+            if now >= next_refine and len(window) == window.maxlen:
+                next_refine = now + REFINE_INTERVAL
+                target = float(np.percentile(window, NOISE_FLOOR_PERCENTILE)) * recognizer.dynamic_energy_ratio
+                recognizer.energy_threshold += REFINE_RATE * (target - recognizer.energy_threshold)
+                self.refinements += 1
+                self._remember(device_name, recognizer.energy_threshold)
+            if now >= next_save:
+                next_save = now + SAVE_INTERVAL
+                saved = self._saved_thresholds.get(device_name)
+                current = self.cached_threshold(device_name)
+                if saved is None or abs(current - saved) > MIN_RELATIVE_CHANGE_TO_SAVE * saved:
+                    self.save()
+
+    def stats(self):
+        return {
+            "device": self.device_name,
+            "energy_threshold": self.cached_threshold(self.device_name),
+            "calibrations": self.calibrations,
+            "refinements": self.refinements,
+            "saves": self.saves,
+        }
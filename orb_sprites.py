@@ -0,0 +1,75 @@
+from PIL import Image, ImageDraw, ImageFilter, ImageTk
+
+
+PULSE_PHASES = 24  # Distinct orb sizes per mode, enough that the pulse doesn't look stepped
+SUPERSAMPLE = 4  # Drawn this much larger and scaled down, PIL's ellipses are not anti-aliased
+GLOW_MARGIN = 8
+GLOW_BLUR = 4
+GLOW_OPACITY = 0.35
+
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class OrbSpriteCache:
+    """
+    Pre-rendered overlay orbs (glow, orb and highlight in one image) per mode and pulse phase, so a
+    frame is a single image swap instead of recomputing ovals and fill colors on the canvas. Sprites
+    are rendered with PIL on first use and kept; color_for(mode, pulse_factor) gives the orb color
+    the vector animation would use.
+    """
+
+    def __init__(self, master, orb_size, pulse_max, background, color_for, phases=PULSE_PHASES):
+        self.master = master
+        self.orb_size = orb_size
+        self.pulse_max = pulse_max
+        self.background = hex_to_rgb(background)
+        self.color_for = color_for
+        self.phases = phases
+        self.sprite_size = orb_size + pulse_max + 2 * GLOW_MARGIN
+        self._sprites = {}
+        self.rendered = 0
+
+    def phase(self, pulse_size):
+        pulse_factor = min(1.0, max(0.0, pulse_size / self.pulse_max))
+        return int(round(pulse_factor * (self.phases - 1)))
+
+    def sprite(self, mode, pulse_size):
+        key = (mode, self.phase(pulse_size))
+        image = self._sprites.get(key)
+        if image is None:
+            image = ImageTk.PhotoImage(self._render(mode, key[1] / (self.phases - 1)), master=self.master)
+            self._sprites[key] = image
+            self.rendered += 1
+        return image
+
+    def _render(self, mode, pulse_factor):
+        scale = SUPERSAMPLE
+        size = self.sprite_size * scale
+        center = size / 2
+        orb_color = hex_to_rgb(self.color_for(mode, pulse_factor))
+        orb_radius = (self.orb_size + pulse_factor * self.pulse_max) * scale / 2
+
+        glow = Image.new("L", (size, size), 0)
+        glow_radius = orb_radius + GLOW_MARGIN * scale / 2
+        ImageDraw.Draw(glow).ellipse((center - glow_radius, center - glow_radius,
+                                      center + glow_radius, center + glow_radius),
+                                     fill=int(255 * GLOW_OPACITY))
+        glow = glow.filter(ImageFilter.GaussianBlur(GLOW_BLUR * scale))
+        image = Image.composite(Image.new("RGB", (size, size), orb_color),
+                                Image.new("RGB", (size, size), self.background), glow)
+
+        draw = ImageDraw.Draw(image)
+        draw.ellipse((center - orb_radius, center - orb_radius, center + orb_radius, center + orb_radius),
+                     fill=orb_color)
+        highlight_size = orb_radius * 2 * 0.6  # Same placement as the canvas highlight oval
+        draw.ellipse((center - highlight_size / 2, center - highlight_size / 2, center, center), fill=(255, 255, 255))
+        return image.resize((self.sprite_size, self.sprite_size), Image.LANCZOS)
+
+    def clear(self):
+        self._sprites.clear()
+
+    def stats(self):
+        return {"sprites": len(self._sprites), "rendered": self.rendered}
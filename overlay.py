@@ -2,6 +2,9 @@ import tkinter as tk
 import os
 import numpy as np
 
+from frame_governor import FrameGovernor
+from particles import ParticlePool
+
 
 
 def resource_path_local(relative_path):  
@@ -12,7 +15,7 @@ def resource_path_local(relative_path):
     return os.path.join(base_path, relative_path)
 
 class ModernOverlay(tk.Tk):
-    def __init__(self, speech_stop_event_ref):  
+    def __init__(self, speech_stop_event_ref, sprite_animation=False):  
         super().__init__()
         self.speech_stop_event = speech_stop_event_ref  
 
@@ -81,14 +84,17 @@ class ModernOverlay(tk.Tk):
             self.orb_x - self.orb_size // 3, self.orb_y - self.orb_size // 3,
             self.orb_x - 2, self.orb_y - 2,
             fill='white', width=0)
+        self.sprite_id = self.canvas.create_image(self.orb_x, self.orb_y, state='hidden') # Used instead of the two ovals
+        self.orb_sprites = None
+        self._current_sprite = None
 
         self.font = ("Segoe UI", 14, "bold")
         self.text_id = self.canvas.create_text(
             self.orb_x + self.orb_size // 2 + 20, height // 2,
             anchor='w', text="", fill='#10DFFF', font=self.font)
 
-        self.particles = []
-        self.max_particles = 15
+        self.max_particles = 30
+        self.particles = ParticlePool(self.canvas, self.max_particles) # Pre-created ovals, reused
         self.pulse_direction = 1
         self.pulse_size = 0
         self.pulse_speed = 0.05
@@ -96,10 +102,12 @@ class ModernOverlay(tk.Tk):
         self.listening_speed = 0.05
         self.speaking_speed = 0.12
         self.particle_chance = 0.05
+        self.frame_governor = FrameGovernor()
+        self._animation_job = None # Only scheduled while the overlay is shown
 
         self.canvas.bind("<Button-1>", self.on_click)
+        self.set_sprite_animation(sprite_animation)
         self.withdraw()
-        self.after(20, self._animate)
 
     def on_click(self, event):
         if self.mode == 'speaking':
@@ -126,7 +134,40 @@ class ModernOverlay(tk.Tk):
             self.show()
         else:
             self.hide()
-        self.particles = []
+        self.particles.clear()
+        if mode is None:
+            self._stop_animation()
+        else:
+            self._start_animation()
+
+    def set_sprite_animation(self, enabled):
+        """Draws the orb from pre-rendered images (one swap per frame) instead of canvas ovals."""
+        if enabled == (self.orb_sprites is not None):
+            return
+        if enabled and self.orb_sprites is None:
+            try:
+                from orb_sprites import OrbSpriteCache
+                self.orb_sprites = OrbSpriteCache(self, self.orb_size, self.pulse_max, '#0D1117', self._orb_color)
+            except ImportError as e:
+                print(f"Warning: Sprite animation needs Pillow ({e}). Using canvas drawing.")
+        elif not enabled and self.orb_sprites is not None:
+            self.orb_sprites.clear()
+            self.orb_sprites = None
+        use_sprites = self.orb_sprites is not None
+        self._current_sprite = None
+        self.canvas.itemconfigure(self.sprite_id, image='', state='normal' if use_sprites else 'hidden')
+        for item_id in (self.orb_id, self.highlight_id):
+            self.canvas.itemconfigure(item_id, state='hidden' if use_sprites else 'normal')
+
+    def _start_animation(self):
+        if self._animation_job is None:
+            self.frame_governor.reset()
+            self._animation_job = self.after_idle(self._animate)
+
+    def _stop_animation(self):
+        if self._animation_job is not None:
+            self.after_cancel(self._animation_job)
+            self._animation_job = None
 
     def show(self):
         if not self.winfo_viewable():
@@ -136,66 +177,44 @@ class ModernOverlay(tk.Tk):
         if self.winfo_viewable():
             self.withdraw()
 
-    def _create_particle(self):
-        if len(self.particles) >= self.max_particles: return
-        angle = np.random.uniform(0, 2 * np.pi)
-        speed = np.random.uniform(0.5, 2.0)
-        if self.mode == 'speaking': speed *= 1.5
-        size = np.random.uniform(2, 6)
-        distance = np.random.uniform(0, 10)
-        x = self.orb_x + distance * np.cos(angle)
-        y = self.orb_y + distance * np.sin(angle)
-        colors = ['#10AFCF', '#1E90FF', '#00CED1', '#48D1CC', '#20B2AA']
-        color = np.random.choice(colors)
-        particle = {
-            'id': self.canvas.create_oval(x - size / 2, y - size / 2, x + size / 2, y + size / 2, fill=color, width=0),
-            'dx': speed * np.cos(angle), 'dy': speed * np.sin(angle),
-            'ttl': np.random.uniform(10, 30), 'fade': np.random.uniform(0.92, 0.98)}
-        self.particles.append(particle)
-
-    def _update_particles(self):
-        particles_to_remove = []
-        for i, p in enumerate(self.particles):
-            self.canvas.move(p['id'], p['dx'], p['dy'])
-            p['ttl'] -= 1
-            if p['ttl'] <= 0:
-                particles_to_remove.append(i)
-                self.canvas.delete(p['id'])
-            else:
-                x1, y1, x2, y2 = self.canvas.coords(p['id'])
-                width, height = x2 - x1, y2 - y1
-                new_width, new_height = width * p['fade'], height * p['fade']
-                center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
-                self.canvas.coords(p['id'], center_x - new_width / 2, center_y - new_height / 2,
-                                   center_x + new_width / 2, center_y + new_height / 2)
-        for i in sorted(particles_to_remove, reverse=True):
-            self.particles.pop(i)
+    def _spawn_particle(self, scale):
+        if np.random.random() < 1 - (1 - self.particle_chance) ** scale:
+            self.particles.spawn(1, self.orb_x, self.orb_y, speed_factor=1.5 if self.mode == 'speaking' else 1.0)
 
-    def _animate(self):
-        self.pulse_size += self.pulse_speed * self.pulse_direction
-        if self.pulse_size > self.pulse_max or self.pulse_size < 0:
-            self.pulse_direction *= -1
+    def _orb_color(self, mode, pulse_factor):
+        if mode == 'listening':
+            return self.gradient[int(20 + pulse_factor * 30)]
+        return self.gradient[min(99, int(40 + pulse_factor * 50))]
+
+    def _draw_orb(self):
+        pulse_factor = min(1.0, abs(self.pulse_size / self.pulse_max))
+        if self.orb_sprites is not None:
+            sprite = self.orb_sprites.sprite(self.mode, self.pulse_size)
+            if sprite is not self._current_sprite: # Same phase as last frame: nothing to do
+                self.canvas.itemconfigure(self.sprite_id, image=sprite)
+                self._current_sprite = sprite
+            return
         size = self.orb_size + self.pulse_size
         self.canvas.coords(self.orb_id, self.orb_x - size // 2, self.orb_y - size // 2,
                            self.orb_x + size // 2, self.orb_y + size // 2)
         highlight_size = size * 0.6
         self.canvas.coords(self.highlight_id, self.orb_x - highlight_size // 2,
                            self.orb_y - highlight_size // 2, self.orb_x, self.orb_y)
+        self.canvas.itemconfig(self.orb_id, fill=self._orb_color(self.mode, pulse_factor))
 
-        if self.mode == 'listening':
-            pulse_factor = abs(self.pulse_size / self.pulse_max)
-            color_idx = int(20 + pulse_factor * 30)
-            self.canvas.itemconfig(self.orb_id, fill=self.gradient[color_idx])
-            if np.random.random() < self.particle_chance: self._create_particle()
-        elif self.mode == 'speaking':
-            pulse_factor = abs(self.pulse_size / self.pulse_max)
-            color_idx = int(40 + pulse_factor * 50)
-            self.canvas.itemconfig(self.orb_id, fill=self.gradient[min(99, color_idx)])
-            if np.random.random() < self.particle_chance: self._create_particle()
-
-        self._update_particles()
-        self.after(20, self._animate)
-
+    def _animate(self):
+        self._animation_job = None
+        if self.mode is None:
+            return
+        self.frame_governor.begin_frame()
+        scale = self.frame_governor.frame_scale # Steps are tuned for 50 fps, keep their speed at lower rates
+        self.pulse_size += self.pulse_speed * self.pulse_direction * scale
+        if self.pulse_size > self.pulse_max or self.pulse_size < 0:
+            self.pulse_direction *= -1
+        self._draw_orb()
+        self._spawn_particle(scale)
+        self.particles.step(scale)
+        self._animation_job = self.after(self.frame_governor.end_frame(), self._animate)
 
 
 if __name__ == '__main__':
@@ -1,43 +1,24 @@
 
-import json
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from tkinter.font import Font
-import sv_ttk
 import sys
-import asyncio
 from threading import Thread
-from edge_tts import Communicate
-import pygame
-import time
-
-try:
-    import speech_recognition as sr_audio
-except ImportError:
-    print("WARNING (settings.py): speech_recognition not found. Using mock for microphone listing.")
-
-
-    class MockRecognizerSettings:
-        pass
-
-
-    class MockMicrophoneSettings:
-        @staticmethod
-        def list_microphone_names():
-            print("Mock list_microphone_names called from settings.py")
-            return ["Mock Microphone 1 (Settings)", "Another Mock Mic (Settings)", "System Default Mock Mic (Settings)"]
-
-
-    class MockSrAudioModule:
-        Recognizer = MockRecognizerSettings
-        Microphone = MockMicrophoneSettings
-        WaitTimeoutError = type('WaitTimeoutError', (Exception,), {})
-        UnknownValueError = type('UnknownValueError', (Exception,), {})
-        RequestError = type('RequestError', (Exception,), {})
-
+from tts_audio import synthesize_speech, play_audio_bytes
+from async_service import get_async_service
+from voice_catalog import voice_catalog
+from config_store import config_store
+from app_settings import (
+    LANGUAGES_DIR, DEFAULT_SYSTEM_PROMPT_NAME, DEFAULT_SYSTEM_PROMPT_TEXT, default_settings,
+    LanguageManager, load_settings,
+)
+from lazy_import import lazy_module
+from device_registry import device_registry
 
-    sr_audio = MockSrAudioModule()
+# Only the settings window needs these, so they are imported when it first opens
+sv_ttk = lazy_module("sv_ttk")
+pygame = lazy_module("pygame")
 
 
 
@@ -46,146 +27,11 @@ try:
         SystemPromptManagerWindow,
         load_system_prompts as agent_load_system_prompts,
         save_system_prompts as agent_save_system_prompts,  # Though not directly used here, good for consistency
-        get_full_system_prompt as agent_get_full_system_prompt,
     )
 except ImportError:
     messagebox.showerror("Error", "agent_builder.py could not be found or imported.")
     sys.exit(1)
 
-SETTINGS_FILE = "settings.json"
-LANGUAGES_DIR = "languages"
-
-DEFAULT_SYSTEM_PROMPT_NAME = "Default Prompt"
-DEFAULT_SYSTEM_PROMPT_TEXT = (
-    "You are Manfred, a highly intelligent and efficient AI assistant. "
-    "Reply without formatting and keep replies short and simple. "
-    "You always speak respectfully, and fluent English. "
-    "Your responses must be clear, concise, and helpful—avoid unnecessary elaboration, especially for simple tasks. "
-    "A good amount of humor is good to keep the conversation natural, friend-like. Your top priorities are efficiency and clarity."
-)
-
-default_settings = {
-    "api_key": "Enter your Gemini API key here",
-    "ui_language": "en-US",
-    "selected_microphone": "System Default",
-    "selected_speaker": "System Default",
-    "active_system_prompt_name": DEFAULT_SYSTEM_PROMPT_NAME,
-
-    "activation_word": "Manfred",
-    "stop_words": ["stop", "stopp", "exit", "quit"],
-    "chat_length": 5,
-    "open_links_automatically": True,
-    "tts_voice": "en-US-AriaNeural",
-}
-
-TTS_VOICES_STRUCTURED = {
-    "German": {
-        "code": "de-DE", "flag": "🇩🇪",
-        "preview_text": "Dies ist ein Test der ausgewählten Stimme.",
-        "voices": {
-            "Amala": "de-DE-AmalaNeural",
-            "Conrad": "de-DE-ConradNeural",
-            "Katja": "de-DE-KatjaNeural"
-        }
-    },
-    "English (US)": {
-        "code": "en-US", "flag": "🇺🇸",
-        "preview_text": "This is a test of the selected voice.",
-        "voices": {
-            "Aria": "en-US-AriaNeural",
-            "Jenny": "en-US-JennyNeural",
-            "Guy": "en-US-GuyNeural"
-        }
-    },
-    "English (GB)": {
-        "code": "en-GB", "flag": "🇬🇧",
-        "preview_text": "This is a test of the selected voice.",
-        "voices": {
-            "Libby": "en-GB-LibbyNeural",
-            "Ryan": "en-GB-RyanNeural"
-        }
-    },
-    "French": {
-        "code": "fr-FR", "flag": "🇫🇷",
-        "preview_text": "Ceci est un test de la voix sélectionnée.",
-        "voices": {
-            "Denise": "fr-FR-DeniseNeural",
-            "Henri": "fr-FR-HenriNeural"
-        }
-    },
-    "Spanish (Spain)": {
-        "code": "es-ES", "flag": "🇪🇸",
-        "preview_text": "Esta es una prueba de la voz seleccionada.",
-        "voices": {
-            "Alvaro": "es-ES-AlvaroNeural",
-            "Elvira": "es-ES-ElviraNeural"
-        }
-    },
-    "Italian": {
-        "code": "it-IT", "flag": "🇮🇹",
-        "preview_text": "Questa è una prova della voce selezionata.",
-        "voices": {
-            "Diego": "it-IT-DiegoNeural",
-            "Elsa": "it-IT-ElsaNeural"
-        }
-    },
-    "Portuguese (Portugal)": {
-        "code": "pt-PT", "flag": "🇵🇹",
-        "preview_text": "Este é um teste da voz selecionada.",
-        "voices": {
-            "Duarte": "pt-PT-DuarteNeural",
-            "Raquel": "pt-PT-RaquelNeural"
-        }
-    },
-    "Dutch": {
-        "code": "nl-NL", "flag": "🇳🇱",
-        "preview_text": "Dit is een test van de geselecteerde stem.",
-        "voices": {
-            "Colette": "nl-NL-ColetteNeural",
-            "Maarten": "nl-NL-MaartenNeural"
-        }
-    },
-    "Polish": {
-        "code": "pl-PL", "flag": "🇵🇱",
-        "preview_text": "To jest test wybranego głosu.",
-        "voices": {
-            "Marek": "pl-PL-MarekNeural",
-            "Zofia": "pl-PL-ZofiaNeural"
-        }
-    },
-    "Swedish": {
-        "code": "sv-SE", "flag": "🇸🇪",
-        "preview_text": "Detta är ett test av den valda rösten.",
-        "voices": {
-            "Mattias": "sv-SE-MattiasNeural",
-            "Sofie": "sv-SE-SofieNeural"
-        }
-    },
-    "Danish": {
-        "code": "da-DK", "flag": "🇩🇰",
-        "preview_text": "Dette er en test af den valgte stemme.",
-        "voices": {
-            "Jeppe": "da-DK-JeppeNeural",
-            "Christel": "da-DK-ChristelNeural"
-        }
-    },
-    "Norwegian (Bokmål)": {
-        "code": "nb-NO", "flag": "🇳🇴",
-        "preview_text": "Dette er en test av den valgte stemmen.",
-        "voices": {
-            "Finn": "nb-NO-FinnNeural",
-            "Pernille": "nb-NO-PernilleNeural"
-        }
-    },
-    "Finnish": {
-        "code": "fi-FI", "flag": "🇫🇮",
-        "preview_text": "Tämä on valitun äänen testi.",
-        "voices": {
-            "Harri": "fi-FI-HarriNeural",
-            "Noora": "fi-FI-NooraNeural"
-        }
-    }
-}
 AVAILABLE_UI_LANGUAGES = {}
 
 
@@ -196,76 +42,6 @@ def resource_path_local(relative_path):  # Eigene Definition oder Import von mai
         base_path = os.path.abspath(os.path.join(os.path.dirname(__file__)))
     return os.path.join(base_path, relative_path)
 
-class LanguageManager:
-    def __init__(self, initial_lang_code="en-US"):
-        self.current_lang_code = initial_lang_code
-        self.translations = {}
-        self.fallback_translations = {}
-        self._active_window_for_messagebox = None # For agent_builder
-        self._load_fallback_language()
-        self.load_language(self.current_lang_code)
-
-    def _load_fallback_language(self):
-        try:
-            fallback_path = os.path.join(LANGUAGES_DIR, "en-US.json")
-            if os.path.exists(fallback_path):
-                with open(fallback_path, "r", encoding="utf-8") as f:
-                    self.fallback_translations = json.load(f)
-            else:
-                print(
-                    f"CRITICAL ERROR: Fallback language file en-US.json not found in '{LANGUAGES_DIR}'. UI text will be missing.")
-                self.fallback_translations = {}
-        except Exception as e:
-            print(f"Error loading fallback language en-US: {e}")
-            self.fallback_translations = {}
-
-    def load_language(self, lang_code):
-        self.current_lang_code = lang_code
-        try:
-            lang_file_path = os.path.join(LANGUAGES_DIR, f"{lang_code}.json")
-            if not os.path.exists(lang_file_path):
-                print(f"Warning: Language file {lang_file_path} not found. Using fallback (en-US).")
-                self.translations = self.fallback_translations.copy()
-                if lang_code != "en-US":
-                    self.current_lang_code = "en-US"
-                return
-
-            with open(lang_file_path, "r", encoding="utf-8") as f:
-                self.translations = json.load(f)
-        except Exception as e:
-            print(f"Error loading language {lang_code}: {e}. Using fallback (en-US).")
-            self.translations = self.fallback_translations.copy()
-            if lang_code != "en-US":
-                self.current_lang_code = "en-US"
-
-    def get_string(self, key, default_text=None, **kwargs):
-        val_candidate = self.translations.get(key, self.fallback_translations.get(key))
-        if val_candidate is None:
-            if default_text is not None:
-                val = default_text
-            else:
-                val = f"<{key}>"
-        else:
-            val = val_candidate
-
-        if kwargs:
-            try:
-                return val.format(**kwargs)
-            except (KeyError, ValueError, TypeError) as e:
-                print(f"Warning: Formatting error for key '{key}' with value '{val}' and args {kwargs}: {e}")
-                return val
-        return val
-
-    def set_language(self, lang_code):
-        self.load_language(lang_code)
-
-    def set_active_window_for_messagebox(self, window):
-        self._active_window_for_messagebox = window
-
-    def get_active_window_for_messagebox(self):
-        return self._active_window_for_messagebox
-
-
 def scan_available_languages():
     global AVAILABLE_UI_LANGUAGES
     AVAILABLE_UI_LANGUAGES = {}
@@ -293,45 +69,9 @@ def scan_available_languages():
         AVAILABLE_UI_LANGUAGES["en-US"] = {"name": "English (US)", "flag": "🇺🇸"}
 
 
-scan_available_languages()
-
-
-def load_settings():
-    if not os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(default_settings, f, indent=4, ensure_ascii=False)
-            print(f"'{SETTINGS_FILE}' not found. Created with default settings.")
-            return default_settings.copy()
-        except Exception as e:
-            print(f"Error creating default settings file: {e}")
-            return default_settings.copy()
-
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            loaded = json.load(f)
-            updated = False
-            for key, value in default_settings.items():
-                if key not in loaded:
-                    loaded[key] = value
-                    updated = True
-            if updated:
-                try:
-                    with open(SETTINGS_FILE, "w", encoding="utf-8") as f_update:
-                        json.dump(loaded, f_update, indent=4, ensure_ascii=False)
-                    print(f"'{SETTINGS_FILE}' was missing some keys. Updated with defaults and saved.")
-                except Exception as e_save:
-                    print(f"Error saving updated settings file: {e_save}")
-            return loaded
-    except Exception as e:
-        print(f"Error loading settings: {e}. Returning default settings.")
-        return default_settings.copy()
-
-
 def save_settings(settings, lm):
     try:
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=4, ensure_ascii=False)
+        config_store.put("settings", settings)
         if lm:
             messagebox.showinfo(lm.get_string("success_title"), lm.get_string("settings_saved_success"),
                                 parent=lm.get_active_window_for_messagebox()) # Use parent from lm
@@ -348,13 +88,14 @@ def save_settings(settings, lm):
 class ModernSettingsApp:
     def __init__(self, root, lm):
         self.root = root
+        if not AVAILABLE_UI_LANGUAGES: scan_available_languages() # Once, when the window first opens
         self.settings = load_settings()
         self.lm = lm
         self.lm.set_active_window_for_messagebox(self.root) # Set parent for lm's messageboxes
 
         # Store default_settings for agent_builder placeholders
         self.default_settings = default_settings.copy() # Make a copy
-        self.TTS_VOICES_STRUCTURED = TTS_VOICES_STRUCTURED # For agent_builder
+        self.voice_catalog = voice_catalog # For agent_builder
 
         if not pygame.mixer.get_init():
             try: pygame.mixer.init()
@@ -383,6 +124,9 @@ class ModernSettingsApp:
         self.retranslate_ui()
         self.load_settings_into_ui()
 
+        device_registry.subscribe(self._on_audio_devices_changed)
+        self.root.bind("<Destroy>", self._unsubscribe_audio_devices, add="+")
+
         self.center_window()
         if isinstance(self.root, tk.Toplevel):
             self.root.grab_set()
@@ -390,42 +134,30 @@ class ModernSettingsApp:
 
     def _get_speaker_names(self):
         names = [self.lm.get_string("system_default_device_option", default_text="System Default")]
-        try:
-            if not pygame.mixer.get_init(): pygame.mixer.init()
-            if pygame.mixer.get_init():
-                num_devices = pygame.mixer.get_num_output_devices()
-                for i in range(num_devices):
-                    name = pygame.mixer.get_output_device_name(i)
-                    if name:
-                        decoded_name = name.decode('utf-8', errors='replace') if isinstance(name, bytes) else name
-                        if decoded_name.strip(): names.append(decoded_name)
-            else: print("Pygame mixer could not be initialized. Cannot list speaker devices.")
-        except Exception as e: print(f"Error listing speaker devices: {e}")
+        names.extend(device_registry.speakers()) # Cached, enumerated in the background
         return list(dict.fromkeys(names))
 
     def _get_microphone_names(self):
         names = [self.lm.get_string("system_default_device_option", default_text="System Default")]
-        try:
-            if sr_audio and hasattr(sr_audio, 'Microphone') and hasattr(sr_audio.Microphone, 'list_microphone_names'):
-                mic_names = sr_audio.Microphone.list_microphone_names()
-                if mic_names: names.extend(m for m in mic_names if m and m.strip())
-            else: print("Cannot list microphones: speech_recognition library not available or incomplete.")
-        except Exception as e: print(f"Error listing microphone devices: {e}")
+        names.extend(m for m in device_registry.microphones() if m and m.strip())
         return list(dict.fromkeys(names))
 
+    def _on_audio_devices_changed(self, microphones, speakers):
+        try: self.root.after(0, self._refresh_device_comboboxes)
+        except (tk.TclError, RuntimeError): pass # Window already gone
+
+    def _refresh_device_comboboxes(self):
+        """Keeps the device lists current while the window is open, e.g. after a headset was plugged in."""
+        if not self.root.winfo_exists(): return
+        self.microphone_combobox['values'] = self._get_microphone_names()
+        self.speaker_combobox['values'] = self._get_speaker_names()
+
+    def _unsubscribe_audio_devices(self, event=None):
+        if event is None or event.widget is self.root:
+            device_registry.unsubscribe(self._on_audio_devices_changed)
+
     def _get_sorted_tts_language_display_names(self):
-        ui_lang_code = self.lm.current_lang_code
-        ui_tts_lang_key = None
-        for lang_key, lang_data in TTS_VOICES_STRUCTURED.items():
-            if lang_data["code"] == ui_lang_code: ui_tts_lang_key = lang_key; break
-        english_keys = [k for k, data in TTS_VOICES_STRUCTURED.items() if data["code"].startswith("en-")]
-        sorted_keys = []
-        if ui_tts_lang_key: sorted_keys.append(ui_tts_lang_key)
-        for eng_key in sorted(english_keys):
-            if eng_key not in sorted_keys: sorted_keys.append(eng_key)
-        for lang_key in sorted(TTS_VOICES_STRUCTURED.keys()):
-            if lang_key not in sorted_keys: sorted_keys.append(lang_key)
-        return [f"{TTS_VOICES_STRUCTURED[key]['flag']} {key}" for key in sorted_keys]
+        return voice_catalog.sorted_display_names(self.lm.current_lang_code)
 
     def _on_tts_language_selected(self, event=None):
         self._update_tts_specific_voices_combobox()
@@ -436,13 +168,7 @@ class ModernSettingsApp:
 
     def _update_tts_specific_voices_combobox(self):
         selected_lang_display_with_flag = self.tts_language_var.get()
-        voice_names = []
-        if selected_lang_display_with_flag:
-            target_lang_key = None
-            for l_key, l_data in TTS_VOICES_STRUCTURED.items():
-                if f"{l_data['flag']} {l_key}" == selected_lang_display_with_flag: target_lang_key = l_key; break
-            if target_lang_key and target_lang_key in TTS_VOICES_STRUCTURED:
-                voice_names = sorted(list(TTS_VOICES_STRUCTURED[target_lang_key]["voices"].keys()))
+        voice_names = voice_catalog.voice_names(voice_catalog.language_key(selected_lang_display_with_flag))
 
         current_specific_voice = self.tts_specific_voice_var.get()
         self.tts_specific_voice_combobox['values'] = voice_names
@@ -464,32 +190,20 @@ class ModernSettingsApp:
                                    self.lm.get_string("select_language_voice_warning"), parent=self.root)
             return
 
-        voice_id_to_preview, preview_text_for_tts, target_lang_key = None, "Voice preview.", None
-        for l_key, l_data_tts in TTS_VOICES_STRUCTURED.items():
-            if f"{l_data_tts['flag']} {l_key}" == selected_lang_display_with_flag: target_lang_key = l_key; break
-        if target_lang_key:
-            lang_data = TTS_VOICES_STRUCTURED[target_lang_key]
-            if selected_voice_name_short in lang_data["voices"]:
-                voice_id_to_preview = lang_data["voices"][selected_voice_name_short]
-            preview_text_for_tts = lang_data.get("preview_text", preview_text_for_tts)
+        voice_id_to_preview = voice_catalog.voice_id(selected_lang_display_with_flag, selected_voice_name_short)
         if not voice_id_to_preview:
             messagebox.showerror(self.lm.get_string("error_title"),
                                    self.lm.get_string("could_not_find_voice_id_error"), parent=self.root)
             return
+        preview_text_for_tts = voice_catalog.voice(voice_id_to_preview).preview_text or "Voice preview."
         self.preview_tts_button.configure(state=tk.DISABLED)
 
         def _do_preview_thread():
-            temp_file = "tts_preview_temp.mp3"
             try:
-                loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
-                communicate_obj = Communicate(text=preview_text_for_tts, voice=voice_id_to_preview)
-                async def save_audio(): await communicate_obj.save(temp_file)
-                loop.run_until_complete(save_audio())
-                if os.path.exists(temp_file) and pygame.mixer.get_init():
-                    pygame.mixer.music.load(temp_file); pygame.mixer.music.play()
-                    while pygame.mixer.music.get_busy(): time.sleep(0.05)
-                    pygame.mixer.music.unload(); time.sleep(0.1); os.remove(temp_file)
-                elif not pygame.mixer.get_init(): print("Pygame mixer not initialized, cannot play preview.")
+                preview_audio = get_async_service().run(synthesize_speech(preview_text_for_tts, voice_id_to_preview))
+                if pygame.mixer.get_init():
+                    play_audio_bytes(preview_audio)
+                else: print("Pygame mixer not initialized, cannot play preview.")
             except Exception as e:
                 print(f"Error during TTS preview: {e}")
                 self.root.after(0, lambda: messagebox.showerror(
@@ -497,9 +211,6 @@ class ModernSettingsApp:
                     self.lm.get_string("preview_failed_error", e=str(e)), parent=self.root))
             finally:
                 self.root.after(0, lambda: self.preview_tts_button.configure(state=tk.NORMAL))
-                if os.path.exists(temp_file):
-                    try: os.remove(temp_file)
-                    except Exception as e_rem: print(f"Error removing temp preview file: {e_rem}")
         Thread(target=_do_preview_thread, daemon=True).start()
 
     def build_ui(self):
@@ -606,6 +317,12 @@ class ModernSettingsApp:
             lambda sf: ttk.Spinbox(sf, from_=1, to=100, textvariable=self.chat_length_var, width=10), current_row_fallback)
         current_row_fallback += 1
 
+        # Fallback Chat Token Budget
+        self.chat_token_budget_var = tk.IntVar()
+        self.chat_token_budget_label, _ = create_setting_row(self.fallback_agent_settings_frame, "chat_token_budget_label", "chat_token_budget_tooltip",
+            lambda sf: ttk.Spinbox(sf, from_=0, to=100000, increment=500, textvariable=self.chat_token_budget_var, width=10), current_row_fallback)
+        current_row_fallback += 1
+
         # Fallback Open Links Automatically
         self.open_links_var = tk.BooleanVar()
         self.open_links_label, self.open_links_checkbutton_widget = create_setting_row(self.fallback_agent_settings_frame, "open_links_label", "open_links_tooltip",
@@ -665,6 +382,7 @@ class ModernSettingsApp:
 
         # Fallback Agent Settings Labels
         self.chat_length_label.configure(text=self.lm.get_string("chat_length_label"))
+        self.chat_token_budget_label.configure(text=self.lm.get_string("chat_token_budget_label"))
         self.activation_word_label.configure(text=self.lm.get_string("activation_word_label"))
         self.stop_words_label.configure(text=self.lm.get_string("stop_words_label"))
         self.stop_words_helper_label.configure(text=self.lm.get_string("stop_words_helper"))
@@ -740,6 +458,7 @@ class ModernSettingsApp:
 
         # Fallback Agent Settings
         self.chat_length_var.set(self.settings.get("chat_length", default_settings["chat_length"]))
+        self.chat_token_budget_var.set(self.settings.get("chat_token_budget", default_settings["chat_token_budget"]))
         self.activation_word_var.set(self.settings.get("activation_word", default_settings["activation_word"]))
         self.stop_words_var.set(", ".join(self.settings.get("stop_words", default_settings["stop_words"])))
         self.open_links_var.set(self.settings.get("open_links_automatically", default_settings["open_links_automatically"]))
@@ -747,12 +466,9 @@ class ModernSettingsApp:
         if not self.tts_language_combobox['values']:
             self.tts_language_combobox['values'] = self._get_sorted_tts_language_display_names()
         current_tts_voice_id = self.settings.get("tts_voice", default_settings["tts_voice"])
-        selected_lang_display, selected_voice_name = None, None
-        for lang_key, lang_data in TTS_VOICES_STRUCTURED.items():
-            for voice_name_short, voice_id_val in lang_data["voices"].items():
-                if voice_id_val == current_tts_voice_id:
-                    selected_lang_display = f"{lang_data['flag']} {lang_key}"; selected_voice_name = voice_name_short; break
-            if selected_lang_display: break
+        current_voice = voice_catalog.voice(current_tts_voice_id)
+        selected_lang_display = voice_catalog.display_name(current_voice.language_key) if current_voice else None
+        selected_voice_name = current_voice.name if current_voice else None
         if selected_lang_display and selected_lang_display in self.tts_language_combobox['values']:
             self.tts_language_var.set(selected_lang_display)
             self._update_tts_specific_voices_combobox()
@@ -825,18 +541,16 @@ class ModernSettingsApp:
         if not isinstance(chat_length_val, int) or chat_length_val < 1:
             messagebox.showerror(self.lm.get_string("invalid_input_title"),
                                  self.lm.get_string("chat_length_positive_integer_error"), parent=self.root); return
+        try: chat_token_budget_val = self.chat_token_budget_var.get()
+        except tk.TclError: chat_token_budget_val = -1
+        if chat_token_budget_val < 0:
+            messagebox.showerror(self.lm.get_string("invalid_input_title"),
+                                 self.lm.get_string("chat_token_budget_error"), parent=self.root); return
 
         selected_lang_display_with_flag = self.tts_language_var.get()
         selected_voice_name_short = self.tts_specific_voice_var.get()
-        final_tts_voice_id = default_settings["tts_voice"]
-        if selected_lang_display_with_flag and selected_voice_name_short:
-            target_lang_key = None
-            for l_key, l_data in TTS_VOICES_STRUCTURED.items():
-                if f"{l_data['flag']} {l_key}" == selected_lang_display_with_flag: target_lang_key = l_key; break
-            if target_lang_key and target_lang_key in TTS_VOICES_STRUCTURED:
-                lang_data_tts = TTS_VOICES_STRUCTURED[target_lang_key]
-                if selected_voice_name_short in lang_data_tts["voices"]:
-                    final_tts_voice_id = lang_data_tts["voices"][selected_voice_name_short]
+        final_tts_voice_id = voice_catalog.voice_id(selected_lang_display_with_flag, selected_voice_name_short) \
+                             or default_settings["tts_voice"]
 
         selected_ui_lang_display_with_flag = self.ui_language_var.get()
         ui_language_code = default_settings["ui_language"]
@@ -855,7 +569,8 @@ class ModernSettingsApp:
         if selected_speaker_display == system_default_translated: final_selected_speaker = "System Default"
         elif selected_speaker_display: final_selected_speaker = selected_speaker_display
 
-        new_settings = {
+        new_settings = dict(self.settings) # Keeps options that have no widget, e.g. stream_responses
+        new_settings.update({
             "api_key": self.api_key_var.get(),
             "ui_language": ui_language_code,
             "selected_microphone": final_selected_mic,
@@ -863,11 +578,12 @@ class ModernSettingsApp:
             "active_system_prompt_name": self.active_prompt_name_var.get(),
             # Fallback settings
             "chat_length": chat_length_val,
+            "chat_token_budget": chat_token_budget_val,
             "activation_word": self.activation_word_var.get(),
             "stop_words": [word.strip() for word in self.stop_words_var.get().split(",") if word.strip()],
             "open_links_automatically": self.open_links_var.get(),
             "tts_voice": final_tts_voice_id,
-        }
+        })
 
         current_saved_prompts = agent_load_system_prompts(DEFAULT_SYSTEM_PROMPT_NAME, DEFAULT_SYSTEM_PROMPT_TEXT)
         if not new_settings["active_system_prompt_name"] or \
@@ -0,0 +1,152 @@
+import re
+import queue
+from threading import Thread, Event
+
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?…;])["\'”»)\]]*\s+|\n+')
+MIN_SENTENCE_LENGTH = 12  # Keeps very short fragments together with the next sentence
+# Words that end with a period without ending the sentence (lowercase, without the final period).
+# Letter-dot sequences like "z.B.", "U.S." or "J." are recognized by INITIALISM_PATTERN instead.
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "approx", "dept", "fig", "inc", "ltd", "corp",
+    "bzw", "ca", "evtl", "ggf", "inkl", "vgl", "bspw", "sog", "nr", "str", "hr", "fr", "abs", "max", "min",
+})
+INITIALISM_PATTERN = re.compile(r'(?:[^\W\d_]\.)*[^\W\d_]')
+
+
+def ends_with_abbreviation(text):
+    text = text.rstrip('"\'”»)]')
+    if not text.endswith("."):
+        return False
+    words = text[:-1].split()
+    if not words:
+        return False
+    word = words[-1].lstrip('("\'„“«[').lower()
+    return word in ABBREVIATIONS or bool(INITIALISM_PATTERN.fullmatch(word))
+
+
+class SentenceSplitter:
+    """Collects streamed text chunks and hands out complete sentences as soon as they end."""
+
+    def __init__(self, min_sentence_length=MIN_SENTENCE_LENGTH):
+        self.min_sentence_length = min_sentence_length
+        self.buffer = ""
+
+    def feed(self, text):
+        if not text:
+            return []
+        self.buffer += text
+        sentences = []
+        search_from = 0
+        while True:
+            match = SENTENCE_BOUNDARY_PATTERN.search(self.buffer, search_from)
+            if not match:
+                break
+            candidate = self.buffer[:match.start()].strip()
+            if len(candidate) < self.min_sentence_length or ends_with_abbreviation(candidate):
+                search_from = match.end()  # Too short, keep it together with the next sentence
+                continue
+            sentences.append(candidate)
+            self.buffer = self.buffer[match.end():]
+            search_from = 0
+        return sentences
+
+    def flush(self):
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return remainder or None
+
+
+class SpeechPipeline:
+    """
+    Synthesizes sentences on one worker thread and plays them on another, strictly in order.
+
+    synthesize(text, index) returns an audio handle (or None to skip the sentence),
+    play(handle) returns False if playback was interrupted, discard(handle) cleans up
+    audio that will not be played anymore.
+    """
+
+    _END = object()
+
+    def __init__(self, synthesize, play, discard=None, on_playback_start=None):
+        self.synthesize = synthesize
+        self.play = play
+        self.discard = discard
+        self.on_playback_start = on_playback_start
+        self.cancelled = Event()
+        self.playback_started = Event()
+        self.finished = Event()
+        self.sentences_spoken = 0
+        self._text_queue = queue.Queue()
+        self._audio_queue = queue.Queue()
+        self._next_index = 0
+        self._synth_thread = Thread(target=self._synthesis_worker, daemon=True)
+        self._player_thread = Thread(target=self._playback_worker, daemon=True)
+
+    def start(self):
+        self._synth_thread.start()
+        self._player_thread.start()
+        return self
+
+    def add_sentence(self, text):
+        if self.cancelled.is_set() or not text or not text.strip():
+            return
+        self._text_queue.put((self._next_index, text))
+        self._next_index += 1
+
+    def finish(self):
+        self._text_queue.put(self._END)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def _synthesis_worker(self):
+        while True:
+            item = self._text_queue.get()
+            if item is self._END:
+                self._audio_queue.put(self._END)
+                return
+            if self.cancelled.is_set():
+                continue
+            index, text = item
+            try:
+                handle = self.synthesize(text, index)
+            except Exception as e:
+                print(f"Error synthesizing sentence {index}: {e}")
+                continue
+            if handle is not None:
+                self._audio_queue.put(handle)
+
+    def _playback_worker(self):
+        try:
+            while True:
+                handle = self._audio_queue.get()
+                if handle is self._END:
+                    return
+                if self.cancelled.is_set():
+                    self._discard(handle)
+                    continue
+                if not self.playback_started.is_set():
+                    self.playback_started.set()
+                    if self.on_playback_start:
+                        self.on_playback_start()
+                try:
+                    completed = self.play(handle)
+                except Exception as e:
+                    print(f"Error playing sentence audio: {e}")
+                    completed = True
+                self.sentences_spoken += 1
+                if completed is False:
+                    self.cancel()
+        finally:
+            self.finished.set()
+
+    def _discard(self, handle):
+        if self.discard:
+            try:
+                self.discard(handle)
+            except Exception as e:
+                print(f"Error discarding sentence audio: {e}")
@@ -0,0 +1,187 @@
+import importlib.machinery
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from threading import Lock, local, get_ident, current_thread
+
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+DEFAULT_REPORT_NAME = "startup_profile.json"
+TOP_IMPORTS_IN_SUMMARY = 15
+_TIMED_LOADERS = (importlib.machinery.SourceFileLoader, importlib.machinery.SourcelessFileLoader,
+                  importlib.machinery.ExtensionFileLoader)  # Created per module, unlike built-in/frozen loaders
+
+
+class _ImportTimer:
+    """
+    Meta path finder that only times: it lets the regular finders resolve the module and wraps
+    exec_module of file-based loaders, so every import (on any thread) becomes a nested span.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._local = local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+        if spec is None or not isinstance(spec.loader, _TIMED_LOADERS):
+            return spec
+        exec_module = spec.loader.exec_module
+        profiler = self.profiler
+
+        def timed_exec_module(module):
+            with profiler.span(fullname, category="import"):
+                exec_module(module)
+
+        spec.loader.exec_module = timed_exec_module
+        return spec
+
+
+class StartupProfiler:
+    """
+    Records the startup timeline when main.py runs with --profile-startup[=path]: phases (spans with
+    a start and duration), marks (points in time) and the cost of every module imported meanwhile.
+    All times are time.perf_counter() offsets from start(), in milliseconds.
+
+    finish() writes a Chrome trace event file (chrome://tracing, Perfetto, speedscope show it as a
+    flame graph per thread) with a summary of the phases, marks and most expensive imports added.
+    Everything is a no-op unless start() was called, and again after finish().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path = None
+        self._t0 = 0.0
+        self._lock = Lock()
+        self._local = local()
+        self._events = []
+        self._marks = {}
+        self._imports = {}  # Module -> (total ms, self ms, thread name)
+        self._import_timer = None
+
+    def start(self, report_path=None):
+        self._t0 = time.perf_counter()
+        self.report_path = report_path
+        self.enabled = True
+        self._import_timer = _ImportTimer(self)
+        sys.meta_path.insert(0, self._import_timer)
+        return self
+
+    def _now_ms(self):
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    @contextmanager
+    def span(self, name, category="phase"):
+        if not self.enabled:
+            yield
+            return
+        stack = self._local.__dict__.setdefault("stack", [])
+        frame = [name, 0.0]  # Name, time spent in nested spans
+        stack.append(frame)
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            duration = self._now_ms() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += duration
+            self._record(name, category, start, duration, duration - frame[1])
+
+    def phase(self, name):
+        return self.span(name, category="phase")
+
+    def _record(self, name, category, start, duration, self_duration):
+        thread = current_thread().name
+        with self._lock:
+            if not self.enabled:
+                return
+            self._events.append({"name": name, "cat": category, "ph": "X", "ts": round(start * 1000.0),
+                                 "dur": round(duration * 1000.0), "pid": os.getpid(), "tid": get_ident(),
+                                 "args": {"thread": thread}})
+            if category == "import":
+                self._imports[name] = (duration, self_duration, thread)
+
+    def mark(self, name):
+        """Records the first time name happens, e.g. 'tray_visible'."""
+        if not self.enabled or name in self._marks:
+            return
+        at = self._now_ms()
+        with self._lock:
+            if not self.enabled or name in self._marks:
+                return
+            self._marks[name] = at
+            self._events.append({"name": name, "cat": "mark", "ph": "i", "s": "p", "ts": round(at * 1000.0),
+                                 "pid": os.getpid(), "tid": get_ident()})
+
+    def report(self):
+        with self._lock:
+            phases = {}
+            for event in sorted(self._events, key=lambda event: event["ts"]):
+                if event["cat"] == "phase" and event["name"] not in phases:
+                    phases[event["name"]] = {"start_ms": round(event["ts"] / 1000.0, 1),
+                                             "duration_ms": round(event["dur"] / 1000.0, 1),
+                                             "thread": event["args"]["thread"]}
+            imports = sorted(self._imports.items(), key=lambda entry: entry[1][1], reverse=True)
+            return {
+                "traceEvents": list(self._events),
+                "displayTimeUnit": "ms",
+                "phases": phases,
+                "marks_ms": {name: round(at, 1) for name, at in self._marks.items()},
+                "imports": [{"module": module, "self_ms": round(self_ms, 2), "total_ms": round(total_ms, 2),
+                             "thread": thread} for module, (total_ms, self_ms, thread) in imports],
+                "import_self_ms_total": round(sum(entry[1][1] for entry in imports), 1),
+            }
+
+    def finish(self, default_path=None):
+        """Stops recording, writes the report and returns its path (None if profiling was off)."""
+        if not self.enabled:
+            return None
+        report = self.report()
+        self.enabled = False
+        if self._import_timer in sys.meta_path:
+            sys.meta_path.remove(self._import_timer)
+        path = self.report_path or default_path or DEFAULT_REPORT_NAME
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=1)
+        except OSError as e:
+            print(f"Could not write startup profile to '{path}': {e}")
+            return None
+        print("Startup profile:")
+        for name, phase in report["phases"].items():
+            print(f"  {name}: {phase['duration_ms']:.1f} ms (at {phase['start_ms']:.1f} ms, {phase['thread']})")
+        for name, at in report["marks_ms"].items():
+            print(f"  {name} at {at:.1f} ms")
+        print(f"  Imports: {report['import_self_ms_total']:.1f} ms in {len(report['imports'])} modules, most expensive:")
+        for entry in report["imports"][:TOP_IMPORTS_IN_SUMMARY]:
+            print(f"    {entry['module']}: {entry['self_ms']:.1f} ms self, {entry['total_ms']:.1f} ms total")
+        print(f"Startup profile written to '{path}'.")
+        return path
+
+
+def profile_startup_requested(argv):
+    """(requested, report path or None) for --profile-startup or --profile-startup=path in argv."""
+    for arg in argv[1:]:
+        if arg == PROFILE_STARTUP_FLAG:
+            return True, None
+        if arg.startswith(PROFILE_STARTUP_FLAG + "="):
+            return True, arg.split("=", 1)[1] or None
+    return False, None
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,72 @@
+"""
+Measures how long Manfred AI takes from process start until the tray icon is visible.
+
+    python startup_timing.py [--runs 5] [--timeout 60]
+
+Every run starts main.py in a fresh interpreter with MANFRED_STARTUP_TIMING_FILE set. The app
+writes the time at which the tray became visible into that file and exits again. The first run
+is reported separately because it also pays for cold disk caches. Close a running instance first,
+the single-instance lock would stop the measured one.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(APP_DIR, "main.py")
+STARTUP_TIMING_ENV = "MANFRED_STARTUP_TIMING_FILE"
+
+
+def measure_once(timeout):
+    fd, timing_file = tempfile.mkstemp(prefix="manfred_startup_", suffix=".json")
+    os.close(fd)
+    os.remove(timing_file)
+    env = dict(os.environ, **{STARTUP_TIMING_ENV: timing_file})
+    started = time.time()
+    process = subprocess.Popen([sys.executable, MAIN_SCRIPT], cwd=APP_DIR, env=env)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    try:
+        with open(timing_file, "r", encoding="utf-8") as f:
+            return json.load(f)["tray_visible"] - started
+    except (OSError, ValueError, KeyError):
+        return None
+    finally:
+        if os.path.exists(timing_file):
+            os.remove(timing_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for one run to exit")
+    args = parser.parse_args()
+
+    results = []
+    for run in range(1, args.runs + 1):
+        duration = measure_once(args.timeout)
+        if duration is None:
+            print(f"Run {run}: the tray did not become visible within {args.timeout:.0f} s.")
+            continue
+        print(f"Run {run}: tray visible after {duration:.3f} s")
+        results.append(duration)
+
+    if not results:
+        sys.exit(1)
+    print(f"First run: {results[0]:.3f} s")
+    if len(results) > 1:
+        warm = results[1:]
+        print(f"Later runs: median {statistics.median(warm):.3f} s, min {min(warm):.3f} s, max {max(warm):.3f} s")
+
+
+if __name__ == "__main__":
+    main()
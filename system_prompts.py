@@ -0,0 +1,164 @@
+import json
+import os
+
+from config_store import config_store
+
+
+# Constants related to system prompts
+SYSPROMPTS_FILE = "sysprompts.json"
+# SYSTEM_PROMPT_SUFFIX is now dynamically generated in get_full_system_prompt
+# Original for reference (will not be used directly by get_full_system_prompt anymore):
+# SYSTEM_PROMPT_SUFFIX = (
+#     "\n\nGenerate the reply so that a simple TTS can read it correctly. "
+#     "\nYou can open links on my PC by just including them in your message without formatting; "
+#     "just start links with https://. Also use this when the user asks you to search on a website like YouTube."
+# )
+
+# Define keys for agent-specific settings within the sysprompts.json structure
+AGENT_SETTING_TEXT = "text"
+AGENT_SETTING_ACTIVATION_WORD = "activation_word_override"
+AGENT_SETTING_STOP_WORDS = "stop_words_override"
+AGENT_SETTING_CHAT_LENGTH = "chat_length_override"
+AGENT_SETTING_CHAT_TOKEN_BUDGET = "chat_token_budget_override"
+AGENT_SETTING_TTS_VOICE = "tts_voice_override"
+AGENT_SETTING_OPEN_LINKS = "open_links_automatically_override"
+
+
+def load_system_prompts(default_prompt_name, default_prompt_text):
+    """System prompts snapshot from the in-memory config store, sysprompts.json is only parsed (and migrated) once."""
+    config_store.register("system_prompts",
+                          lambda: _read_system_prompts_file(default_prompt_name, default_prompt_text),
+                          _write_system_prompts_file)
+    return config_store.get("system_prompts")
+
+
+def _read_system_prompts_file(default_prompt_name, default_prompt_text):
+    default_agent_config = {
+        AGENT_SETTING_TEXT: default_prompt_text,
+        AGENT_SETTING_ACTIVATION_WORD: None,
+        AGENT_SETTING_STOP_WORDS: None,
+        AGENT_SETTING_CHAT_LENGTH: None,
+        AGENT_SETTING_CHAT_TOKEN_BUDGET: None,
+        AGENT_SETTING_TTS_VOICE: None,
+        AGENT_SETTING_OPEN_LINKS: None,
+    }
+
+    if not os.path.exists(SYSPROMPTS_FILE):
+        try:
+            with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
+                json.dump({default_prompt_name: default_agent_config}, f, indent=4, ensure_ascii=False)
+            print(f"'{SYSPROMPTS_FILE}' not found. Created with default system prompt structure.")
+            return {default_prompt_name: default_agent_config}
+        except Exception as e:
+            print(f"Error creating default system prompts file: {e}")
+            return {default_prompt_name: default_agent_config}
+
+    try:
+        with open(SYSPROMPTS_FILE, "r", encoding="utf-8") as f:
+            prompts = json.load(f)
+            if not isinstance(prompts, dict) or not prompts:
+                raise ValueError("Invalid format or empty prompts file.")
+
+            migrated = False
+            for name, data in prompts.items():
+                if isinstance(data, str):  # Old format: value is just the prompt text
+                    prompts[name] = {
+                        AGENT_SETTING_TEXT: data,
+                        AGENT_SETTING_ACTIVATION_WORD: None,
+                        AGENT_SETTING_STOP_WORDS: None,
+                        AGENT_SETTING_CHAT_LENGTH: None,
+                        AGENT_SETTING_CHAT_TOKEN_BUDGET: None,
+                        AGENT_SETTING_TTS_VOICE: None,
+                        AGENT_SETTING_OPEN_LINKS: None,
+                    }
+                    migrated = True
+                elif isinstance(data, dict):  # New format, ensure all keys exist
+                    updated_data = False
+                    if AGENT_SETTING_TEXT not in data:  # Should not happen if migrated from string
+                        data[
+                            AGENT_SETTING_TEXT] = default_prompt_text if name == default_prompt_name else "Missing prompt text."
+                        updated_data = True
+                    for key in [AGENT_SETTING_ACTIVATION_WORD, AGENT_SETTING_STOP_WORDS,
+                                AGENT_SETTING_CHAT_LENGTH, AGENT_SETTING_CHAT_TOKEN_BUDGET,
+                                AGENT_SETTING_TTS_VOICE, AGENT_SETTING_OPEN_LINKS]:
+                        if key not in data:
+                            data[key] = None
+                            updated_data = True
+                    if updated_data:
+                        migrated = True  # Mark for saving if any key was added
+
+            if default_prompt_name not in prompts:
+                prompts[default_prompt_name] = default_agent_config.copy()
+                migrated = True
+            elif not isinstance(prompts[default_prompt_name], dict) or AGENT_SETTING_TEXT not in prompts[
+                default_prompt_name]:
+                # Ensure default prompt is correctly structured if it existed but was malformed
+                prompts[default_prompt_name] = default_agent_config.copy()
+                if isinstance(prompts[default_prompt_name], str):  # if it was a string before
+                    prompts[default_prompt_name][AGENT_SETTING_TEXT] = prompts[default_prompt_name]
+                migrated = True
+
+            if migrated:
+                _save_prompts_internal(prompts)
+                print(f"System prompts in '{SYSPROMPTS_FILE}' were migrated/updated to new structure and saved.")
+            return prompts
+    except Exception as e:
+        print(f"Error loading system prompts: {e}. Returning default prompt structure.")
+        return {default_prompt_name: default_agent_config.copy()}
+
+
+def _save_prompts_internal(prompts_dict):
+    """Internal save without UI, for use within load_system_prompts."""
+    try:
+        with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(prompts_dict, f, indent=4, ensure_ascii=False)
+        return True
+    except Exception as e:
+        print(f"Error saving system prompts internally: {e}")
+        return False
+
+
+def _write_system_prompts_file(prompts_dict):
+    with open(SYSPROMPTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(prompts_dict, f, indent=4, ensure_ascii=False)
+
+
+def get_full_system_prompt(prompt_name, all_prompts_data,
+                           global_activation_word, global_open_links_setting,
+                           default_prompt_text_if_missing,
+                           effective_tts_voice_id, voice_catalog):  # Added new parameters
+    agent_config = all_prompts_data.get(prompt_name, {})
+    if not isinstance(agent_config, dict):  # Should not happen with new load_system_prompts
+        base_text = default_prompt_text_if_missing
+        activation_word_to_use = global_activation_word
+        effective_open_links = global_open_links_setting
+    else:
+        base_text = agent_config.get(AGENT_SETTING_TEXT, default_prompt_text_if_missing)
+        agent_specific_activation_word = agent_config.get(AGENT_SETTING_ACTIVATION_WORD)
+        activation_word_to_use = agent_specific_activation_word if agent_specific_activation_word else global_activation_word
+
+        # Determine effective open_links setting for this agent
+        agent_specific_open_links = agent_config.get(AGENT_SETTING_OPEN_LINKS)  # This can be True, False, or None
+        if agent_specific_open_links is None:
+            effective_open_links = global_open_links_setting
+        else:
+            effective_open_links = agent_specific_open_links
+
+    base_text = base_text.replace("{name}", activation_word_to_use)
+
+    # Construct the dynamic suffix parts
+    tts_instruction_part = "\n\nGenerate the reply so that a simple TTS can read it correctly."
+
+    language_instruction_part = ""
+    effective_voice = voice_catalog.voice(effective_tts_voice_id) if effective_tts_voice_id and voice_catalog else None
+    if effective_voice:
+        language_instruction_part = f"\nSpeak in fluent {effective_voice.language_name}."
+
+    links_instruction_part = ""
+    if effective_open_links:
+        links_instruction_part = "\nYou can open links on the users computer by just putting them somewhere in your response with https:// if the user ask you to google something you can also open it with url parameters."
+    else:
+        links_instruction_part = "\nYou can't open links on the users computer because he has this setting disabled."
+
+    dynamic_suffix = tts_instruction_part + language_instruction_part + links_instruction_part
+    return base_text + dynamic_suffix
@@ -0,0 +1,51 @@
+import io
+from threading import Event
+
+from lazy_import import lazy_module
+
+edge_tts = lazy_module("edge_tts")
+pygame = lazy_module("pygame")
+
+
+TTS_AUDIO_FORMAT = "mp3"
+TTS_OUTPUT_FORMAT_ID = "audio-24khz-48kbitrate-mono-mp3"  # What edge-tts streams by default
+PLAYBACK_POLL_INTERVAL = 0.02
+
+
+async def synthesize_speech(text, voice):
+    """Collects the edge-tts audio chunks in memory and returns them as one mp3 byte string."""
+    audio_buffer = bytearray()
+    async for chunk in edge_tts.Communicate(text=text, voice=voice).stream():
+        if chunk.get("type") == "audio" and chunk.get("data"):
+            audio_buffer.extend(chunk["data"])
+    return bytes(audio_buffer)
+
+
+def play_audio_bytes(audio_bytes, stop_event=None, cancel_event=None):
+    """
+    Hands mp3 bytes straight to the pygame mixer and blocks until playback ends. A sound that is
+    still playing (e.g. the listening chime) is allowed to finish first instead of being cut off.
+    Returns False if playback was interrupted by stop_event or cancel_event.
+    """
+    if not audio_bytes:
+        return True
+    if not pygame.mixer.get_init():
+        print("Pygame mixer not initialized. Cannot play audio.")
+        return True
+
+    stop_event = stop_event or Event()
+    while pygame.mixer.music.get_busy():
+        if stop_event.wait(PLAYBACK_POLL_INTERVAL) or (cancel_event and cancel_event.is_set()):
+            return False
+    audio_stream = io.BytesIO(audio_bytes)  # Must stay referenced until the music is unloaded
+    pygame.mixer.music.load(audio_stream, TTS_AUDIO_FORMAT)
+    pygame.mixer.music.play()
+
+    interrupted = False
+    while pygame.mixer.music.get_busy():
+        if stop_event.wait(PLAYBACK_POLL_INTERVAL) or (cancel_event and cancel_event.is_set()):
+            interrupted = True
+            pygame.mixer.music.stop()
+            break
+    pygame.mixer.music.unload()
+    return not interrupted
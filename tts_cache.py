@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+
+from tts_audio import TTS_AUDIO_FORMAT, TTS_OUTPUT_FORMAT_ID, synthesize_speech
+
+
+DEFAULT_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+
+def normalize_phrase(text):
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class PhraseCache:
+    """
+    On-disk, content-addressed cache for synthesized phrases.
+
+    Entries are keyed by (voice id, normalized text, output format) and stored as one file per
+    phrase. The least recently used entries are evicted once the byte budget is exceeded; file
+    mtimes carry the recency across restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_BYTES, output_format=TTS_OUTPUT_FORMAT_ID):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.output_format = output_format
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._lock = Lock()
+        self._load_index()
+
+    def make_key(self, voice, text):
+        raw_key = "\x1f".join((voice or "", normalize_phrase(text), self.output_format))
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{TTS_AUDIO_FORMAT}")
+
+    def _load_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            found = []
+            for filename in os.listdir(self.cache_dir):
+                key, ext = os.path.splitext(filename)
+                if ext == ".tmp":  # Left over from a write that was interrupted
+                    self._remove_file(os.path.join(self.cache_dir, filename))
+                    continue
+                if ext != f".{TTS_AUDIO_FORMAT}":
+                    continue
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+                found.append((stat.st_mtime, key, stat.st_size))
+            for _, key, size in sorted(found):
+                self._entries[key] = size
+                self._total_bytes += size
+            self._remove_entries(self._evict_locked())
+            print(f"TTS phrase cache loaded: {len(self._entries)} entries, {self._total_bytes // 1024} KB.")
+        except OSError as e:
+            print(f"Error loading TTS phrase cache from '{self.cache_dir}': {e}")
+
+    def contains(self, voice, text):
+        with self._lock:
+            return self.make_key(voice, text) in self._entries
+
+    def get(self, voice, text):
+        key = self.make_key(voice, text)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path_for(key)  # Read outside the lock, lookups of other phrases don't wait for the disk
+        try:
+            with open(path, "rb") as f:
+                audio_bytes = f.read()
+            os.utime(path)
+        except OSError as e:
+            print(f"Error reading cached phrase {key[:12]}: {e}")
+            with self._lock:
+                self._forget_locked(key)
+                self.misses += 1
+            self._remove_file(path)
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio_bytes
+
+    def put(self, voice, text, audio_bytes):
+        if not audio_bytes or len(audio_bytes) > self.max_bytes:
+            return
+        key = self.make_key(voice, text)
+        path = self._path_for(key)
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)  # Unique, puts of one phrase can overlap
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing cached phrase {key[:12]}: {e}")
+            if temp_path:
+                self._remove_file(temp_path)
+            return
+        with self._lock:
+            self._total_bytes += len(audio_bytes) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio_bytes)
+            evicted = self._evict_locked()
+        self._remove_entries(evicted)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            evicted = self._evict_locked()
+        self._remove_entries(evicted)
+
+    def _evict_locked(self):
+        """Drops least recently used entries over the budget and returns their keys, the files are removed by the caller."""
+        evicted = []
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._forget_locked(oldest_key)
+            evicted.append(oldest_key)
+            self.evictions += 1
+        return evicted
+
+    def _forget_locked(self, key):
+        self._total_bytes -= self._entries.pop(key, 0)
+
+    def _remove_entries(self, keys):
+        for key in keys:
+            self._remove_file(self._path_for(key))
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+async def prewarm_phrases(cache, voice, phrases, max_concurrency=3, should_continue=None):
+    """Synthesizes every phrase not cached yet for voice, at most max_concurrency at a time."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    by_key = {}  # Phrases that only differ in whitespace or normalization share one cache entry
+    for phrase in phrases:
+        if phrase:
+            by_key.setdefault(cache.make_key(voice, phrase), phrase)
+    missing = [phrase for phrase in by_key.values() if not cache.contains(voice, phrase)]
+
+    async def _warm(phrase):
+        async with semaphore:
+            if should_continue and not should_continue():
+                return False
+            try:
+                audio_bytes = await synthesize_speech(phrase, voice)
+            except Exception as e:
+                print(f"Error pre-warming phrase '{phrase}': {e}")
+                return False
+            await asyncio.to_thread(cache.put, voice, phrase, audio_bytes)
+            return bool(audio_bytes)
+
+    results = await asyncio.gather(*(_warm(phrase) for phrase in missing))
+    return sum(1 for warmed in results if warmed)
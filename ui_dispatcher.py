@@ -0,0 +1,94 @@
+from collections import deque
+from threading import Lock
+
+
+DRAIN_INTERVAL_MS = 30
+IDLE_DRAIN_INTERVAL_MS = 250
+
+
+class UIDispatcher:
+    """
+    Hands UI work from worker threads to the Tk thread without calling into Tcl from those threads.
+
+    post() only appends to a deque; the Tk thread runs everything queued on one after() timer once
+    attach(root) was called (until then posts wait). While nothing is posted the timer backs off,
+    doubling up to idle_interval_ms, so an idle window is not woken ~33 times a second; the first
+    post after a pause waits at most that long. Posts with a key replace a still-pending post with
+    the same key, so e.g. only the latest overlay mode is applied when several arrive between two
+    drains. Callbacks run in posting order, except that a replaced keyed post keeps the place of
+    the first one.
+    """
+
+    def __init__(self, interval_ms=DRAIN_INTERVAL_MS, idle_interval_ms=IDLE_DRAIN_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self.idle_interval_ms = max(interval_ms, idle_interval_ms)
+        self._next_interval_ms = interval_ms
+        self.root = None
+        self._queue = deque()  # (key, callback, args); append/popleft are thread-safe
+        self._latest = {}  # key -> (callback, args) of the newest post
+        self._lock = Lock()
+        self._timer = None
+        self.posted = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def attach(self, root):
+        self.root = root
+        if self._timer is None:
+            self._timer = root.after(self.interval_ms, self._drain)
+
+    def post(self, callback, *args, key=None):
+        if key is None:
+            self._queue.append((None, callback, args))
+        else:
+            with self._lock:
+                if key in self._latest:
+                    self.coalesced += 1
+                else:
+                    self._queue.append((key, None, None))
+                self._latest[key] = (callback, args)
+        self.posted += 1
+        depth = len(self._queue)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def depth(self):
+        return len(self._queue)
+
+    def _drain(self):
+        self._timer = None
+        pending = len(self._queue)
+        for _ in range(pending):  # Only what was queued so far, posts made by callbacks wait a tick
+            key, callback, args = self._queue.popleft()
+            if key is not None:
+                with self._lock:
+                    callback, args = self._latest.pop(key)
+            try:
+                callback(*args)
+                self.executed += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in UI callback {getattr(callback, '__name__', callback)}: {e}")
+        if pending or self._queue:
+            self._next_interval_ms = self.interval_ms
+        else:
+            self._next_interval_ms = min(self._next_interval_ms * 2, self.idle_interval_ms)
+        try:
+            self._timer = self.root.after(self._next_interval_ms, self._drain)
+        except Exception:
+            pass  # Window destroyed, nothing left to drain into
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "posted": self.posted,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+ui_dispatcher = UIDispatcher()
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+FRAME_DURATION = 0.02  # 20 ms analysis frames
+SPEECH_BAND_HZ = (100, 4000)
+_EPSILON = 1e-10
+
+
+def pcm_to_float(frame_data, sample_width):
+    """Converts little-endian PCM bytes to a float32 array in [-1, 1]."""
+    if sample_width == 1:
+        return (np.frombuffer(frame_data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(frame_data, dtype=np.int16).astype(np.float32) / 32768.0
+    if sample_width == 3:
+        raw = np.frombuffer(frame_data, dtype=np.uint8)
+        raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+        return samples.astype(np.float32) / 8388608.0
+    if sample_width == 4:
+        return np.frombuffer(frame_data, dtype=np.int32).astype(np.float32) / 2147483648.0
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def frame_signal(samples, sample_rate, frame_duration=FRAME_DURATION):
+    frame_length = max(1, int(sample_rate * frame_duration))
+    frame_count = len(samples) // frame_length
+    return samples[:frame_count * frame_length].reshape(frame_count, frame_length)  # View, no copy
+
+
+def frame_features(frames, sample_rate):
+    """Per-frame energy in dB, zero-crossing rate and spectral flatness within the speech band."""
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + _EPSILON)
+    signs = np.signbit(frames)
+    zero_crossing_rate = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 + _EPSILON
+    freqs = np.fft.rfftfreq(frames.shape[1], d=1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    if np.count_nonzero(band) > 1:
+        power = power[:, band]
+    spectral_flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return energy_db, zero_crossing_rate, spectral_flatness
+
+
+class VoiceActivityDetector:
+    """
+    Decides locally whether captured audio contains speech before it is sent to cloud STT.
+
+    Every 20 ms frame is scored by short-time energy against an adaptive noise floor, by its
+    zero-crossing rate and by its spectral flatness (noise is flat, voiced speech is peaky).
+    The audio counts as speech once enough frames pass all three tests.
+    """
+
+    def __init__(self, energy_margin_db=9.0, max_spectral_flatness=0.5, zcr_range=(0.01, 0.35),
+                 min_speech_duration=0.15, noise_adaptation_rate=0.1, noise_percentile=10):
+        self.energy_margin_db = energy_margin_db
+        self.max_spectral_flatness = max_spectral_flatness
+        self.zcr_range = zcr_range
+        self.min_speech_duration = min_speech_duration
+        self.noise_adaptation_rate = noise_adaptation_rate
+        self.noise_percentile = noise_percentile
+        self.noise_floor_db = None
+        self.checked = 0
+        self.suppressed = 0
+
+    def _update_noise_floor(self, energy_db):
+        quiet_level = float(np.percentile(energy_db, self.noise_percentile))
+        if self.noise_floor_db is None:
+            self.noise_floor_db = quiet_level
+        else:
+            self.noise_floor_db += self.noise_adaptation_rate * (quiet_level - self.noise_floor_db)
+
+    def speech_frame_mask(self, samples, sample_rate):
+        frames = frame_signal(samples, sample_rate)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        energy_db, zero_crossing_rate, spectral_flatness = frame_features(frames, sample_rate)
+        self._update_noise_floor(energy_db)
+        return ((energy_db > self.noise_floor_db + self.energy_margin_db)
+                & (zero_crossing_rate >= self.zcr_range[0]) & (zero_crossing_rate <= self.zcr_range[1])
+                & (spectral_flatness < self.max_spectral_flatness))
+
+    def is_speech(self, samples, sample_rate):
+        speech_frames = np.count_nonzero(self.speech_frame_mask(samples, sample_rate))
+        return speech_frames * FRAME_DURATION >= self.min_speech_duration
+
+    def contains_speech(self, audio_data):
+        """Checks a speech_recognition AudioData and counts the request as suppressed if it holds no speech."""
+        self.checked += 1
+        samples = pcm_to_float(audio_data.frame_data, audio_data.sample_width)
+        if self.is_speech(samples, audio_data.sample_rate):
+            return True
+        self.suppressed += 1
+        return False
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "suppressed": self.suppressed,
+            "noise_floor_db": round(self.noise_floor_db, 1) if self.noise_floor_db is not None else None,
+        }
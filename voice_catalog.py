@@ -0,0 +1,189 @@
+class VoiceInfo:
+    def __init__(self, voice_id, name, language_key, language_code, flag, preview_text):
+        self.voice_id = voice_id
+        self.name = name  # Short name shown in the voice combobox, e.g. "Katja"
+        self.language_key = language_key  # e.g. "English (US)"
+        self.language_code = language_code  # e.g. "en-US"
+        self.flag = flag
+        self.preview_text = preview_text
+
+    @property
+    def language_name(self):
+        """'English' for 'English (US)', used in the system prompt."""
+        return self.language_key.split(" (")[0]
+
+
+class VoiceCatalog:
+    """
+    Read-only index over TTS_VOICES_STRUCTURED, built once so that lookups by voice id, by the
+    "<flag> <language>" string shown in the comboboxes and by language code are dict lookups
+    instead of scans over every language and voice.
+    """
+
+    def __init__(self, voices_structured):
+        self.languages = voices_structured
+        self._voices_by_id = {}
+        self._language_by_display_name = {}
+        self._display_names = {}
+        self._voice_names = {}
+        self._voices_by_code = {}
+        self._sorted_display_names = {}  # Preferred language code -> combobox values
+        for language_key, language_data in voices_structured.items():
+            display_name = f"{language_data['flag']} {language_key}"
+            self._display_names[language_key] = display_name
+            self._language_by_display_name[display_name] = language_key
+            self._voice_names[language_key] = sorted(language_data.get("voices", {}))
+            for name, voice_id in language_data.get("voices", {}).items():
+                voice = VoiceInfo(voice_id, name, language_key, language_data["code"], language_data["flag"],
+                                  language_data.get("preview_text"))
+                self._voices_by_id.setdefault(voice_id, voice)
+                self._voices_by_code.setdefault(language_data["code"], []).append(voice)
+
+    def voice(self, voice_id):
+        """VoiceInfo for a voice id such as 'en-US-AriaNeural', or None."""
+        return self._voices_by_id.get(voice_id)
+
+    def display_name(self, language_key):
+        return self._display_names.get(language_key)
+
+    def language_key(self, display_name):
+        """Language key for a '<flag> <language>' combobox value, or None."""
+        return self._language_by_display_name.get(display_name)
+
+    def voice_names(self, language_key):
+        """Sorted short voice names of a language (a new list, safe to hand to a widget)."""
+        return list(self._voice_names.get(language_key, ()))
+
+    def voice_id(self, display_name, voice_name):
+        """Voice id for a language combobox value and a short voice name, or None."""
+        language_key = self.language_key(display_name)
+        if language_key is None:
+            return None
+        return self.languages[language_key]["voices"].get(voice_name)
+
+    def voices_for_code(self, language_code):
+        return list(self._voices_by_code.get(language_code, ()))
+
+    def sorted_display_names(self, preferred_code=None):
+        """Combobox values: the language matching preferred_code first, then English, then the rest A-Z."""
+        if preferred_code not in self._sorted_display_names:
+            preferred = self._voices_by_code.get(preferred_code)
+            sorted_keys = [preferred[0].language_key] if preferred else []
+            english_keys = sorted(key for key, data in self.languages.items() if data["code"].startswith("en-"))
+            for language_key in english_keys + sorted(self.languages):
+                if language_key not in sorted_keys:
+                    sorted_keys.append(language_key)
+            self._sorted_display_names[preferred_code] = [self._display_names[key] for key in sorted_keys]
+        return list(self._sorted_display_names[preferred_code])
+
+
+TTS_VOICES_STRUCTURED = {
+    "German": {
+        "code": "de-DE", "flag": "🇩🇪",
+        "preview_text": "Dies ist ein Test der ausgewählten Stimme.",
+        "voices": {
+            "Amala": "de-DE-AmalaNeural",
+            "Conrad": "de-DE-ConradNeural",
+            "Katja": "de-DE-KatjaNeural"
+        }
+    },
+    "English (US)": {
+        "code": "en-US", "flag": "🇺🇸",
+        "preview_text": "This is a test of the selected voice.",
+        "voices": {
+            "Aria": "en-US-AriaNeural",
+            "Jenny": "en-US-JennyNeural",
+            "Guy": "en-US-GuyNeural"
+        }
+    },
+    "English (GB)": {
+        "code": "en-GB", "flag": "🇬🇧",
+        "preview_text": "This is a test of the selected voice.",
+        "voices": {
+            "Libby": "en-GB-LibbyNeural",
+            "Ryan": "en-GB-RyanNeural"
+        }
+    },
+    "French": {
+        "code": "fr-FR", "flag": "🇫🇷",
+        "preview_text": "Ceci est un test de la voix sélectionnée.",
+        "voices": {
+            "Denise": "fr-FR-DeniseNeural",
+            "Henri": "fr-FR-HenriNeural"
+        }
+    },
+    "Spanish (Spain)": {
+        "code": "es-ES", "flag": "🇪🇸",
+        "preview_text": "Esta es una prueba de la voz seleccionada.",
+        "voices": {
+            "Alvaro": "es-ES-AlvaroNeural",
+            "Elvira": "es-ES-ElviraNeural"
+        }
+    },
+    "Italian": {
+        "code": "it-IT", "flag": "🇮🇹",
+        "preview_text": "Questa è una prova della voce selezionata.",
+        "voices": {
+            "Diego": "it-IT-DiegoNeural",
+            "Elsa": "it-IT-ElsaNeural"
+        }
+    },
+    "Portuguese (Portugal)": {
+        "code": "pt-PT", "flag": "🇵🇹",
+        "preview_text": "Este é um teste da voz selecionada.",
+        "voices": {
+            "Duarte": "pt-PT-DuarteNeural",
+            "Raquel": "pt-PT-RaquelNeural"
+        }
+    },
+    "Dutch": {
+        "code": "nl-NL", "flag": "🇳🇱",
+        "preview_text": "Dit is een test van de geselecteerde stem.",
+        "voices": {
+            "Colette": "nl-NL-ColetteNeural",
+            "Maarten": "nl-NL-MaartenNeural"
+        }
+    },
+    "Polish": {
+        "code": "pl-PL", "flag": "🇵🇱",
+        "preview_text": "To jest test wybranego głosu.",
+        "voices": {
+            "Marek": "pl-PL-MarekNeural",
+            "Zofia": "pl-PL-ZofiaNeural"
+        }
+    },
+    "Swedish": {
+        "code": "sv-SE", "flag": "🇸🇪",
+        "preview_text": "Detta är ett test av den valda rösten.",
+        "voices": {
+            "Mattias": "sv-SE-MattiasNeural",
+            "Sofie": "sv-SE-SofieNeural"
+        }
+    },
+    "Danish": {
+        "code": "da-DK", "flag": "🇩🇰",
+        "preview_text": "Dette er en test af den valgte stemme.",
+        "voices": {
+            "Jeppe": "da-DK-JeppeNeural",
+            "Christel": "da-DK-ChristelNeural"
+        }
+    },
+    "Norwegian (Bokmål)": {
+        "code": "nb-NO", "flag": "🇳🇴",
+        "preview_text": "Dette er en test av den valgte stemmen.",
+        "voices": {
+            "Finn": "nb-NO-FinnNeural",
+            "Pernille": "nb-NO-PernilleNeural"
+        }
+    },
+    "Finnish": {
+        "code": "fi-FI", "flag": "🇫🇮",
+        "preview_text": "Tämä on valitun äänen testi.",
+        "voices": {
+            "Harri": "fi-FI-HarriNeural",
+            "Noora": "fi-FI-NooraNeural"
+        }
+    }
+}
+
+voice_catalog = VoiceCatalog(TTS_VOICES_STRUCTURED) # Built once, answers the voice lookups of the settings and agent windows
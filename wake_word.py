@@ -0,0 +1,203 @@
+import hashlib
+import os
+import re
+import numpy as np
+
+from vad import pcm_to_float, frame_signal
+
+
+MFCC_FRAME_DURATION = 0.025
+MFCC_HOP_DURATION = 0.010
+MFCC_NUM_CEPSTRA = 13
+MFCC_NUM_MEL_BANDS = 26
+MFCC_MAX_FREQUENCY = 7600
+THRESHOLD_MARGIN = 1.35  # Accept utterances up to this factor above the mean template-to-template distance
+DEFAULT_THRESHOLD = 0.9
+DTW_REPEAT_PENALTY = 0.3  # Extra cost for mapping two template frames onto the same utterance frame
+_EPSILON = 1e-10
+
+_mel_filterbank_cache = {}
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+
+def _mel_filterbank(sample_rate, fft_size):
+    cache_key = (sample_rate, fft_size)
+    if cache_key not in _mel_filterbank_cache:
+        max_frequency = min(sample_rate / 2.0, MFCC_MAX_FREQUENCY)
+        mel_points = np.linspace(_hz_to_mel(0.0), _hz_to_mel(max_frequency), MFCC_NUM_MEL_BANDS + 2)
+        bins = np.floor((fft_size + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+        filterbank = np.zeros((MFCC_NUM_MEL_BANDS, fft_size // 2 + 1), dtype=np.float32)
+        for band in range(1, MFCC_NUM_MEL_BANDS + 1):
+            left, center, right = bins[band - 1], bins[band], bins[band + 1]
+            if center > left:
+                filterbank[band - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                filterbank[band - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        _mel_filterbank_cache[cache_key] = filterbank
+    return _mel_filterbank_cache[cache_key]
+
+
+def _dct_matrix(num_cepstra, num_bands):
+    n = np.arange(num_bands)
+    k = np.arange(num_cepstra)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * num_bands)).astype(np.float32)
+
+
+_DCT_MATRIX = _dct_matrix(MFCC_NUM_CEPSTRA, MFCC_NUM_MEL_BANDS)
+
+
+def mfcc(samples, sample_rate):
+    """Returns MFCCs without the energy coefficient, one row per 10 ms hop."""
+    frame_length = int(sample_rate * MFCC_FRAME_DURATION)
+    hop_length = int(sample_rate * MFCC_HOP_DURATION)
+    if len(samples) < frame_length:
+        return np.zeros((0, MFCC_NUM_CEPSTRA - 1), dtype=np.float32)
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1]).astype(np.float32)
+    frame_count = 1 + (len(emphasized) - frame_length) // hop_length
+    frames = np.lib.stride_tricks.as_strided(
+        emphasized, shape=(frame_count, frame_length),
+        strides=(emphasized.strides[0] * hop_length, emphasized.strides[0]), writeable=False)
+    fft_size = 1 << (frame_length - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames * np.hamming(frame_length), n=fft_size, axis=1)) ** 2 / fft_size
+    mel_energies = np.log(power @ _mel_filterbank(sample_rate, fft_size).T + _EPSILON)
+    return (mel_energies @ _DCT_MATRIX.T)[:, 1:]  # c0 only carries loudness, drop it for level invariance
+
+
+def trim_to_speech(samples, sample_rate, floor_margin_db=10.0, peak_range_db=35.0):
+    """Cuts leading and trailing silence so templates only contain the spoken word."""
+    frames = frame_signal(samples, sample_rate)
+    if len(frames) == 0:
+        return samples
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + _EPSILON)
+    threshold = max(np.percentile(energy_db, 10) + floor_margin_db, energy_db.max() - peak_range_db)
+    active = np.flatnonzero(energy_db > threshold)
+    if len(active) == 0:
+        return samples[:0]
+    frame_length = frames.shape[1]
+    return samples[active[0] * frame_length:(active[-1] + 1) * frame_length]
+
+
+def subsequence_dtw_distance(template, utterance):
+    """
+    Best alignment cost of the whole template against any stretch of the utterance, normalized
+    by template length. Steps come from (i-1, j-1), (i-1, j-2) and, with a penalty, (i-1, j), so
+    every template row depends only on the previous one and is computed in one vectorized step.
+    """
+    if len(template) == 0 or len(utterance) < len(template) // 2:
+        return np.inf
+    cost = np.sqrt(((template[:, None, :] - utterance[None, :, :]) ** 2).sum(axis=2)) / np.sqrt(template.shape[1])
+    accumulated = cost[0].copy()  # Free start anywhere in the utterance
+    for row in range(1, len(template)):
+        best_previous = accumulated + DTW_REPEAT_PENALTY
+        best_previous[1:] = np.minimum(best_previous[1:], accumulated[:-1])
+        best_previous[2:] = np.minimum(best_previous[2:], accumulated[:-2])
+        accumulated = cost[row] + best_previous
+    return float(accumulated.min()) / len(template)
+
+
+def _word_slug(word):
+    normalized = " ".join((word or "").lower().split())
+    readable = re.sub(r"[^a-z0-9]+", "_", normalized).strip("_")[:32] or "word"
+    return f"{readable}_{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:8]}"
+
+
+class KeywordSpotter:
+    """
+    Offline activation-word detector. Audio is matched against a few user-recorded templates
+    of the active word with subsequence DTW over MFCC features, so the passive loop only calls
+    cloud STT for audio that already sounds like the activation word.
+    """
+
+    def __init__(self, templates_dir):
+        self.templates_dir = templates_dir
+        self.active_word = None
+        self.templates = []
+        self.threshold = DEFAULT_THRESHOLD
+        self.checked = 0
+        self.rejected = 0
+        self.last_score = None
+
+    def _template_path(self, word):
+        return os.path.join(self.templates_dir, f"{_word_slug(word)}.npz")
+
+    def set_active_word(self, word):
+        if word == self.active_word:
+            return self.is_enrolled()
+        self.active_word = word
+        self.templates = []
+        self.threshold = DEFAULT_THRESHOLD
+        path = self._template_path(word)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.templates = [data[name] for name in sorted(data.files) if name.startswith("template_")]
+                    self.threshold = float(data["threshold"]) if "threshold" in data.files else DEFAULT_THRESHOLD
+                print(f"Offline wake word '{word}': {len(self.templates)} template(s) loaded.")
+            except Exception as e:
+                print(f"Error loading wake word templates from '{path}': {e}")
+                self.templates = []
+        return self.is_enrolled()
+
+    def is_enrolled(self):
+        return bool(self.templates)
+
+    def score(self, audio_data):
+        samples = pcm_to_float(audio_data.frame_data, audio_data.sample_width)
+        features = mfcc(samples, audio_data.sample_rate)
+        return min(subsequence_dtw_distance(template, features) for template in self.templates)
+
+    def matches(self, audio_data):
+        """True if audio_data contains the active word. Always True when no templates are enrolled."""
+        if not self.templates:
+            return True
+        self.checked += 1
+        self.last_score = self.score(audio_data)
+        if self.last_score <= self.threshold:
+            return True
+        self.rejected += 1
+        return False
+
+    def enroll(self, word, audio_samples):
+        """Builds templates for word from a list of AudioData recordings and saves them. Returns the template count."""
+        templates = []
+        for audio_data in audio_samples:
+            samples = trim_to_speech(pcm_to_float(audio_data.frame_data, audio_data.sample_width), audio_data.sample_rate)
+            features = mfcc(samples, audio_data.sample_rate)
+            if len(features) >= 10:  # At least 100 ms of speech
+                templates.append(features)
+        if len(templates) < 2:
+            print(f"Wake word enrollment for '{word}' failed: only {len(templates)} usable recording(s).")
+            return 0
+
+        pairwise = [subsequence_dtw_distance(a, b) for i, a in enumerate(templates)
+                    for j, b in enumerate(templates) if i != j]
+        pairwise = [distance for distance in pairwise if np.isfinite(distance)]
+        threshold = float(np.mean(pairwise)) * THRESHOLD_MARGIN if pairwise else DEFAULT_THRESHOLD
+
+        try:
+            os.makedirs(self.templates_dir, exist_ok=True)
+            np.savez(self._template_path(word), threshold=np.float32(threshold),
+                     **{f"template_{index:02d}": template for index, template in enumerate(templates)})
+        except OSError as e:
+            print(f"Error saving wake word templates for '{word}': {e}")
+            return 0
+        print(f"Wake word '{word}' enrolled with {len(templates)} template(s), threshold {threshold:.3f}.")
+        self.active_word = None  # Force a reload of the freshly saved templates
+        self.set_active_word(word)
+        return len(templates)
+
+    def stats(self):
+        return {
+            "active_word": self.active_word,
+            "templates": len(self.templates),
+            "threshold": round(self.threshold, 3),
+            "checked": self.checked,
+            "rejected": self.rejected,
+        }
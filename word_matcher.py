@@ -0,0 +1,127 @@
+import re
+import unicodedata
+
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+DEFAULT_MAX_EDIT_RATIO = 0.2  # Allowed typos per character, e.g. 1 for "Manfred", 0 for "stop"
+MIN_FUZZY_WORD_LENGTH = 4
+MIN_PHONETIC_KEY_LENGTH = 3  # Shorter keys ("tschüss" -> "s") are shared by too many everyday words
+
+# Letter groups that STT engines tend to swap for each other, reduced to one representative
+_PHONETIC_REPLACEMENTS = (
+    ("tsch", "s"), ("sch", "s"), ("ch", "k"), ("ck", "k"), ("ph", "f"), ("th", "t"), ("qu", "kv"),
+    ("dt", "t"), ("tz", "s"), ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "s"), ("v", "f"), ("w", "f"),
+    ("y", "i"), ("j", "i"), ("d", "t"), ("b", "p"), ("g", "k"),
+)
+
+
+def _fold(text):
+    """Lowercases and strips accents, so 'Manfréd' and 'manfred' compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).replace("ß", "ss")
+
+
+def phonetic_key(word):
+    """Coarse sound-alike key: merges similar consonants, drops vowels after the first letter, collapses repeats."""
+    key = _fold(word)
+    for source, target in _PHONETIC_REPLACEMENTS:
+        key = key.replace(source, target)
+    if not key:
+        return ""
+    tail = re.sub(r"[aeiouh]", "", key[1:])
+    return re.sub(r"(.)\1+", r"\1", key[0] + tail)
+
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein distance, stopping early once it is known to exceed max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class PhraseMatch:
+    def __init__(self, phrase, start, end, fuzzy):
+        self.phrase = phrase
+        self.start = start
+        self.end = end
+        self.fuzzy = fuzzy
+
+
+class PhraseMatcher:
+    """
+    Finds any of a fixed set of phrases (activation word, stop words) in recognized text.
+
+    All phrases are compiled once into a single case-insensitive alternation with word boundaries.
+    If that finds nothing and fuzzy is enabled, the text's words are compared with each phrase,
+    word by word, allowing a few edits or (with phonetic) an equal phonetic key, so "Manfried"
+    still counts as "Manfred". The phonetic key ignores vowels, which is fine for a distinctive
+    name but makes short common words collide ("step", "setup" and "stub" all sound like "stop"),
+    so stop words should be matched without it. For the same reason it is only tried for phrase
+    words whose key keeps at least MIN_PHONETIC_KEY_LENGTH consonants, and only for text words of
+    at least MIN_FUZZY_WORD_LENGTH letters.
+    """
+
+    def __init__(self, phrases, fuzzy=True, max_edit_ratio=DEFAULT_MAX_EDIT_RATIO, phonetic=True):
+        self.phrases = [phrase.strip() for phrase in dict.fromkeys(phrases or []) if phrase and phrase.strip()]
+        self.fuzzy = fuzzy
+        self.phonetic = phonetic
+        self.max_edit_ratio = max_edit_ratio
+        self.exact_matches = 0
+        self.fuzzy_matches = 0
+        longest_first = sorted(self.phrases, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in longest_first) + r")\b",
+                                   re.IGNORECASE) if self.phrases else None
+        self._fuzzy_phrases = []
+        for phrase in self.phrases:
+            words = [_fold(word) for word in WORD_PATTERN.findall(phrase)]
+            if words:
+                keys = [phonetic_key(word) for word in words]
+                self._fuzzy_phrases.append((phrase, words, [key if len(key) >= MIN_PHONETIC_KEY_LENGTH else None
+                                                            for key in keys]))
+
+    def _word_matches(self, word, phrase_word, phrase_key):
+        if word == phrase_word:
+            return True
+        if len(phrase_word) < MIN_FUZZY_WORD_LENGTH:
+            return False
+        max_edits = int(len(phrase_word) * self.max_edit_ratio)
+        if max_edits and edit_distance(word, phrase_word, max_edits) <= max_edits:
+            return True
+        if not self.phonetic or phrase_key is None or len(word) < MIN_FUZZY_WORD_LENGTH:
+            return False
+        return phonetic_key(word) == phrase_key
+
+    def search(self, text):
+        """Returns a PhraseMatch for the first phrase found in text (end = index after it), or None."""
+        if not text or not self._pattern:
+            return None
+        match = self._pattern.search(text)
+        if match:
+            self.exact_matches += 1
+            return PhraseMatch(match.group(0), match.start(), match.end(), fuzzy=False)
+        if not self.fuzzy:
+            return None
+
+        tokens = list(WORD_PATTERN.finditer(text))
+        folded = [_fold(token.group(0)) for token in tokens]
+        for index in range(len(tokens)):
+            for phrase, words, keys in self._fuzzy_phrases:
+                if index + len(words) > len(tokens):
+                    continue
+                if all(self._word_matches(folded[index + offset], words[offset], keys[offset])
+                       for offset in range(len(words))):
+                    self.fuzzy_matches += 1
+                    end = tokens[index + len(words) - 1].end()
+                    return PhraseMatch(phrase, tokens[index].start(), end, fuzzy=True)
+        return None
+
+    def stats(self):
+        return {"phrases": len(self.phrases), "exact_matches": self.exact_matches, "fuzzy_matches": self.fuzzy_matches}